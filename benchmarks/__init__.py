@@ -0,0 +1 @@
+"""Benchmarks for clan role manager."""
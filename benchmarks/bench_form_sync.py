@@ -0,0 +1,58 @@
+"""
+Benchmark of the form sync against a local CSV fixture (no Google API).
+
+Runs in a temporary directory, so the application's clan.db is not touched.
+
+Usage: python -m benchmarks.bench_form_sync [rows] [new_rows]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROLES = [f"role{i}" for i in range(40)]
+
+
+def make_rows(num_rows: int, start: int = 0, num_players: int = 20000, seed: int = 42):
+    """Form rows (date, nickname, comma-separated roles); players answer several times."""
+    rng = random.Random(seed + start)
+    rows = []
+    for i in range(start, start + num_rows):
+        date = f"{1 + i % 28:02d}.{1 + i // 28 % 12:02d}.2025 {i % 24:02d}:{i % 60:02d}:00"
+        roles = ", ".join(rng.sample(ROLES, rng.randint(1, 5)))
+        rows.append([date, f"player{rng.randrange(num_players)}", roles])
+    return rows
+
+
+def main():
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    new_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    workdir = tempfile.mkdtemp(prefix="clan_bench_")
+    os.chdir(workdir)  # before the services open clan.db in the working directory
+    from services.form_service import FormService, FileFormBackend
+
+    path = os.path.join(workdir, "form.csv")
+    header = ["Позначка часу", "Нікнейм", "Ролі"]
+    rows = make_rows(num_rows)
+    FileFormBackend.write_rows(path, [header] + rows)
+    backend = FileFormBackend(path)
+
+    start = time.perf_counter()
+    update = FormService.fetch_updates(backend)
+    FormService.save_sync_state(update)
+    print(f"first sync: {update.rows_read} rows, {len(update.responses)} players "
+          f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    FileFormBackend.write_rows(path, [header] + rows + make_rows(new_rows, start=num_rows))
+    start = time.perf_counter()
+    update = FormService.fetch_updates(backend)
+    print(f"incremental: {update.rows_read} rows, {len(update.responses)} players "
+          f"in {(time.perf_counter() - start) * 1000:.1f} ms (full resync: {update.full_resync})")
+    print(f"(fixture and database in {workdir})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Seeded synthetic rosters for benchmarks.
+
+Role popularity follows a Zipf distribution (a few roles are wanted by
+most players), every player has 1-6 preferences and a history of past
+assignments, mostly for roles they prefer. The same seed always gives the
+same roster.
+"""
+
+import bisect
+import itertools
+import random
+import string
+from typing import List, Tuple
+
+from models.player import Player
+from models.role import Role
+
+NICK_ALPHABET = string.ascii_letters + string.digits + "_"
+
+
+def zipf_weights(n: int, s: float = 1.1) -> List[float]:
+    """Cumulative Zipf weights for n ranks (for bisect sampling)."""
+    return list(itertools.accumulate(1.0 / (k + 1) ** s for k in range(n)))
+
+
+def weighted_sample(rng: random.Random, items: List[str], cumulative: List[float], k: int) -> List[str]:
+    """k distinct items drawn with the given cumulative weights, in draw order."""
+    k = min(k, len(items))
+    picked = {}
+    total = cumulative[-1]
+    while len(picked) < k:
+        item = items[bisect.bisect(cumulative, rng.random() * total)]
+        picked[item] = None
+    return list(picked)
+
+
+def make_nicknames(rng: random.Random, n: int) -> List[str]:
+    nicknames = {}
+    while len(nicknames) < n:
+        nicknames["".join(rng.choices(NICK_ALPHABET, k=rng.randint(5, 12)))] = None
+    return list(nicknames)
+
+
+def make_roster(num_players: int, num_roles: int = 40, seed: int = 42) -> Tuple[List[Role], List[Player]]:
+    """Roles (priorities 0-9) and players with Zipf-distributed preferences and assignment histories."""
+    rng = random.Random(seed)
+    roles = [Role(f"role_{i}", rng.randrange(10)) for i in range(num_roles)]
+    names = [role.name for role in roles]
+    cumulative = zipf_weights(num_roles)
+
+    players = []
+    for nickname in make_nicknames(rng, num_players):
+        preferences = weighted_sample(rng, names, cumulative, rng.randint(1, 6))
+        history = {}
+        for _ in range(rng.randint(0, 4)):
+            # Mostly roles the player prefers, sometimes a role filled in for others
+            role = rng.choice(preferences) if rng.random() < 0.8 else rng.choice(names)
+            history[role] = (rng.randint(1, 30), f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.25")
+        players.append(Player(nickname, preferences, history))
+    return roles, players
+
+
+def corrupt_nickname(rng: random.Random, nickname: str) -> str:
+    """An OCR-like misreading: look-alike characters swapped, sometimes a character lost."""
+    swaps = {'l': '1', 'I': 'l', 'O': '0', 'o': '0', 'S': '5', 'B': '8'}
+    chars = [swaps.get(c, c) if rng.random() < 0.5 else c for c in nickname]
+    if len(chars) > 5 and rng.random() < 0.3:
+        del chars[rng.randrange(len(chars))]
+    return "".join(chars)
@@ -0,0 +1,249 @@
+"""
+Benchmark suite: times the core service paths on synthetic rosters at several scales.
+
+Each scale runs in its own process against a temporary database (selected
+through the CLAN_DB environment variable), so caches and connections start
+cold and the application's clan.db is not touched. Results are written as
+JSON and can be compared with the results of an earlier run.
+
+Every repeated measurement is preceded by one untimed warm-up call.
+Measurements that can run only once (they change the database) are
+reported but not compared.
+
+Usage: python -m benchmarks.suite [--scales 100,10000,100000] [--roles 40] [--repeat 3]
+                                  [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from database import DB_PATH_ENV
+
+SCALES = [100, 10000, 100000]
+# Roles in the generated roster
+ROLES = 40
+# Players selected for an assignment round (the whole roster if smaller)
+ASSIGN_PLAYERS = 1000
+# Noisy OCR detections matched against the roster
+FUZZY_DETECTIONS = 300
+# Form rows synced into the roster
+FORM_ROWS = 2000
+# best-time ratio against the baseline reported as a regression (or improvement)
+REGRESSION_THRESHOLD = 1.2
+# Timings below this are too noisy to compare
+MIN_COMPARED_SECONDS = 0.001
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def timed(fn: Callable[[], object], repeat: int, setup: Callable[[], object] = None,
+          warmup: bool = True) -> Dict:
+    """
+    Best and median of repeat runs of fn (setup runs untimed before each).
+    Unless warmup is False, fn is first called once untimed (after setup), so
+    lazy imports and first-use caches are not counted in the first run.
+    """
+    if warmup:
+        if setup is not None:
+            setup()
+        fn()
+    runs = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+    return {'best': min(runs), 'median': statistics.median(runs), 'runs': len(runs)}
+
+
+def single_shot(fn: Callable[[], object]) -> Dict:
+    """One run of fn without warm-up, for measurements that change the database and cannot be repeated."""
+    return timed(fn, 1, warmup=False)
+
+
+def run_scale(num_players: int, num_roles: int, repeat: int, seed: int, workdir: str) -> Dict[str, Dict]:
+    """All measurements for one roster size; must run in a process whose CLAN_DB points into workdir."""
+    from benchmarks.generator import corrupt_nickname, make_roster
+    from services.assignment_service import AssignmentService
+    from services.form_service import FileFormBackend, FormService
+    from services.form_sync_service import FormSyncService
+    from services.fuzzy_match import NicknameIndex
+    from services.player_service import PlayerService
+    from services.role_service import RoleService
+    from services.roster_cache import roster_cache
+    from utils import snapshot_codec
+    from utils.data_manager import DataManager
+
+    generated = []
+    results = {'generate': single_shot(lambda: generated.append(make_roster(num_players, num_roles, seed=seed)))}
+    roles, players = generated[0]
+
+    # The database is built by importing a snapshot of the generated roster
+    snapshot = os.path.join(workdir, "roster.crms")
+    snapshot_codec.write_snapshot(snapshot, roles, players)
+    results['import_crms_fresh'] = single_shot(lambda: DataManager.import_from_path(snapshot))
+
+    results['list_players_cold'] = timed(PlayerService.list_players, repeat, roster_cache.invalidate)
+    results['list_players_warm'] = timed(PlayerService.list_players, repeat)
+    results['role_player_counts_cold'] = timed(RoleService.get_role_player_counts, repeat, roster_cache.invalidate)
+    results['role_player_counts_warm'] = timed(RoleService.get_role_player_counts, repeat)
+
+    rng = random.Random(seed)
+    nicknames = [p.nickname for p in players]
+    selected = rng.sample(nicknames, min(ASSIGN_PLAYERS, len(nicknames)))
+    slots = max(1, len(selected) // (2 * len(roles)))
+    role_counts = {role.name: slots for role in roles}
+    for strategy in ("greedy", "optimal"):
+        results[f'assign_{strategy}'] = timed(
+            lambda: AssignmentService.assign_roles(role_counts, selected, strategy, record=False), repeat
+        )
+
+    for ext in ("crm", "crms"):
+        path = os.path.join(workdir, f"export.{ext}")
+        results[f'export_{ext}'] = timed(lambda: DataManager.export_to_path(path), repeat)
+        results[f'import_{ext}_upsert'] = timed(lambda: DataManager.import_from_path(path), repeat)
+
+    detections = [corrupt_nickname(rng, nick) for nick in rng.choices(nicknames, k=FUZZY_DETECTIONS)]
+    results['fuzzy_index_build'] = timed(lambda: NicknameIndex(nicknames), repeat)
+    index = NicknameIndex(nicknames)
+    results[f'fuzzy_match_{FUZZY_DETECTIONS}'] = timed(lambda: index.match_all(detections), repeat)
+
+    # Form answers: mostly roster players changing their preferences, some newcomers
+    role_names = [role.name for role in roles]
+    form_rows = [["Позначка часу", "Нікнейм", "Ролі"]]
+    for i in range(FORM_ROWS):
+        nickname = rng.choice(nicknames) if rng.random() < 0.9 else f"newcomer{i}"
+        form_rows.append([f"{1 + i % 28:02d}.{1 + i // 28 % 12:02d}.2025 {i % 24:02d}:{i % 60:02d}:00",
+                          nickname, ", ".join(rng.sample(role_names, rng.randint(1, min(5, len(role_names)))))])
+    form_path = os.path.join(workdir, "form.csv")
+    FileFormBackend.write_rows(form_path, form_rows)
+    backend = FileFormBackend(form_path)
+    results['form_fetch'] = timed(lambda: FormService.fetch_responses(backend), repeat)
+    # Changes the roster, so it is measured once (later runs would find nothing to do)
+    results['form_sync'] = single_shot(lambda: FormSyncService.sync(backend, full=True))
+    return results
+
+
+def run_worker(num_players: int, num_roles: int, repeat: int, seed: int) -> Dict[str, Dict]:
+    """Run one scale in a fresh process with its own temporary database."""
+    workdir = tempfile.mkdtemp(prefix=f"clan_bench_{num_players}_")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")])))
+    env[DB_PATH_ENV] = os.path.join(workdir, "clan.db")
+    try:
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.suite", "--worker", str(num_players),
+             "--roles", str(num_roles), "--repeat", str(repeat), "--seed", str(seed)],
+            cwd=workdir, env=env, capture_output=True, text=True
+        )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"benchmark for {num_players} players failed:\n{proc.stderr}")
+    return json.loads(proc.stdout)
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def print_results(scales: Dict[str, Dict[str, Dict]]) -> None:
+    for scale, results in scales.items():
+        print(f"\n{scale} players")
+        for name, timing in results.items():
+            if timing['runs'] < 2:
+                print(f"  {name:<26} {timing['best'] * 1000:10.1f} ms  (single run, informational)")
+            else:
+                print(f"  {name:<26} {timing['best'] * 1000:10.1f} ms  (median {timing['median'] * 1000:.1f} ms)")
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    """
+    Print best-time ratios against the baseline; returns the regressed measurements.
+    Single-run measurements are too noisy to compare and are skipped.
+    """
+    regressions = []
+    print(f"\nComparison with {baseline['meta'].get('revision') or 'baseline'} (best times, new / old)")
+    if baseline['meta'].get('roles', ROLES) != current['meta'].get('roles', ROLES):
+        print("  note: the runs used different numbers of roles")
+    for scale, results in current['scales'].items():
+        old_results = baseline['scales'].get(scale, {})
+        for name, timing in results.items():
+            if name not in old_results or old_results[name]['best'] < MIN_COMPARED_SECONDS:
+                continue
+            if timing['runs'] < 2 or old_results[name].get('runs', 2) < 2:
+                continue
+            ratio = timing['best'] / old_results[name]['best']
+            mark = ""
+            if ratio > threshold:
+                mark = "  REGRESSION"
+                regressions.append(f"{scale}/{name}")
+            elif ratio < 1 / threshold:
+                mark = "  faster"
+            print(f"  {scale:>7} {name:<26} {ratio:6.2f}x{mark}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", default=",".join(map(str, SCALES)), help="comma-separated player counts")
+    parser.add_argument("--roles", type=int, default=ROLES, help="roles in the generated roster")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="results file of an earlier run")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="slowdown ratio reported as a regression")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        json.dump(run_scale(args.worker, args.roles, args.repeat, args.seed, os.getcwd()), sys.stdout)
+        return 0
+
+    current = {
+        'meta': {
+            'revision': git_revision(),
+            'date': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'roles': args.roles,
+            'repeat': args.repeat,
+        },
+        'scales': {},
+    }
+    for scale in (int(s) for s in args.scales.split(",")):
+        print(f"running {scale} players…", file=sys.stderr)
+        current['scales'][str(scale)] = run_worker(scale, args.roles, args.repeat, args.seed)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=2)
+    print_results(current['scales'])
+    print(f"\nresults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(current, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Headless command-line interface for clan role manager."""
@@ -0,0 +1,5 @@
+import sys
+
+from clanroles.cli import main
+
+sys.exit(main())
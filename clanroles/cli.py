@@ -0,0 +1,261 @@
+"""
+Command-line interface: python -m clanroles [--db PATH] <command> ...
+
+Runs the services without the GUI, e.g. for scheduled form syncs or batch
+assignments on a server. Every command imports only what it needs: nothing
+here loads PySide6, and only the ocr command loads easyocr/torch.
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Dict, List
+
+from database import DB_PATH_ENV
+
+
+def _progress(done: int, total: int, text: str) -> None:
+    """Progress line on stderr, redrawn in place on a terminal."""
+    if text and sys.stderr.isatty():
+        sys.stderr.write(f"\r\033[K{text}")
+        sys.stderr.flush()
+
+
+def _end_progress() -> None:
+    if sys.stderr.isatty():
+        sys.stderr.write("\r\033[K")
+        sys.stderr.flush()
+
+
+def _print_json(data) -> None:
+    json.dump(data, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+
+
+def _role_count(value: str):
+    name, sep, count = value.rpartition("=")
+    if not sep or not name or not count.isdigit():
+        raise argparse.ArgumentTypeError(f"expected NAME=COUNT, got '{value}'")
+    return name, int(count)
+
+
+def cmd_stats(args) -> int:
+    from services.player_service import PlayerService
+    from services.role_service import RoleService
+
+    roles = RoleService.list_roles_with_priority()
+    counts = RoleService.get_role_player_counts()
+    stats = {
+        'players': PlayerService.count_players(),
+        'roles': [{'name': r.name, 'priority': r.priority, 'players': counts.get(r.name, 0)} for r in roles],
+    }
+    if args.json:
+        _print_json(stats)
+        return 0
+    print(f"Players: {stats['players']}")
+    print(f"Roles: {len(roles)}")
+    for role in stats['roles']:
+        print(f"  {role['priority']:>4}  {role['name']}: {role['players']} players")
+    return 0
+
+
+def cmd_assign(args) -> int:
+    from services.assignment_service import AssignmentService
+    from services.player_service import PlayerService
+    from services.role_service import RoleService
+
+    role_counts: Dict[str, int] = dict(args.role)
+    unknown = [name for name in role_counts if name not in set(RoleService.list_roles())]
+    if unknown:
+        print(f"error: unknown roles: {', '.join(unknown)}", file=sys.stderr)
+        return 1
+
+    players: List[str] = []
+    if args.players:
+        players += [nick.strip() for nick in args.players.split(",") if nick.strip()]
+    if args.players_file:
+        f = sys.stdin if args.players_file == "-" else open(args.players_file, encoding="utf-8")
+        with f:
+            players += [line.strip() for line in f if line.strip()]
+    if not args.players and not args.players_file:
+        players = [p.nickname for p in PlayerService.list_players()]
+    if not players:
+        print("error: no players selected", file=sys.stderr)
+        return 1
+
+    result = AssignmentService.assign_roles(role_counts, players, args.strategy, record=not args.dry_run)
+    if args.json:
+        _print_json(result)
+        return 0
+    for role, assigned in result.items():
+        print(f"{role}: {', '.join(assigned) if assigned else '-'}")
+    if args.dry_run:
+        print("(dry run: assignments were not recorded)")
+    return 0
+
+
+def cmd_import(args) -> int:
+    from utils.data_manager import DataManager
+
+    report = DataManager.import_from_path(args.path, _progress)
+    _end_progress()
+    print(f"Players: {report.players_inserted} new, {report.players_updated} updated, "
+          f"{report.players_unchanged} unchanged, {report.players_skipped} skipped, "
+          f"{report.players_duplicates} duplicates")
+    print(f"Roles: {report.roles_inserted} new, {report.roles_skipped} skipped")
+    print(f"Assignment counters: {report.assignments}")
+    print(f"{report.seconds:.2f} s ({report.rows_per_second:.0f} rows/s)")
+    return 0
+
+
+def cmd_export(args) -> int:
+    from utils.data_manager import DataManager
+
+    stats = DataManager.export_to_path(args.path, _progress)
+    _end_progress()
+    print(f"Exported {stats.players} players and {stats.roles} roles to {args.path} "
+          f"in {stats.seconds:.2f} s ({stats.rows_per_second:.0f} rows/s)")
+    return 0
+
+
+def cmd_sync_form(args) -> int:
+    from services.form_service import FileFormBackend
+    from services.form_sync_service import FormSyncService
+
+    backend = FileFormBackend(args.fixture) if args.fixture else None
+    update, report = FormSyncService.sync(backend, full=args.full, progress=_progress)
+    _end_progress()
+    if args.json:
+        _print_json({
+            'rows_read': update.rows_read, 'full_resync': update.full_resync, 'skipped_rows': update.skipped,
+            'added': report.added, 'updated': report.updated, 'unchanged': len(report.unchanged),
+            'new_roles': report.new_roles, 'seconds': report.seconds,
+        })
+        return 0
+    print(f"Rows read: {update.rows_read}{' (full re-read)' if update.full_resync else ''}")
+    print(f"Added: {', '.join(report.added) or '-'}")
+    print(f"Updated: {', '.join(report.updated) or '-'}")
+    if report.new_roles:
+        print(f"New roles: {', '.join(report.new_roles)}")
+    print(f"Unchanged: {len(report.unchanged)}")
+    return 0
+
+
+def cmd_ocr(args) -> int:
+    import time
+
+    import numpy as np
+    from PIL import Image
+
+    from services.ocr_cache import OCRCache, ocr_cache
+    from services.ocr_service import OCRJob, OCRService
+    from utils.image_utils import find_text_column
+
+    print("Loading the OCR model…", file=sys.stderr)
+    job = OCRJob(OCRService.get_reader())
+    per_image = []
+    try:
+        for path in args.images:
+            with Image.open(path) as image:
+                array = np.asarray(image.convert("RGB"))
+            key = OCRCache.make_key(array, args.mode)
+            results = None if args.no_cache else ocr_cache.get(key)
+            if results is None:
+                start = time.perf_counter()
+                region = find_text_column(array) if args.mode == 'auto' else None
+                results = job.run(array, region, tile=args.mode == 'auto')
+                ocr_cache.put(key, results, time.perf_counter() - start)
+            per_image.append(OCRService.extract_nicks(results, args.prefix))
+    finally:
+        ocr_cache.close()
+
+    nicks = OCRService.merge_nicks(per_image)
+    matches = {}
+    if args.match:
+        from services.fuzzy_match import get_nickname_index
+        from services.player_service import PlayerService
+        index = get_nickname_index(p.nickname for p in PlayerService.list_players())
+        matches = {m.detected: m for m in index.match_all(nick for nick, _, _ in nicks)}
+
+    if args.json:
+        _print_json([{
+            'nickname': nick, 'prob': float(prob), 'image': args.images[i],
+            **({'roster': matches[nick].nickname, 'score': matches[nick].score} if nick in matches else {})
+        } for nick, prob, i in nicks])
+        return 0
+    for nick, prob, i in nicks:
+        line = f"{nick}\t{prob:.2f}\t{args.images[i]}"
+        if nick in matches:
+            line += f"\t{matches[nick].nickname or '-'}"
+        print(line)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m clanroles", description="Clan Role Manager without the GUI.")
+    parser.add_argument("--db", help="database file (default: clan.db in the working directory)")
+    parser.add_argument("--perf", action="store_true", help="print service and SQL timings to stderr when done")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    stats = commands.add_parser("stats", help="roster summary")
+    stats.add_argument("--json", action="store_true", help="machine-readable output")
+    stats.set_defaults(func=cmd_stats)
+
+    assign = commands.add_parser("assign", help="assign players to roles and record the assignments")
+    assign.add_argument("--role", type=_role_count, action="append", required=True, metavar="NAME=COUNT",
+                        help="slots to fill for a role (repeatable)")
+    assign.add_argument("--players", help="comma-separated nicknames (default: all players)")
+    assign.add_argument("--players-file", help="file with one nickname per line, '-' for stdin")
+    assign.add_argument("--strategy", choices=["greedy", "optimal"], default="greedy")
+    assign.add_argument("--dry-run", action="store_true", help="do not record the assignments")
+    assign.add_argument("--json", action="store_true", help="machine-readable output")
+    assign.set_defaults(func=cmd_assign)
+
+    import_ = commands.add_parser("import", help="import a .crm archive or .crms snapshot")
+    import_.add_argument("path")
+    import_.set_defaults(func=cmd_import)
+
+    export = commands.add_parser("export", help="export to a .crm archive (or a .crms snapshot by extension)")
+    export.add_argument("path")
+    export.set_defaults(func=cmd_export)
+
+    sync = commands.add_parser("sync-form", help="apply new form responses")
+    sync.add_argument("--full", action="store_true", help="re-read the whole sheet")
+    sync.add_argument("--fixture", help="read responses from a CSV/JSON file instead of Google Sheets")
+    sync.add_argument("--json", action="store_true", help="machine-readable output")
+    sync.set_defaults(func=cmd_sync_form)
+
+    ocr = commands.add_parser("ocr", help="detect clan nicknames on screenshots")
+    ocr.add_argument("images", nargs="+")
+    ocr.add_argument("--mode", choices=["full", "auto"], default="full",
+                     help="whole image, or only the detected text column")
+    ocr.add_argument("--prefix", default="[UKR]", help="clan tag the nicknames start with")
+    ocr.add_argument("--match", action="store_true", help="also match the nicknames against the roster")
+    ocr.add_argument("--no-cache", action="store_true", help="ignore cached OCR results")
+    ocr.add_argument("--json", action="store_true", help="machine-readable output")
+    ocr.set_defaults(func=cmd_ocr)
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.db:
+        # Works only because database.db_manager, which reads the variable when it
+        # creates the global instance, is not imported yet: the commands import it lazily
+        os.environ[DB_PATH_ENV] = os.path.abspath(args.db)
+    if args.perf:
+        from utils.perf import recorder
+        recorder.enable()
+    try:
+        return args.func(args)
+    except (OSError, ValueError) as e:
+        _end_progress()
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if args.perf:
+            print(recorder.format_report(), file=sys.stderr)
+        db_module = sys.modules.get("database.db_manager")
+        if db_module is not None:
+            db_module.db_manager.close()
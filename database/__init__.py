@@ -1 +1,6 @@
 """Database package for clan role manager."""
+
+# Overrides the database file of the global db_manager instance (command-line
+# interface, tests, benchmarks). Kept here so it can be imported without
+# importing database.db_manager, which opens the database on import.
+DB_PATH_ENV = "CLAN_DB"
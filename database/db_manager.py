@@ -3,24 +3,119 @@ Database manager for clan role manager application.
 Handles all database operations and connections.
 """
 
+import os
 import sqlite3
+import threading
 import json
-from typing import List, Dict, Optional
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Optional, Iterable
+
+from database import DB_PATH_ENV
+from utils.perf import recorder as perf
+
+
+class Transaction:
+    """Unit of work bound to a single connection; committed by DatabaseManager.transaction()."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def execute(self, query: str, params: tuple = (), fetch_one: bool = False, fetch_all: bool = False):
+        """Execute a query inside the transaction without committing."""
+        with perf.query(query) as span:
+            c = self.conn.cursor()
+            c.execute(query, params)
+            if fetch_one:
+                row = c.fetchone()
+                span.rows = int(row is not None)
+                return row
+            if fetch_all:
+                rows = c.fetchall()
+                span.rows = len(rows)
+                return rows
+            span.rows = max(c.rowcount, 0)
+            return None
+
+    def executemany(self, query: str, seq_of_params: Iterable[tuple]) -> int:
+        """Execute a query for every parameter tuple; returns the number of affected rows."""
+        with perf.query(query) as span:
+            c = self.conn.cursor()
+            c.executemany(query, seq_of_params)
+            span.rows = max(c.rowcount, 0)
+            return c.rowcount
 
 
 class DatabaseManager:
-    """Manages database connections and operations."""
+    """Manages database connections and operations.
+
+    By default every query opens and closes its own connection. With
+    ``persistent=True`` each thread keeps one connection open for the lifetime
+    of the manager (WAL journal, tuned pragmas) until :meth:`close` is called.
+    """
+
+    # Pragmas applied to persistent connections
+    PERSISTENT_PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA cache_size=-8000",
+        "PRAGMA busy_timeout=5000",
+    )
+
+    # Bumped whenever init_db gains a one-time data migration (PRAGMA user_version)
+    SCHEMA_VERSION = 1
 
-    def __init__(self, db_path: str = "clan.db"):
+    def __init__(self, db_path: str = "clan.db", persistent: bool = False):
         self.db_path = db_path
+        self.persistent = persistent
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._rollback_listeners = []
         self.init_db()
 
     def get_conn(self):
         """Get database connection with row factory."""
+        if self.persistent:
+            return self._get_thread_conn()
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys=ON")
         return conn
 
+    def _get_thread_conn(self):
+        """Return the persistent connection of the current thread, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Each connection is only used by the thread that opened it;
+            # check_same_thread is disabled so close() may run from any thread.
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA foreign_keys=ON")
+            for pragma in self.PERSISTENT_PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _release_conn(self, conn):
+        """Close a connection obtained from get_conn unless it is persistent."""
+        if not self.persistent:
+            conn.close()
+
+    def close(self):
+        """Close all persistent connections opened by any thread."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                pass
+        self._local = threading.local()
+
     def init_db(self):
         """Initialize database tables and perform migrations."""
         conn = self.get_conn()
@@ -30,9 +125,7 @@ class DatabaseManager:
         c.execute("""
         CREATE TABLE IF NOT EXISTS players (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nickname TEXT UNIQUE NOT NULL,
-            preferences TEXT NOT NULL, -- json list
-            role_assignments TEXT DEFAULT '{}' -- json dict {role_name: count}
+            nickname TEXT UNIQUE NOT NULL
         )
         """)
 
@@ -44,6 +137,36 @@ class DatabaseManager:
         )
         """)
 
+        c.execute("""
+        CREATE TABLE IF NOT EXISTS player_preferences (
+            player_id INTEGER NOT NULL REFERENCES players(id) ON DELETE CASCADE,
+            role_id INTEGER NOT NULL REFERENCES roles(id) ON DELETE CASCADE,
+            rank INTEGER NOT NULL, -- position in the player's preference list
+            PRIMARY KEY (player_id, role_id)
+        ) WITHOUT ROWID
+        """)
+        c.execute("CREATE INDEX IF NOT EXISTS idx_player_preferences_role ON player_preferences(role_id)")
+
+        c.execute("""
+        CREATE TABLE IF NOT EXISTS assignments (
+            player_id INTEGER NOT NULL REFERENCES players(id) ON DELETE CASCADE,
+            role_id INTEGER NOT NULL REFERENCES roles(id) ON DELETE CASCADE,
+            count INTEGER NOT NULL DEFAULT 0,
+            last_date TEXT NOT NULL DEFAULT '', -- dd.mm.yy
+            PRIMARY KEY (player_id, role_id)
+        ) WITHOUT ROWID
+        """)
+        c.execute("CREATE INDEX IF NOT EXISTS idx_assignments_role ON assignments(role_id)")
+
+        # Progress of incremental form syncs, one row per form source
+        c.execute("""
+        CREATE TABLE IF NOT EXISTS sync_state (
+            source TEXT PRIMARY KEY,
+            last_row INTEGER NOT NULL, -- sheet row number of the last processed response
+            last_row_hash TEXT NOT NULL -- detects edits or deletions above that row
+        )
+        """)
+
         # Migration: remove total_assignments column if it exists
         try:
             c.execute("ALTER TABLE players DROP COLUMN total_assignments")
@@ -60,28 +183,168 @@ class DatabaseManager:
             # Column already exists
             pass
 
+        # Migration: move JSON preferences/role_assignments into their own tables
+        version = c.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            self._migrate_json_columns(conn)
+        if version < self.SCHEMA_VERSION:
+            c.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
         conn.commit()
-        conn.close()
+        self._release_conn(conn)
+
+    @staticmethod
+    def _migrate_json_columns(conn: sqlite3.Connection):
+        """
+        Copy players.preferences / players.role_assignments JSON into
+        player_preferences and assignments, then drop the JSON columns.
+        Role names missing from the roles table are created so nothing is lost.
+        """
+        c = conn.cursor()
+        columns = {row['name'] for row in c.execute("PRAGMA table_info(players)")}
+        if 'preferences' not in columns:
+            return
+
+        def load(raw, default):
+            if not raw:
+                return default
+            try:
+                value = json.loads(raw)
+            except (json.JSONDecodeError, TypeError):
+                return default
+            return value if isinstance(value, type(default)) else default
+
+        rows = c.execute("SELECT id, preferences, role_assignments FROM players").fetchall()
+        preferences = []
+        assignments = []
+        for row in rows:
+            prefs = [str(role) for role in load(row['preferences'], [])]
+            for rank, role in enumerate(dict.fromkeys(prefs)):
+                preferences.append((row['id'], role, rank))
+            for role, value in load(row['role_assignments'], {}).items():
+                # Stored as [count, "dd.mm.yy"]; very old rows hold a bare count
+                if isinstance(value, (list, tuple)):
+                    count = value[0] if value else 0
+                    date = value[1] if len(value) > 1 else ""
+                else:
+                    count, date = value, ""
+                assignments.append((row['id'], role, int(count or 0), date or ""))
+
+        role_names = dict.fromkeys([p[1] for p in preferences] + [a[1] for a in assignments])
+        next_priority = c.execute("SELECT COALESCE(MAX(priority) + 1, 0) FROM roles").fetchone()[0]
+        for name in role_names:
+            c.execute("INSERT OR IGNORE INTO roles (name, priority) VALUES (?,?)", (name, next_priority))
+            next_priority += c.rowcount
+
+        c.executemany(
+            "INSERT INTO player_preferences (player_id, role_id, rank) "
+            "SELECT ?, id, ? FROM roles WHERE name=?",
+            [(player_id, rank, role) for player_id, role, rank in preferences]
+        )
+        c.executemany(
+            "INSERT INTO assignments (player_id, role_id, count, last_date) "
+            "SELECT ?, id, ?, ? FROM roles WHERE name=?",
+            [(player_id, count, date, role) for player_id, role, count, date in assignments]
+        )
+        c.execute("ALTER TABLE players DROP COLUMN preferences")
+        c.execute("ALTER TABLE players DROP COLUMN role_assignments")
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run several statements as one atomic commit.
+
+        Yields a Transaction. Any execute_query/executemany call made by the
+        same thread inside the block joins it, so service methods can be
+        composed. Nested transaction() blocks join the outermost one.
+        """
+        tx = getattr(self._local, 'tx', None)
+        if tx is not None:
+            yield tx
+            return
+
+        conn = self.get_conn()
+        tx = Transaction(conn)
+        self._local.tx = tx
+        try:
+            conn.execute("BEGIN")
+            yield tx
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            for listener in self._rollback_listeners:
+                listener()
+            raise
+        finally:
+            self._local.tx = None
+            self._release_conn(conn)
+
+    def add_rollback_listener(self, callback) -> None:
+        """Register a callable invoked after any transaction() block is rolled back."""
+        self._rollback_listeners.append(callback)
+
+    def executemany(self, query: str, seq_of_params: Iterable[tuple]) -> int:
+        """Execute a query for many parameter tuples in a single transaction."""
+        with self.transaction() as tx:
+            return tx.executemany(query, seq_of_params)
+
+    def iter_query(self, query: str, params: tuple = (), batch_size: int = 1000):
+        """
+        Yield the rows of a query, fetching batch_size rows at a time instead
+        of materialising the whole result. Joins the thread's transaction if any.
+        """
+        tx = getattr(self._local, 'tx', None)
+        conn = tx.conn if tx is not None else self.get_conn()
+        c = conn.cursor()
+        # Only the time spent in SQLite is measured, not the consumer's work between batches
+        seconds, total = 0.0, 0
+        try:
+            start = time.perf_counter()
+            c.execute(query, params)
+            while True:
+                rows = c.fetchmany(batch_size)
+                seconds += time.perf_counter() - start
+                if not rows:
+                    break
+                total += len(rows)
+                yield from rows
+                start = time.perf_counter()
+        finally:
+            c.close()
+            if tx is None:
+                self._release_conn(conn)
+            perf.record_query(query, seconds, total)
 
     def execute_query(self, query: str, params: tuple = (), fetch_one: bool = False, fetch_all: bool = False):
         """Execute a database query with proper error handling."""
+        tx = getattr(self._local, 'tx', None)
+        if tx is not None:
+            return tx.execute(query, params, fetch_one, fetch_all)
+
         conn = self.get_conn()
         try:
-            c = conn.cursor()
-            c.execute(query, params)
+            with perf.query(query) as span:
+                c = conn.cursor()
+                c.execute(query, params)
 
-            if fetch_one:
-                result = c.fetchone()
-            elif fetch_all:
-                result = c.fetchall()
-            else:
-                result = None
+                if fetch_one:
+                    result = c.fetchone()
+                    span.rows = int(result is not None)
+                elif fetch_all:
+                    result = c.fetchall()
+                    span.rows = len(result)
+                else:
+                    result = None
+                    span.rows = max(c.rowcount, 0)
 
-            conn.commit()
+                conn.commit()
             return result
+        except Exception:
+            conn.rollback()
+            raise
         finally:
-            conn.close()
+            self._release_conn(conn)
 
 
 # Global database manager instance
-db_manager = DatabaseManager()
+db_manager = DatabaseManager(os.environ.get(DB_PATH_ENV, "clan.db"), persistent=True)
@@ -3,11 +3,14 @@ import sys
 from PySide6.QtWidgets import QApplication
 
 from database.db_manager import db_manager
+from services.ocr_cache import ocr_cache
 from ui.main_window import MainWindow
 
 if __name__ == '__main__':
     db_manager.init_db()
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(db_manager.close)
+    app.aboutToQuit.connect(ocr_cache.close)
     mw = MainWindow()
     mw.show()
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,190 @@
+"""
+Assignment engines: algorithms that pick players for role slots.
+
+Engines are pure (no database access): AssignmentService builds an
+AssignmentProblem, hands it to the engine selected by ``strategy`` and
+persists the result.
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Dict, Tuple
+
+import numpy as np
+
+from models.player import Player
+
+
+@dataclass
+class AssignmentProblem:
+    """
+    Selected players, requested slot counts per role and role priorities.
+
+    Scoring data is built once per problem as dense player x role arrays,
+    columns following ``roles`` (the keys of role_counts):
+    ``preference_mask`` (bool), ``assignment_counts`` (int) and
+    ``preference_counts`` (int, per player).
+    """
+    players: List[Player]
+    role_counts: Dict[str, int]
+    role_priority: Dict[str, int]
+    roles: List[str] = field(init=False)
+    preference_mask: np.ndarray = field(init=False, repr=False)
+    assignment_counts: np.ndarray = field(init=False, repr=False)
+    preference_counts: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.roles = list(self.role_counts)
+        role_index = {role: j for j, role in enumerate(self.roles)}
+        shape = (len(self.players), len(self.roles))
+        self.preference_mask = np.zeros(shape, dtype=bool)
+        self.assignment_counts = np.zeros(shape, dtype=np.int64)
+        self.preference_counts = np.zeros(len(self.players), dtype=np.int64)
+
+        for i, p in enumerate(self.players):
+            self.preference_counts[i] = len(p.preferences)
+            for role in p.preferences:
+                j = role_index.get(role)
+                if j is not None:
+                    self.preference_mask[i, j] = True
+            for role in p.role_assignments:
+                j = role_index.get(role)
+                if j is not None:
+                    self.assignment_counts[i, j] = p.get_role_assignment_count(role)
+
+    def ordered_roles(self) -> List[int]:
+        """Role columns by priority, then scarcity (fewest candidates first), then name."""
+        candidate_counts = self.preference_mask.sum(axis=0)
+
+        def role_sort_key(j):
+            role = self.roles[j]
+            return self.role_priority.get(role, 999), candidate_counts[j], role
+
+        return sorted(range(len(self.roles)), key=role_sort_key)
+
+    def score_keys(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Candidate score as sort keys, lower is better: single-preference
+        players first (tier, per player), then fewest past assignments to the
+        role (per player and role), then fewer preferences (per player).
+        """
+        single = self.preference_counts == 1
+        tier = (~single).astype(np.int64)
+        preferences_key = np.where(single, 0, self.preference_counts)
+        return tier, self.assignment_counts, preferences_key
+
+
+class GreedyEngine:
+    """Fill roles one by one in priority order with their best-scored free candidates."""
+
+    @staticmethod
+    def solve(problem: AssignmentProblem) -> Dict[str, List[str]]:
+        tier, assignment_counts, preferences_key = problem.score_keys()
+        used = np.zeros(len(problem.players), dtype=bool)
+        assigned = {}
+
+        for j in problem.ordered_roles():
+            role = problem.roles[j]
+            cands = np.flatnonzero(problem.preference_mask[:, j] & ~used)
+            # lexsort uses the last key as primary; roster order breaks ties
+            order = np.lexsort((cands, preferences_key[cands], assignment_counts[cands, j], tier[cands]))
+            chosen = cands[order[:problem.role_counts[role]]]
+            assigned[role] = [problem.players[i].nickname for i in chosen]
+            used[chosen] = True
+
+        return assigned
+
+
+class MinCostEngine:
+    """
+    Global min-cost bipartite matching of players to role slots.
+
+    Every unfilled slot costs more than the secondary cost of any whole
+    matching, so the number of filled slots is maximised first. Among such solutions,
+    slots of higher-priority roles and candidates with a better score are
+    preferred.
+    """
+
+    @staticmethod
+    def solve(problem: AssignmentProblem) -> Dict[str, List[str]]:
+        from scipy.sparse import csr_matrix
+        from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+
+        ordered_roles = problem.ordered_roles()
+        mask = problem.preference_mask[:, ordered_roles]
+        assigned = {problem.roles[j]: [] for j in ordered_roles}
+        if not mask.any():
+            return assigned
+
+        # Dense rank of every score tuple of an allowed (player, role) pair
+        tier, assignment_counts, preferences_key = problem.score_keys()
+        counts = assignment_counts[:, ordered_roles]
+        count_base = int(preferences_key.max()) + 1
+        tier_base = (int(counts.max()) + 1) * count_base
+        keys = tier[:, None] * tier_base + counts * count_base + preferences_key[:, None]
+        unique_keys, key_rank = np.unique(keys[mask], return_inverse=True)
+        role_weight = len(unique_keys)
+        pair_players, pair_roles = np.nonzero(mask)
+        pair_cost = pair_roles * role_weight + key_rank + 1
+
+        # One column per fillable slot; a role never needs more slots than candidates
+        num_players = len(problem.players)
+        slots_per_role = np.minimum([problem.role_counts[problem.roles[j]] for j in ordered_roles],
+                                    mask.sum(axis=0))
+        slot_roles = np.repeat(np.arange(len(ordered_roles)), slots_per_role)
+        num_slots = len(slot_roles)
+        if not num_slots:
+            return assigned
+        # Above the largest possible total secondary cost of a matching (at most
+        # min(players, slots) pairs of at most len(ordered_roles) * role_weight
+        # each), so no reshuffle along an augmenting path can pay for an empty slot
+        unfilled_cost = min(num_players, num_slots) * len(ordered_roles) * role_weight + 1
+
+        # Sparse graph with a full matching: rows are players then one "unfilled"
+        # row per slot, columns are slots then one "unassigned" column per player.
+        # An unassigned player takes its own column; an unfilled slot is matched
+        # with its row; every player-slot edge has a mirrored zero-cost edge
+        # between that slot's row and that player's column. Costs are shifted
+        # by 1 because zero-weight entries are not edges.
+        slot_start = np.concatenate(([0], np.cumsum(slots_per_role)[:-1]))
+        repeat = slots_per_role[pair_roles]
+        edge_players = np.repeat(pair_players, repeat)
+        edge_costs = np.repeat(pair_cost, repeat)
+        edge_slots = (np.repeat(slot_start[pair_roles] - np.cumsum(repeat) + repeat, repeat)
+                      + np.arange(repeat.sum()))
+        slot_ids = np.arange(num_slots)
+        player_ids = np.arange(num_players)
+
+        rows = np.concatenate((edge_players, num_players + edge_slots, num_players + slot_ids, player_ids))
+        cols = np.concatenate((edge_slots, num_slots + edge_players, slot_ids, num_slots + player_ids))
+        weights = np.concatenate((edge_costs, np.ones_like(edge_costs),
+                                  np.full(num_slots, unfilled_cost + 1), np.ones(num_players)))
+        size = num_players + num_slots
+        graph = csr_matrix((weights.astype(float), (rows, cols)), shape=(size, size))
+        matched_rows, matched_cols = min_weight_full_bipartite_matching(graph)
+
+        chosen = {j: [] for j in range(len(ordered_roles))}
+        for i, col in zip(matched_rows, matched_cols):
+            if i < num_players and col < num_slots:
+                chosen[slot_roles[col]].append(i)
+
+        for k, players in chosen.items():
+            j = ordered_roles[k]
+            idx = np.array(players, dtype=np.int64)
+            order = np.lexsort((idx, preferences_key[idx], assignment_counts[idx, j], tier[idx]))
+            assigned[problem.roles[j]] = [problem.players[i].nickname for i in idx[order]]
+        return assigned
+
+
+# Available strategies for AssignmentService.assign_roles
+ENGINES = {
+    "greedy": GreedyEngine,
+    "optimal": MinCostEngine,
+}
+
+
+def get_engine(strategy: str):
+    """Return the engine registered under a strategy name."""
+    try:
+        return ENGINES[strategy]
+    except KeyError:
+        raise ValueError(f"Unknown assignment strategy '{strategy}'")
@@ -1,9 +1,13 @@
+import csv
+import hashlib
+import json
 import os
+import re
 import sys
-from datetime import datetime
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
 
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
+from database.db_manager import db_manager
 
 def resource_path(relative_path: str) -> str:
     try:
@@ -17,54 +21,201 @@ def resource_path(relative_path: str) -> str:
 SPREADSHEET_ID = "1vjwB8_4nWp-7BTqo8hBTYuXvPXmRT6MBXQGvsDY8jT0"
 SHEET_RANGE = "Відповіді форми (1)"
 SERVICE_KEY_FILE = resource_path("resources/service_account.json")
+# Шлях до локального файлу відповідей (CSV/JSON) замість Google Sheets — для тестів і бенчмарків
+FORM_FIXTURE_ENV = "CLAN_FORM_FIXTURE"
 # ----------------------------------------
 
+# Перший рядок таблиці — заголовок, відповіді починаються з другого
+FIRST_DATA_ROW = 2
+
+# Дата відповіді у форматі "%d.%m.%Y %H:%M:%S"
+_DATE_RE = re.compile(r"(\d{1,2})\.(\d{1,2})\.(\d{4}) (\d{1,2}):(\d{1,2}):(\d{1,2})")
+
+
+def _date_key(date_str: str) -> Tuple[int, ...]:
+    """
+    Ключ для порівняння дат відповідей; невірний формат — найстаріша дата.
+    Замість datetime.strptime, який у кілька разів повільніший на великих таблицях.
+    """
+    m = _DATE_RE.fullmatch(date_str)
+    if m is None:
+        return ()
+    day, month, year, hour, minute, second = map(int, m.groups())
+    if not (1 <= day <= 31 and 1 <= month <= 12 and hour < 24 and minute < 60 and second < 62):
+        return ()
+    return year, month, day, hour, minute, second
+
+
+class SheetsFormBackend:
+    """Джерело відповідей форми — Google Sheets (стовпці A:C аркуша)."""
+
+    def __init__(self, spreadsheet_id: str = SPREADSHEET_ID, sheet: str = SHEET_RANGE):
+        self.spreadsheet_id = spreadsheet_id
+        self.sheet = sheet
+        self.source = f"sheets:{spreadsheet_id}:{sheet}"
+
+    def fetch_rows(self, start_row: int) -> List[List[str]]:
+        """Рядки аркуша, починаючи з start_row (нумерація рядків таблиці з 1)."""
+        service = FormService._get_service()
+        result = service.spreadsheets().values().get(
+            spreadsheetId=self.spreadsheet_id,
+            range=f"'{self.sheet}'!A{start_row}:C"
+        ).execute()
+        return result.get("values", [])
+
+
+class FileFormBackend:
+    """
+    Локальна заміна Google Sheets: CSV-файл або JSON-масив рядків
+    з тим самим розташуванням стовпців (включно із заголовком).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.source = f"file:{os.path.abspath(path)}"
+
+    def fetch_rows(self, start_row: int) -> List[List[str]]:
+        with open(self.path, encoding="utf-8", newline="") as f:
+            if self.path.lower().endswith(".json"):
+                rows = json.load(f)
+            else:
+                rows = list(csv.reader(f))
+        return rows[start_row - 1:]
+
+    @staticmethod
+    def write_rows(path: str, rows: List[List[str]]) -> None:
+        """Записує рядки (разом із заголовком) у CSV- або JSON-фікстуру."""
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            if path.lower().endswith(".json"):
+                json.dump(rows, f, ensure_ascii=False)
+            else:
+                csv.writer(f).writerows(rows)
+
+
+@dataclass
+class FormUpdate:
+    """Відповіді з рядків, доданих після попередньої синхронізації, та нова позиція синхронізації."""
+    responses: Dict[str, List[str]]
+    source: str
+    last_row: int
+    last_row_hash: str
+    rows_read: int
+    full_resync: bool = False
+    skipped: List[int] = field(default_factory=list)  # неповні рядки
+
+
 class FormService:
 
+    _service = None  # клієнт Google Sheets, створюється один раз
+
     @staticmethod
     def _get_service():
-        creds = Credentials.from_service_account_file(
-            SERVICE_KEY_FILE,
-            scopes=["https://www.googleapis.com/auth/spreadsheets.readonly"]
-        )
-        return build("sheets", "v4", credentials=creds)
+        if FormService._service is None:
+            # Імпорт Google API лише при першій синхронізації, а не при старті додатку
+            from google.oauth2.service_account import Credentials
+            from googleapiclient.discovery import build
+
+            creds = Credentials.from_service_account_file(
+                SERVICE_KEY_FILE,
+                scopes=["https://www.googleapis.com/auth/spreadsheets.readonly"]
+            )
+            FormService._service = build("sheets", "v4", credentials=creds)
+        return FormService._service
 
     @staticmethod
-    def fetch_responses():
-        """Зчитує відповіді з Google Sheets і показує їх у таблиці"""
+    def default_backend():
+        """Google Sheets або локальний файл, якщо задано змінну середовища CLAN_FORM_FIXTURE."""
+        fixture = os.environ.get(FORM_FIXTURE_ENV)
+        return FileFormBackend(fixture) if fixture else SheetsFormBackend()
 
-        service = FormService._get_service()
-        result = service.spreadsheets().values().get(
-            spreadsheetId=SPREADSHEET_ID,
-            range=SHEET_RANGE
-        ).execute()
-        values = result.get("values", [])
-        if not values:
-            return {}
+    @staticmethod
+    def _row_hash(row: List[str]) -> str:
+        return hashlib.sha1("\x1f".join(row).encode("utf-8")).hexdigest()
 
-        data_dict = {}  # ключ: nickname, значення: масив з 3-го стовпця
-        for row in values[1:]:  # пропускаємо заголовок
+    @staticmethod
+    def _latest_responses(rows: List[List[str]], skipped: List[int] = None, first_row: int = 0) -> Dict[str, List[str]]:
+        """Остання (за датою) відповідь кожного нікнейма: nickname -> масив ролей з 3-го стовпця."""
+        data_dict = {}  # ключ: nickname, значення: дата та масив з 3-го стовпця
+        for i, row in enumerate(rows):
             if len(row) < 3:
+                if skipped is not None:
+                    skipped.append(first_row + i)
                 continue  # пропускаємо неповні рядки
 
             date_str = row[0]  # 1-й стовпець — дата
             nickname = row[1]  # 2-й стовпець — нікнейм
             third_column = [item.strip() for item in row[2].split(",")]  # 3-й стовпець → масив
 
-            # Перетворимо дату у datetime для порівняння
-            try:
-                row_date = datetime.strptime(date_str, "%d.%m.%Y %H:%M:%S")
-            except ValueError:
-                row_date = datetime.min  # якщо невірний формат, вважаємо дуже старою
+            # Перетворимо дату у ключ для порівняння
+            row_date = _date_key(date_str)
 
             # Якщо нікнейм вже є, залишаємо рядок з новішою датою
-            if nickname in data_dict:
-                existing_date = data_dict[nickname]["date"]
-                if row_date > existing_date:
-                    data_dict[nickname] = {"date": row_date, "values": third_column}
-            else:
-                data_dict[nickname] = {"date": row_date, "values": third_column}
+            if nickname not in data_dict or row_date > data_dict[nickname][0]:
+                data_dict[nickname] = (row_date, third_column)
 
         # Повертаємо лише масиви, без дати
-        final_dict = {k: v["values"] for k, v in data_dict.items()}
-        return final_dict
+        return {k: v[1] for k, v in data_dict.items()}
+
+    @staticmethod
+    def fetch_responses(backend=None) -> Dict[str, List[str]]:
+        """Зчитує всі відповіді форми: nickname -> масив ролей (остання відповідь кожного)."""
+        backend = backend or FormService.default_backend()
+        return FormService._latest_responses(backend.fetch_rows(FIRST_DATA_ROW))
+
+    @staticmethod
+    def fetch_updates(backend=None) -> FormUpdate:
+        """
+        Зчитує лише рядки, додані після попередньої синхронізації.
+
+        Запит починається з останнього обробленого рядка, і його хеш порівнюється
+        зі збереженим: якщо рядок змінився (відповіді редагували чи видаляли),
+        таблиця читається повністю. Позиція зберігається лише через save_sync_state(),
+        після того як відповіді застосовано.
+        """
+        backend = backend or FormService.default_backend()
+        state = db_manager.execute_query(
+            "SELECT last_row, last_row_hash FROM sync_state WHERE source=?",
+            (backend.source,), fetch_one=True
+        )
+
+        rows = None
+        start = FIRST_DATA_ROW
+        if state is not None:
+            rows = backend.fetch_rows(state['last_row'])
+            if rows and FormService._row_hash(rows[0]) == state['last_row_hash']:
+                rows = rows[1:]
+                start = state['last_row'] + 1
+            else:
+                rows = None
+        full_resync = rows is None
+        if full_resync:
+            rows = backend.fetch_rows(FIRST_DATA_ROW)
+
+        skipped = []
+        responses = FormService._latest_responses(rows, skipped, start)
+        if rows:
+            last_row, last_row_hash = start + len(rows) - 1, FormService._row_hash(rows[-1])
+        elif state is not None and not full_resync:
+            last_row, last_row_hash = state['last_row'], state['last_row_hash']
+        else:
+            last_row, last_row_hash = FIRST_DATA_ROW - 1, ""
+        return FormUpdate(responses, backend.source, last_row, last_row_hash, len(rows),
+                          full_resync=full_resync and state is not None, skipped=skipped)
+
+    @staticmethod
+    def save_sync_state(update: FormUpdate) -> None:
+        """Запам'ятовує позицію синхронізації після успішного застосування оновлення."""
+        if update.last_row < FIRST_DATA_ROW:
+            db_manager.execute_query("DELETE FROM sync_state WHERE source=?", (update.source,))
+            return
+        db_manager.execute_query(
+            "INSERT INTO sync_state (source, last_row, last_row_hash) VALUES (?, ?, ?) "
+            "ON CONFLICT(source) DO UPDATE SET last_row=excluded.last_row, last_row_hash=excluded.last_row_hash",
+            (update.source, update.last_row, update.last_row_hash)
+        )
+
+    @staticmethod
+    def reset_sync_state(backend=None) -> None:
+        """Наступна синхронізація прочитає таблицю повністю."""
+        backend = backend or FormService.default_backend()
+        db_manager.execute_query("DELETE FROM sync_state WHERE source=?", (backend.source,))
@@ -0,0 +1,87 @@
+"""
+Form sync service: reconciles form responses with the roster in bulk.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from database.db_manager import db_manager
+from services.form_service import FormService, FormUpdate
+from services.player_service import PlayerService
+from services.role_service import RoleService
+
+
+@dataclass
+class SyncReport:
+    """Outcome of one form sync."""
+    added: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    new_roles: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.updated or self.new_roles)
+
+
+class FormSyncService:
+    """Service applying form responses ({nickname: [roles]}) to the roster."""
+
+    @staticmethod
+    def reconcile(responses: Dict[str, List[str]]) -> SyncReport:
+        """
+        Add new players, replace changed preference lists and create unknown
+        roles in one transaction. Roles and the respondents' players are read
+        once and the diff is computed in memory.
+        """
+        start = time.perf_counter()
+        report = SyncReport()
+        with db_manager.transaction():
+            known_roles = set(RoleService.list_roles())
+            existing = {p.nickname: p for p in PlayerService.get_players(list(responses))}
+
+            new_players, changed = {}, {}
+            for nickname, preferences in responses.items():
+                for role in preferences:
+                    if role not in known_roles:
+                        known_roles.add(role)
+                        report.new_roles.append(role)
+
+                player = existing.get(nickname)
+                if player is None:
+                    new_players[nickname] = preferences
+                    report.added.append(nickname)
+                elif player.preferences != list(dict.fromkeys(preferences)):
+                    changed[nickname] = preferences
+                    report.updated.append(nickname)
+                else:
+                    report.unchanged.append(nickname)
+
+            # Roles from the form get the default priority, as when added by hand
+            RoleService.add_roles(report.new_roles)
+            PlayerService.add_players(new_players)
+            PlayerService.replace_preferences(changed)
+        report.seconds = time.perf_counter() - start
+        return report
+
+    @staticmethod
+    def sync(backend=None, full: bool = False,
+             progress: Optional[Callable[[int, int, str], None]] = None) -> Tuple[FormUpdate, SyncReport]:
+        """
+        Fetch the form rows added since the last sync (all rows if full) and apply
+        them; the sync position is saved in the same transaction as the changes.
+        progress(done, total, text) is called before each step and may raise to abort.
+        """
+        if full:
+            FormService.reset_sync_state(backend)
+        if progress:
+            progress(0, 0, "Завантаження відповідей…")
+        update = FormService.fetch_updates(backend)
+        if progress:
+            progress(0, 0, "Застосування змін…")
+        with db_manager.transaction():
+            report = FormSyncService.reconcile(update.responses)
+            FormService.save_sync_state(update)
+        return update, report
@@ -0,0 +1,138 @@
+"""
+Fuzzy matching of OCR-detected nicknames against the roster.
+
+OCR confuses look-alike characters (l/I/1, 0/O, Latin/Cyrillic homoglyphs)
+and drops characters, so detections are matched approximately: nicknames
+are normalised, candidates are found through a trigram inverted index and
+only the best few are verified with an edit-distance similarity.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Characters OCR mixes up, mapped to one representative
+_CONFUSABLES = str.maketrans({
+    '0': 'o', '1': 'l', 'i': 'l', '|': 'l', '!': 'l', '5': 's', '$': 's', '8': 'b',
+    # Cyrillic letters that look like Latin ones
+    'а': 'a', 'в': 'b', 'е': 'e', 'і': 'l', 'ї': 'l', 'к': 'k', 'м': 'm', 'н': 'h',
+    'о': 'o', 'р': 'p', 'с': 'c', 'т': 't', 'у': 'y', 'х': 'x',
+    ' ': None, '\t': None,
+})
+
+
+def normalize_nickname(nickname: str) -> str:
+    """Casefold, fold look-alike characters and drop whitespace."""
+    return nickname.casefold().translate(_CONFUSABLES)
+
+
+def _trigrams(normalized: str) -> List[str]:
+    padded = f"  {normalized} "
+    return list(dict.fromkeys(padded[i:i + 3] for i in range(len(padded) - 2)))
+
+
+def similarity(a: str, b: str, min_score: float = 0.0) -> float:
+    """
+    1 - Levenshtein distance / length of the longer string (1.0 for equal strings).
+    Returns 0.0 as soon as the score is known to be below min_score.
+    """
+    if a == b:
+        return 1.0
+    longest = max(len(a), len(b))
+    max_distance = int((1.0 - min_score) * longest + 1e-9)
+    if not a or not b or abs(len(a) - len(b)) > max_distance:
+        return 0.0
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > max_distance:
+            return 0.0
+        previous = current
+    if previous[-1] > max_distance:
+        return 0.0
+    return 1.0 - previous[-1] / longest
+
+
+@dataclass
+class NicknameMatch:
+    """Best roster candidate for a detected nickname; nickname is None below the threshold."""
+    detected: str
+    nickname: Optional[str]
+    score: float
+
+
+class NicknameIndex:
+    """Trigram index over roster nicknames for fuzzy lookups of OCR detections."""
+
+    DEFAULT_THRESHOLD = 0.8
+    # Candidates (by shared trigrams) verified with the edit distance per query
+    CANDIDATES = 8
+
+    def __init__(self, nicknames: Iterable[str]):
+        self.nicknames: List[str] = list(dict.fromkeys(nicknames))
+        self._normalized = [normalize_nickname(n) for n in self.nicknames]
+
+        self._exact: Dict[str, List[int]] = {}
+        postings: Dict[str, List[int]] = {}
+        gram_counts = []
+        for i, normalized in enumerate(self._normalized):
+            self._exact.setdefault(normalized, []).append(i)
+            grams = _trigrams(normalized)
+            gram_counts.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        self._postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self._gram_counts = np.array(gram_counts, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.nicknames)
+
+    def _candidates(self, normalized: str) -> np.ndarray:
+        """Ids of the nicknames with the highest trigram (Dice) overlap with the query."""
+        grams = _trigrams(normalized)
+        lists = [self._postings[g] for g in grams if g in self._postings]
+        if not lists:
+            return np.empty(0, dtype=np.int64)
+        ids, shared = np.unique(np.concatenate(lists), return_counts=True)
+        dice = 2 * shared / (len(grams) + self._gram_counts[ids])
+        if len(ids) > self.CANDIDATES:
+            top = np.argpartition(-dice, self.CANDIDATES - 1)[:self.CANDIDATES]
+            ids = ids[top]
+        return ids
+
+    def match(self, detected: str, threshold: float = DEFAULT_THRESHOLD) -> NicknameMatch:
+        """Best roster nickname for one detection."""
+        normalized = normalize_nickname(detected)
+        exact = self._exact.get(normalized)
+        if exact:
+            # Prefer the literal nickname when several normalise the same way
+            best = next((i for i in exact if self.nicknames[i] == detected), exact[0])
+            return NicknameMatch(detected, self.nicknames[best], 1.0)
+
+        best_id, best_score = None, 0.0
+        for i in self._candidates(normalized):
+            score = similarity(normalized, self._normalized[i], max(best_score, threshold))
+            if score > best_score:
+                best_id, best_score = int(i), score
+        if best_id is None:
+            return NicknameMatch(detected, None, best_score)
+        return NicknameMatch(detected, self.nicknames[best_id], best_score)
+
+    def match_all(self, detected: Iterable[str], threshold: float = DEFAULT_THRESHOLD) -> List[NicknameMatch]:
+        """Match every detection (in order)."""
+        return [self.match(nick, threshold) for nick in detected]
+
+
+_last_index: Optional[Tuple[Tuple[str, ...], NicknameIndex]] = None
+
+
+def get_nickname_index(nicknames: Iterable[str]) -> NicknameIndex:
+    """Index for the given roster, reused while the roster stays the same."""
+    global _last_index
+    key = tuple(nicknames)
+    if _last_index is None or _last_index[0] != key:
+        _last_index = (key, NicknameIndex(key))
+    return _last_index[1]
@@ -0,0 +1,342 @@
+"""
+Bulk import engine for .crm archives.
+
+Players are upserted in chunks with executemany inside a single transaction:
+new nicknames are inserted, existing players get their preference list
+replaced and their assignment history upserted (counts from the archive win,
+roles missing from the archive keep their history). Existing players are
+compared with their stored rows first, so only real changes are written and
+counted as updates. Entries that cannot be parsed are skipped and counted.
+A nickname repeated in the archive ends as if only its last entry had been
+imported, whichever chunks the entries fall in. The roster cache is
+invalidated afterwards instead of being updated player by player.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from database.db_manager import db_manager
+from models.player import Player
+from models.role import Role
+from services.role_service import RoleService
+from services.roster_cache import roster_cache
+
+# progress(done, total, text); may raise to abort and roll back the import
+ProgressCallback = Callable[[int, int, str], None]
+# (nickname, deduplicated preferences, {role: (count, last_date)})
+Entry = Tuple[str, List[str], Dict[str, Tuple[int, str]]]
+
+
+@dataclass
+class ImportReport:
+    """Exact outcome of an import."""
+    players_inserted: int = 0
+    players_updated: int = 0  # existing players whose preferences or assignments changed
+    players_unchanged: int = 0  # existing players already matching the archive
+    players_skipped: int = 0  # malformed entries
+    players_duplicates: int = 0  # entries superseded by a later entry with the same nickname
+    roles_inserted: int = 0
+    roles_skipped: int = 0  # already existing (their priority is kept) or malformed
+    assignments: int = 0  # (player, role) assignment counters written (new or changed)
+    seconds: float = 0.0
+
+    @property
+    def players(self) -> int:
+        """Distinct players in the archive."""
+        return self.players_inserted + self.players_updated + self.players_unchanged
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.players / self.seconds if self.seconds > 0 else 0.0
+
+
+class ImportService:
+    """Service upserting roles, players, preferences and assignment history in bulk."""
+
+    CHUNK_SIZE = 5000
+
+    # Bookkeeping of a running import, kept in the connection's temporary storage instead of Python
+    TEMP_TABLES = {
+        'import_chunk': "nickname TEXT PRIMARY KEY",
+        # Nicknames imported so far; updated is NULL for the players the import inserted
+        'import_nicknames': "nickname TEXT PRIMARY KEY, player_id INTEGER NOT NULL, updated INTEGER, "
+                            "preferences_saved INTEGER NOT NULL",
+        # Rows of existing players as they were before the import replaced them, restored
+        # when a later entry supersedes theirs (count NULL: the counter did not exist)
+        'import_saved_preferences': "player_id INTEGER NOT NULL, role_id INTEGER NOT NULL, "
+                                    "rank INTEGER NOT NULL, PRIMARY KEY (player_id, role_id)",
+        'import_saved_assignments': "player_id INTEGER NOT NULL, role_id INTEGER NOT NULL, "
+                                    "count INTEGER, last_date TEXT, PRIMARY KEY (player_id, role_id)",
+    }
+
+    @staticmethod
+    def import_roster(roles: List[Dict], players: Iterable[Dict], total: int = 0,
+                      progress: Optional[ProgressCallback] = None) -> ImportReport:
+        """Import role and player dicts (.crm layout) in one transaction."""
+        report = ImportReport()
+        role_rows = ImportService._parse_roles(roles, report)
+        entries = ImportService._parse_players(players, report)
+        return ImportService._import(role_rows, entries, total, progress, report)
+
+    @staticmethod
+    def import_models(roles: List[Role], players: Iterable[Player], total: int = 0,
+                      progress: Optional[ProgressCallback] = None) -> ImportReport:
+        """Import already validated Role and Player objects (e.g. a decoded snapshot) in one transaction."""
+        entries = ((p.nickname, list(dict.fromkeys(p.preferences)), p.role_assignments) for p in players)
+        return ImportService._import([(r.name, r.priority) for r in roles], entries, total, progress, ImportReport())
+
+    @staticmethod
+    def _import(role_rows: List[Tuple[str, int]], entries: Iterable[Entry], total: int,
+                progress: Optional[ProgressCallback], report: ImportReport) -> ImportReport:
+        start = time.perf_counter()
+        try:
+            with db_manager.transaction():
+                ImportService._import_roles(role_rows, report)
+                role_ids = ImportService._role_ids()
+                for table, columns in ImportService.TEMP_TABLES.items():
+                    db_manager.execute_query(f"CREATE TEMP TABLE IF NOT EXISTS {table} ({columns})")
+                done = 0
+                for chunk in ImportService._chunks(entries, ImportService.CHUNK_SIZE):
+                    if progress:
+                        elapsed = time.perf_counter() - start
+                        rate = f" ({done / elapsed:.0f} рядків/с)" if elapsed > 0 and done else ""
+                        of_total = f" / {total}" if total else ""
+                        progress(done, total, f"Імпорт: {done}{of_total}{rate}")
+                    ImportService._import_chunk(chunk, role_ids, report)
+                    done += len(chunk)
+                for table in ImportService.TEMP_TABLES:
+                    db_manager.execute_query(f"DROP TABLE {table}")
+        finally:
+            roster_cache.invalidate()
+        report.seconds = time.perf_counter() - start
+        return report
+
+    @staticmethod
+    def _chunks(entries: Iterable[Entry], size: int) -> Iterator[List[Entry]]:
+        chunk = []
+        for entry in entries:
+            chunk.append(entry)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def _parse_roles(roles: List[Dict], report: ImportReport) -> List[Tuple[str, int]]:
+        rows = []
+        for r in roles:
+            if isinstance(r, dict) and isinstance(r.get('name'), str) and isinstance(r.get('priority', 0), int):
+                rows.append((r['name'], r.get('priority', 0)))
+            else:
+                report.roles_skipped += 1
+        return rows
+
+    @staticmethod
+    def _import_roles(rows: List[Tuple[str, int]], report: ImportReport) -> None:
+        """Insert new roles with their priority; existing roles are left as they are."""
+        rows = list(dict(rows).items())  # a name repeated in the archive: the last entry wins
+        report.roles_inserted = db_manager.executemany(
+            "INSERT INTO roles (name, priority) VALUES (?,?) ON CONFLICT(name) DO NOTHING", rows
+        )
+        report.roles_skipped += len(rows) - report.roles_inserted
+
+    @staticmethod
+    def _role_ids() -> Dict[str, int]:
+        return {row['name']: row['id'] for row in db_manager.execute_query("SELECT id, name FROM roles", fetch_all=True)}
+
+    @staticmethod
+    def _parse_players(players: Iterable[Dict], report: ImportReport) -> Iterator[Entry]:
+        """Entries of the well-formed archive players; malformed ones are counted as skipped."""
+        for data in players:
+            parsed = ImportService._parse_player(data)
+            if parsed is None:
+                report.players_skipped += 1
+            else:
+                yield parsed
+
+    @staticmethod
+    def _parse_player(data) -> Optional[Entry]:
+        """(nickname, preferences, assignments) of an archive entry, or None if it is malformed."""
+        if not isinstance(data, dict) or not isinstance(data.get('nickname'), str) or not data['nickname']:
+            return None
+        preferences = data.get('preferences') or []
+        assignments = data.get('role_assignments') or {}
+        if not isinstance(preferences, list) or not isinstance(assignments, dict):
+            return None
+
+        parsed_assignments = {}
+        for role, value in assignments.items():
+            # Stored as [count, "dd.mm.yy"]; very old archives hold a bare count
+            if isinstance(value, (list, tuple)):
+                count = value[0] if value else 0
+                date = value[1] if len(value) > 1 else ""
+            else:
+                count, date = value, ""
+            if not isinstance(count, int) or not isinstance(date, str):
+                return None
+            parsed_assignments[role] = (count, date)
+        return data['nickname'], list(dict.fromkeys(str(role) for role in preferences)), parsed_assignments
+
+    @staticmethod
+    def _import_chunk(chunk: List[Entry], role_ids: Dict[str, int], report: ImportReport) -> None:
+        """Upsert one chunk of entries (role_ids is extended with roles created on the way)."""
+        entries = {}
+        for entry in chunk:
+            # A nickname repeated in the archive: the last entry wins
+            if entry[0] in entries:
+                report.players_duplicates += 1
+            entries[entry[0]] = entry
+
+        # Roles referenced by players but missing from the archive's role list
+        missing = [role for _, prefs, assignments in entries.values()
+                   for role in (*prefs, *assignments) if role not in role_ids]
+        if missing:
+            RoleService.ensure_roles(missing)
+            role_ids.update(ImportService._role_ids())
+
+        db_manager.execute_query("DELETE FROM import_chunk")
+        db_manager.executemany("INSERT INTO import_chunk (nickname) VALUES (?)", [(n,) for n in entries])
+
+        # Entries superseding one from an earlier chunk: the earlier one is undone first
+        earlier = db_manager.execute_query(
+            "SELECT n.player_id, n.updated, n.preferences_saved FROM import_chunk c "
+            "CROSS JOIN import_nicknames n ON n.nickname = c.nickname",
+            fetch_all=True
+        )
+        if earlier:
+            report.players_duplicates += len(earlier)
+            ImportService._undo_entries(earlier, report)
+        inserted_before = {row['player_id'] for row in earlier if row['updated'] is None}
+
+        # AUTOINCREMENT ids only grow, so the players inserted below are the ones above this id
+        last_id = db_manager.execute_query("SELECT COALESCE(MAX(id), 0) FROM players", fetch_one=True)[0]
+        db_manager.execute_query(
+            "INSERT INTO players (nickname) SELECT nickname FROM import_chunk WHERE true "
+            "ON CONFLICT(nickname) DO NOTHING"
+        )
+        inserted = db_manager.execute_query("SELECT changes()", fetch_one=True)[0]
+        report.players_inserted += inserted
+
+        # CROSS JOIN keeps the chunk as the outer loop instead of scanning all players
+        player_ids = dict(db_manager.execute_query(
+            "SELECT c.nickname, p.id FROM import_chunk c CROSS JOIN players p ON p.nickname = c.nickname",
+            fetch_all=True
+        ))
+        new_ids = {player_id for player_id in player_ids.values() if player_id > last_id} | inserted_before
+        preferences = {player_ids[nickname]: [role_ids[role] for role in prefs]
+                       for nickname, prefs, _ in entries.values()}
+        assignments = {(player_ids[nickname], role_ids[role]): value
+                       for nickname, _, player_assignments in entries.values()
+                       for role, value in player_assignments.items()}
+
+        saved_preferences = set()
+        if len(player_ids) > len(new_ids):
+            # Existing players: write only the preference lists and counters that differ
+            current_preferences, current_assignments = {}, {}
+            for player_id, role_id in db_manager.execute_query(
+                "SELECT pp.player_id, pp.role_id FROM import_chunk c "
+                "CROSS JOIN players p ON p.nickname = c.nickname "
+                "JOIN player_preferences pp ON pp.player_id = p.id ORDER BY pp.player_id, pp.rank",
+                fetch_all=True
+            ):
+                current_preferences.setdefault(player_id, []).append(role_id)
+            for player_id, role_id, count, date in db_manager.execute_query(
+                "SELECT a.player_id, a.role_id, a.count, a.last_date FROM import_chunk c "
+                "CROSS JOIN players p ON p.nickname = c.nickname "
+                "JOIN assignments a ON a.player_id = p.id",
+                fetch_all=True
+            ):
+                current_assignments[(player_id, role_id)] = (count, date)
+
+            preferences = {player_id: role_list for player_id, role_list in preferences.items()
+                           if current_preferences.get(player_id, []) != role_list}
+            assignments = {key: value for key, value in assignments.items()
+                           if current_assignments.get(key) != tuple(value)}
+            db_manager.executemany(
+                "DELETE FROM player_preferences WHERE player_id=?",
+                [(player_id,) for player_id in preferences if player_id in current_preferences]
+            )
+
+            # Keep what is replaced for existing players, in case a later entry supersedes this one
+            saved_preferences = {player_id for player_id in preferences if player_id not in new_ids}
+            db_manager.executemany(
+                "INSERT INTO import_saved_preferences (player_id, role_id, rank) VALUES (?, ?, ?)",
+                [(player_id, role_id, rank)
+                 for player_id in saved_preferences
+                 for rank, role_id in enumerate(current_preferences.get(player_id, []))]
+            )
+            db_manager.executemany(
+                "INSERT INTO import_saved_assignments (player_id, role_id, count, last_date) VALUES (?, ?, ?, ?)",
+                [(player_id, role_id, *current_assignments.get((player_id, role_id), (None, None)))
+                 for player_id, role_id in assignments if player_id not in new_ids]
+            )
+
+        changed = set(preferences) | {player_id for player_id, _ in assignments}
+        imported = []
+        for nickname, player_id in player_ids.items():
+            if player_id in new_ids:
+                imported.append((nickname, player_id, None, 0))
+                continue
+            updated = player_id in changed
+            if updated:
+                report.players_updated += 1
+            else:
+                report.players_unchanged += 1
+            imported.append((nickname, player_id, int(updated), int(player_id in saved_preferences)))
+        db_manager.executemany(
+            "INSERT OR REPLACE INTO import_nicknames (nickname, player_id, updated, preferences_saved) "
+            "VALUES (?, ?, ?, ?)", imported
+        )
+
+        db_manager.executemany(
+            "INSERT INTO player_preferences (player_id, role_id, rank) VALUES (?, ?, ?)",
+            [(player_id, role_id, rank)
+             for player_id, role_list in preferences.items()
+             for rank, role_id in enumerate(role_list)]
+        )
+        report.assignments += db_manager.executemany(
+            "INSERT INTO assignments (player_id, role_id, count, last_date) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(player_id, role_id) DO UPDATE SET count=excluded.count, last_date=excluded.last_date",
+            [(player_id, role_id, count, date) for (player_id, role_id), (count, date) in assignments.items()]
+        )
+
+    @staticmethod
+    def _undo_entries(rows: List, report: ImportReport) -> None:
+        """
+        Put the players of superseded entries (import_nicknames rows) back as
+        they were before the import, taking back what was counted for them.
+        """
+        inserted = [(row['player_id'],) for row in rows if row['updated'] is None]
+        existing = [(row['player_id'],) for row in rows if row['updated'] is not None]
+        for row in rows:
+            if row['updated'] is not None:
+                if row['updated']:
+                    report.players_updated -= 1
+                else:
+                    report.players_unchanged -= 1
+
+        # Players inserted by the import had no rows before it
+        report.assignments -= db_manager.executemany("DELETE FROM assignments WHERE player_id=?", inserted)
+        db_manager.executemany("DELETE FROM player_preferences WHERE player_id=?", inserted)
+
+        report.assignments -= db_manager.executemany(
+            "DELETE FROM assignments WHERE player_id=? AND role_id IN "
+            "(SELECT role_id FROM import_saved_assignments WHERE player_id=?)",
+            [(player_id, player_id) for player_id, in existing]
+        )
+        db_manager.executemany(
+            "INSERT INTO assignments (player_id, role_id, count, last_date) "
+            "SELECT player_id, role_id, count, last_date FROM import_saved_assignments "
+            "WHERE player_id=? AND count IS NOT NULL", existing
+        )
+        db_manager.executemany("DELETE FROM import_saved_assignments WHERE player_id=?", existing)
+
+        saved = [(row['player_id'],) for row in rows if row['preferences_saved']]
+        db_manager.executemany("DELETE FROM player_preferences WHERE player_id=?", saved)
+        db_manager.executemany(
+            "INSERT INTO player_preferences (player_id, role_id, rank) "
+            "SELECT player_id, role_id, rank FROM import_saved_preferences WHERE player_id=?", saved
+        )
+        db_manager.executemany("DELETE FROM import_saved_preferences WHERE player_id=?", saved)
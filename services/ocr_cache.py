@@ -0,0 +1,114 @@
+"""
+Persistent cache of OCR results keyed by the decoded image pixels.
+
+Pasting the same screenshot again (or loading it from a file) returns
+the stored results instead of running inference. Entries are kept in an
+SQLite file next to the main database; beyond MAX_ENTRIES the least
+recently used ones are evicted. A cache failure never breaks OCR: it is
+treated as a miss.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from database.db_manager import db_manager
+from services.ocr_service import OCRService
+
+
+class OCRCache:
+    """LRU cache of OCR results in an SQLite file, with hit statistics for the session."""
+
+    MAX_ENTRIES = 500
+    # Bump when OCR settings change so stale results are not reused
+    VERSION = 3
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def make_key(image: np.ndarray, mode: str, region: Optional[Tuple[int, int, int, int]] = None) -> str:
+        """Content hash of the pixels together with everything else that affects the results."""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{OCRCache.VERSION}|{OCRService.LANGUAGES}|{image.shape}|{mode}|{region}".encode())
+        digest.update(np.ascontiguousarray(image).data)
+        return digest.hexdigest()
+
+    def _get_conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            # Used from OCR worker threads; access is serialised by self._lock
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS ocr_cache (
+                    key TEXT PRIMARY KEY,
+                    results TEXT NOT NULL,
+                    seconds REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ocr_cache_last_used ON ocr_cache(last_used)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str) -> Optional[List[Tuple[list, str, float]]]:
+        """Cached results for the key (marking them as recently used), or None."""
+        with self._lock:
+            try:
+                conn = self._get_conn()
+                row = conn.execute("SELECT results, seconds FROM ocr_cache WHERE key=?", (key,)).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE ocr_cache SET last_used=? WHERE key=?", (time.time(), key))
+                    conn.commit()
+            except sqlite3.Error:
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.saved_seconds += row[1]
+            return [(box, text, prob) for box, text, prob in json.loads(row[0])]
+
+    def put(self, key: str, results: List[Tuple[list, str, float]], seconds: float) -> None:
+        """Store results and how long inference took, evicting the least recently used entries."""
+        data = json.dumps(results, default=lambda value: value.tolist())  # NumPy numbers and arrays
+        with self._lock:
+            try:
+                conn = self._get_conn()
+                conn.execute(
+                    "INSERT OR REPLACE INTO ocr_cache (key, results, seconds, last_used) VALUES (?, ?, ?, ?)",
+                    (key, data, seconds, time.time())
+                )
+                conn.execute(
+                    "DELETE FROM ocr_cache WHERE key IN "
+                    "(SELECT key FROM ocr_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.MAX_ENTRIES,)
+                )
+                conn.commit()
+            except sqlite3.Error:
+                pass
+
+    def stats(self) -> Dict[str, float]:
+        """Hits, misses and inference seconds saved in this session."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'saved_seconds': self.saved_seconds}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Global OCR cache next to the main database
+ocr_cache = OCRCache(os.path.join(os.path.dirname(os.path.abspath(db_manager.db_path)), "ocr_cache.db"))
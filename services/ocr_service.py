@@ -0,0 +1,210 @@
+"""
+OCR service: the shared easyocr engine used for nickname detection.
+
+easyocr (and torch with it) is imported only when the engine is first
+needed, so loading the application does not pay for it.
+"""
+
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.image_utils import rgb_to_grey
+
+
+class OCRService:
+    """Lazily created, process-wide easyocr Reader."""
+
+    LANGUAGES = ['en', 'uk']
+
+    _reader = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def is_loaded() -> bool:
+        """Whether the reader has already been created."""
+        return OCRService._reader is not None
+
+    @staticmethod
+    def get_reader():
+        """Return the shared reader, creating it on first call (blocks for several seconds)."""
+        with OCRService._lock:
+            if OCRService._reader is None:
+                import easyocr
+                OCRService._reader = easyocr.Reader(OCRService.LANGUAGES)
+            return OCRService._reader
+
+    @staticmethod
+    def extract_nicks(results: List[Tuple[list, str, float]], prefix: str = "[UKR]") -> List[Tuple[str, float]]:
+        """Nicknames of clan members (texts starting with prefix, prefix removed) with their confidence."""
+        return [(text.replace(prefix, "").strip(), prob)
+                for _, text, prob in results if text.startswith(prefix)]
+
+    @staticmethod
+    def merge_nicks(per_image: List[List[Tuple[str, float]]]) -> List[Tuple[str, float, int]]:
+        """
+        Deduplicate nicknames found on several images, keeping the most
+        confident reading of each: (nickname, prob, image index) in first-seen order.
+        """
+        best: Dict[str, Tuple[str, float, int]] = {}
+        for index, nicks in enumerate(per_image):
+            for nick, prob in nicks:
+                if nick not in best or prob > best[nick][1]:
+                    best[nick] = (nick, prob, index)
+        return list(best.values())
+
+
+class OCRCancelled(Exception):
+    """Raised by OCRJob.run when the job was cancelled."""
+
+
+def _box_bounds(box) -> Tuple[float, float, float, float]:
+    xs = [point[0] for point in box]
+    ys = [point[1] for point in box]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _shift_box(box, dx: int, dy: int) -> list:
+    return [[point[0] + dx, point[1] + dy] for point in box]
+
+
+def _dedupe_results(results: list) -> list:
+    """Drop boxes mostly covered by a more confident box (duplicates from tile overlaps)."""
+    kept = []
+    for result in sorted(results, key=lambda r: -r[2]):
+        x0, y0, x1, y1 = _box_bounds(result[0])
+        area = max((x1 - x0) * (y1 - y0), 1)
+        duplicate = False
+        for other, _, _ in kept:
+            ox0, oy0, ox1, oy1 = _box_bounds(other)
+            overlap = max(0, min(x1, ox1) - max(x0, ox0)) * max(0, min(y1, oy1) - max(y0, oy0))
+            if overlap > 0.5 * min(area, max((ox1 - ox0) * (oy1 - oy0), 1)):
+                duplicate = True
+                break
+        if not duplicate:
+            kept.append(result)
+    # Back to reading order
+    return sorted(kept, key=lambda r: (_box_bounds(r[0])[1], _box_bounds(r[0])[0]))
+
+
+class OCRJob:
+    """
+    One OCR run over an image: text detection, then recognition of the
+    detected boxes in small chunks. Progress is reported per stage and
+    cancellation is checked between chunks. All jobs share one lock, so at
+    most one inference runs at a time.
+
+    With tile=True, regions taller than the detector's canvas are split into
+    overlapping horizontal tiles, recognised one after another under the
+    lock (the Reader is shared and not thread-safe) and merged back. This is
+    for accuracy, not speed: easyocr scales a taller input down to the
+    canvas, which makes nickname text too small to read, while the tiles
+    keep the native resolution. Shorter regions are never tiled, so they
+    cost the same as without tile.
+    """
+
+    # Boxes recognised per call; bounds how long a cancelled job keeps running
+    RECOGNITION_CHUNK_SIZE = 8
+    # easyocr's default detector canvas (Reader.detect(canvas_size=2560)): inputs are
+    # scaled down to fit it, so regions taller than TILE_HEIGHT + TILE_OVERLAP are tiled
+    TILE_HEIGHT = 2560
+    # Must exceed the height of a text line, so every line is whole in some tile
+    TILE_OVERLAP = 64
+
+    _inference_lock = threading.Lock()
+
+    def __init__(self, reader, progress: Optional[Callable[[str, int, int], None]] = None):
+        """progress(stage, done, total) is called with stage 'waiting', 'detect', 'recognize' or 'tiles'."""
+        self.reader = reader
+        self._progress = progress or (lambda stage, done, total: None)
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        """Ask the job to stop at the next checkpoint (thread-safe)."""
+        self._cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def _check_cancelled(self) -> None:
+        if self._cancelled.is_set():
+            raise OCRCancelled()
+
+    def run(self, image: np.ndarray, region: Optional[Tuple[int, int, int, int]] = None,
+            tile: bool = False) -> List[Tuple[list, str, float]]:
+        """
+        Return (box, text, prob) results for the image, or only for
+        region=(x, y, width, height) of it; boxes are in image coordinates.
+        tile is meant for narrow text columns (the 'auto' and 'roi' modes);
+        without it the results are the same as reader.readtext(image).
+        """
+        if not self._inference_lock.acquire(blocking=False):
+            self._progress('waiting', 0, 0)
+            while not self._inference_lock.acquire(timeout=0.05):
+                self._check_cancelled()
+        try:
+            x, y = 0, 0
+            if region is not None:
+                x, y, width, height = region
+                image = image[y:y + height, x:x + width]
+            if tile and image.shape[0] > self.TILE_HEIGHT + self.TILE_OVERLAP:
+                results = self._run_tiled(image)
+            else:
+                results = self._run(image, self._progress)
+        finally:
+            self._inference_lock.release()
+        if x or y:
+            results = [(_shift_box(box, x, y), text, prob) for box, text, prob in results]
+        return results
+
+    def _run_tiled(self, image: np.ndarray) -> List[Tuple[list, str, float]]:
+        """Recognise overlapping horizontal tiles one after another and merge their boxes."""
+        height = image.shape[0]
+        step = self.TILE_HEIGHT - self.TILE_OVERLAP
+        tops = [0]
+        while tops[-1] + self.TILE_HEIGHT < height:
+            tops.append(tops[-1] + step)
+
+        results = []
+        self._progress('tiles', 0, len(tops))
+        for k, top in enumerate(tops):
+            # A tile keeps the boxes centred in its half of each overlap
+            start = 0 if k == 0 else self.TILE_OVERLAP / 2
+            end = self.TILE_HEIGHT - self.TILE_OVERLAP / 2 if k < len(tops) - 1 else self.TILE_HEIGHT
+            for box, text, prob in self._run(image[top:top + self.TILE_HEIGHT], None):
+                _, y0, _, y1 = _box_bounds(box)
+                if start <= (y0 + y1) / 2 < end:
+                    results.append((_shift_box(box, 0, top), text, prob))
+            self._progress('tiles', k + 1, len(tops))
+        return _dedupe_results(results)
+
+    def _run(self, image: np.ndarray, progress: Optional[Callable[[str, int, int], None]]
+             ) -> List[Tuple[list, str, float]]:
+        progress = progress or (lambda stage, done, total: None)
+        self._check_cancelled()
+        progress('detect', 0, 0)
+        if image.ndim == 3 and image.shape[2] == 3:
+            # Our arrays are RGB, which the detector expects (easyocr's own image loader
+            # gives it RGB too), but reformat_input would make the grey image as from BGR
+            img, img_grey = image, rgb_to_grey(image)
+        else:
+            from easyocr.utils import reformat_input
+            img, img_grey = reformat_input(image)
+        horizontal_list, free_list = self.reader.detect(img, reformat=False)
+        horizontal_list, free_list = horizontal_list[0], free_list[0]
+
+        # With the default batch size boxes are recognised one by one, so chunking does not change results
+        size = self.RECOGNITION_CHUNK_SIZE
+        chunks = ([(horizontal_list[i:i + size], []) for i in range(0, len(horizontal_list), size)]
+                  + [([], free_list[i:i + size]) for i in range(0, len(free_list), size)])
+        total = len(horizontal_list) + len(free_list)
+        results = []
+        done = 0
+        progress('recognize', done, total)
+        for h_chunk, f_chunk in chunks:
+            self._check_cancelled()
+            results += self.reader.recognize(img_grey, h_chunk, f_chunk, reformat=False)
+            done += len(h_chunk) + len(f_chunk)
+            progress('recognize', done, total)
+        return results
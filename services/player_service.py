@@ -2,38 +2,105 @@
 Player service for managing player operations.
 """
 
-import json
 import sqlite3
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Iterator, Tuple
 from models.player import Player
 from database.db_manager import db_manager
+from services.role_service import RoleService
+from services.roster_cache import roster_cache
+from utils.perf import instrument
 
 
+@instrument
 class PlayerService:
     """Service for managing player operations."""
 
+    # Max nicknames per "IN (...)" query, below SQLite's bound-parameter limit
+    LOOKUP_CHUNK_SIZE = 500
+
     @staticmethod
     def add_player(nickname: str, preferences: List[str]) -> None:
         """Add a new player to the database."""
-        prefs_json = json.dumps(preferences)
-        role_assignments_json = json.dumps({})
+        exists = False
+        with db_manager.transaction():
+            try:
+                db_manager.execute_query(
+                    "INSERT INTO players (nickname) VALUES (?)",
+                    (nickname,)
+                )
+            except sqlite3.IntegrityError:
+                # Raised after the block so a duplicate does not roll back an outer transaction
+                exists = True
+            else:
+                PlayerService._write_preferences(nickname, preferences)
+        if exists:
+            raise ValueError(f"Player with nickname '{nickname}' already exists")
+        roster_cache.put_player(Player(nickname, list(dict.fromkeys(preferences))))
 
-        try:
-            db_manager.execute_query(
-                "INSERT INTO players (nickname, preferences, role_assignments) VALUES (?,?,?)",
-                (nickname, prefs_json, role_assignments_json)
+    @staticmethod
+    def add_players(preferences_by_nickname: Dict[str, List[str]]) -> None:
+        """Add many new players with their preferences in one transaction."""
+        preferences_by_nickname = {n: list(dict.fromkeys(prefs)) for n, prefs in preferences_by_nickname.items()}
+        with db_manager.transaction():
+            db_manager.executemany(
+                "INSERT INTO players (nickname) VALUES (?)",
+                [(nickname,) for nickname in preferences_by_nickname]
             )
-        except sqlite3.IntegrityError:
-            raise ValueError(f"Player with nickname '{nickname}' already exists")
+            PlayerService._write_preferences_bulk(preferences_by_nickname)
+        for nickname, preferences in preferences_by_nickname.items():
+            roster_cache.put_player(Player(nickname, preferences))
+
+    @staticmethod
+    def replace_preferences(preferences_by_nickname: Dict[str, List[str]]) -> None:
+        """Replace the preference lists of many existing players in one transaction."""
+        preferences_by_nickname = {n: list(dict.fromkeys(prefs)) for n, prefs in preferences_by_nickname.items()}
+        with db_manager.transaction():
+            db_manager.executemany(
+                "DELETE FROM player_preferences WHERE player_id=(SELECT id FROM players WHERE nickname=?)",
+                [(nickname,) for nickname in preferences_by_nickname]
+            )
+            PlayerService._write_preferences_bulk(preferences_by_nickname)
+        for nickname, preferences in preferences_by_nickname.items():
+            roster_cache.update_player(nickname, preferences=preferences)
+
+    @staticmethod
+    def _write_preferences_bulk(preferences_by_nickname: Dict[str, List[str]]) -> None:
+        """Insert deduplicated preference lists (rank = position) for players that have none."""
+        RoleService.ensure_roles([role for prefs in preferences_by_nickname.values() for role in prefs])
+        db_manager.executemany(
+            "INSERT INTO player_preferences (player_id, role_id, rank) "
+            "SELECT p.id, r.id, ? FROM players p, roles r WHERE p.nickname=? AND r.name=?",
+            [(rank, nickname, role)
+             for nickname, prefs in preferences_by_nickname.items()
+             for rank, role in enumerate(prefs)]
+        )
 
     @staticmethod
     def update_player(nickname: str, new_nickname: str, preferences: List[str]) -> None:
         """Update an existing player."""
-        prefs_json = json.dumps(preferences)
+        with db_manager.transaction():
+            db_manager.execute_query(
+                "UPDATE players SET nickname=? WHERE nickname=?",
+                (new_nickname, nickname)
+            )
+            PlayerService._write_preferences(new_nickname, preferences)
+        roster_cache.rename_player(nickname, new_nickname)
+        roster_cache.update_player(new_nickname, preferences=list(dict.fromkeys(preferences)))
+
+    @staticmethod
+    def _write_preferences(nickname: str, preferences: List[str]) -> None:
+        """Replace the player's preference list, keeping its order as rank."""
+        preferences = list(dict.fromkeys(preferences))
+        RoleService.ensure_roles(preferences)
         db_manager.execute_query(
-            "UPDATE players SET nickname=?, preferences=? WHERE nickname=?",
-            (new_nickname, prefs_json, nickname)
+            "DELETE FROM player_preferences WHERE player_id=(SELECT id FROM players WHERE nickname=?)",
+            (nickname,)
+        )
+        db_manager.executemany(
+            "INSERT INTO player_preferences (player_id, role_id, rank) "
+            "SELECT p.id, r.id, ? FROM players p, roles r WHERE p.nickname=? AND r.name=?",
+            [(rank, nickname, role) for rank, role in enumerate(preferences)]
         )
 
     @staticmethod
@@ -43,114 +110,212 @@ class PlayerService:
             "DELETE FROM players WHERE nickname=?",
             (nickname,)
         )
+        roster_cache.remove_player(nickname)
+
+    @staticmethod
+    def _load_players(condition: str = "", params: tuple = ()) -> Dict[int, Player]:
+        """Load players matching an SQL condition on alias p, keyed by player id."""
+        where = f"WHERE {condition}" if condition else ""
+        with db_manager.transaction():
+            rows = db_manager.execute_query(
+                f"SELECT p.id, p.nickname FROM players p {where} ORDER BY p.id",
+                params, fetch_all=True
+            )
+            pref_rows = db_manager.execute_query(
+                "SELECT pp.player_id, r.name FROM players p "
+                "JOIN player_preferences pp ON pp.player_id = p.id "
+                f"JOIN roles r ON r.id = pp.role_id {where} ORDER BY pp.player_id, pp.rank",
+                params, fetch_all=True
+            )
+            assignment_rows = db_manager.execute_query(
+                "SELECT a.player_id, r.name, a.count, a.last_date FROM players p "
+                "JOIN assignments a ON a.player_id = p.id "
+                f"JOIN roles r ON r.id = a.role_id {where}",
+                params, fetch_all=True
+            )
+
+        players = {row['id']: Player(nickname=row['nickname']) for row in rows}
+        for player_id, role in pref_rows:
+            players[player_id].preferences.append(role)
+        for player_id, role, count, last_date in assignment_rows:
+            players[player_id].role_assignments[role] = (count, last_date)
+        return players
 
     @staticmethod
     def list_players() -> List[Player]:
-        """Get all players from the database."""
-        rows = db_manager.execute_query(
-            "SELECT nickname, preferences, role_assignments FROM players",
-            fetch_all=True
-        )
+        """Get all players from the roster cache, loading them from the database on a miss."""
+        return roster_cache.players(lambda: list(PlayerService._load_players().values()))
 
-        players = []
-        for row in rows:
-            role_assignments = row['role_assignments']
-            if role_assignments:
-                try:
-                    role_assignments_dict = json.loads(role_assignments)
-                except (json.JSONDecodeError, TypeError):
-                    role_assignments_dict = {}
-            else:
-                role_assignments_dict = {}
+    @staticmethod
+    def count_players() -> int:
+        """Number of players in the database."""
+        row = db_manager.execute_query("SELECT COUNT(*) FROM players", fetch_one=True)
+        return row[0]
 
-            player = Player(
-                nickname=row['nickname'],
-                preferences=json.loads(row['preferences']),
-                role_assignments=role_assignments_dict
+    @staticmethod
+    def iter_players(batch_size: int = 1000) -> Iterator[Player]:
+        """
+        Stream all players from the database in roster order with bounded memory,
+        bypassing the roster cache (for exports of very large rosters).
+        Players, preferences and assignments are read by three cursors ordered by
+        player id and merged, inside one read transaction for a consistent snapshot.
+        """
+        with db_manager.transaction():
+            players = db_manager.iter_query("SELECT id, nickname FROM players ORDER BY id", batch_size=batch_size)
+            prefs = db_manager.iter_query(
+                "SELECT pp.player_id, pp.rank, r.name FROM player_preferences pp "
+                "JOIN roles r ON r.id = pp.role_id ORDER BY pp.player_id",
+                batch_size=batch_size
             )
-            players.append(player)
-
-        return players
+            assignments = db_manager.iter_query(
+                "SELECT a.player_id, r.name, a.count, a.last_date FROM assignments a "
+                "JOIN roles r ON r.id = a.role_id ORDER BY a.player_id",
+                batch_size=batch_size
+            )
+            pref = next(prefs, None)
+            assignment = next(assignments, None)
+            for player_id, nickname in players:
+                ranked = []
+                while pref is not None and pref[0] <= player_id:
+                    if pref[0] == player_id:
+                        ranked.append((pref[1], pref[2]))
+                    pref = next(prefs, None)
+                role_assignments = {}
+                while assignment is not None and assignment[0] <= player_id:
+                    if assignment[0] == player_id:
+                        role_assignments[assignment[1]] = (assignment[2], assignment[3])
+                    assignment = next(assignments, None)
+                ranked.sort()
+                yield Player(nickname, [role for _, role in ranked], role_assignments)
 
     @staticmethod
     def get_player(nickname: str) -> Player:
         """Get a specific player by nickname."""
-        players = PlayerService.list_players()
-        player = next((p for p in players if p.nickname == nickname), None)
-        if not player:
+        players = roster_cache.lookup_players([nickname])
+        if players is None:
+            players = list(PlayerService._load_players("p.nickname=?", (nickname,)).values())
+        if not players:
             raise ValueError(f"Player '{nickname}' not found")
-        return player
+        return players[0]
+
+    @staticmethod
+    def get_players(nicknames: List[str]) -> List[Player]:
+        """Get many players by nickname in database order; unknown nicknames are skipped."""
+        nicknames = list(dict.fromkeys(nicknames))
+        cached = roster_cache.lookup_players(nicknames)
+        if cached is not None:
+            return cached
+        chunk = PlayerService.LOOKUP_CHUNK_SIZE
+        players = {}
+        with db_manager.transaction():
+            for start in range(0, len(nicknames), chunk):
+                batch = tuple(nicknames[start:start + chunk])
+                placeholders = ",".join("?" * len(batch))
+                players.update(PlayerService._load_players(f"p.nickname IN ({placeholders})", batch))
+        return [players[player_id] for player_id in sorted(players)]
 
     @staticmethod
     def get_players_with_role(role_name: str) -> List[str]:
         """Get list of player nicknames who have this role in their preferences."""
-        players = PlayerService.list_players()
-        return [p.nickname for p in players if p.has_role_preference(role_name)]
+        if roster_cache.is_loaded():
+            return [p.nickname for p in PlayerService.list_players() if p.has_role_preference(role_name)]
+        rows = db_manager.execute_query(
+            "SELECT p.nickname FROM players p "
+            "JOIN player_preferences pp ON pp.player_id = p.id "
+            "JOIN roles r ON r.id = pp.role_id "
+            "WHERE r.name=? ORDER BY p.id",
+            (role_name,), fetch_all=True
+        )
+        return [row['nickname'] for row in rows]
 
     @staticmethod
     def set_players_for_role(role_name: str, player_nicknames: List[str]) -> None:
         """Set which players have this role in their preferences."""
-        all_players = PlayerService.list_players()
-
-        for player in all_players:
-            current_prefs = player.preferences.copy()
-            if player.nickname in player_nicknames:
-                # Add role if not present
-                if role_name not in current_prefs:
-                    current_prefs.append(role_name)
-                    PlayerService.update_player(player.nickname, player.nickname, current_prefs)
-            else:
-                # Remove role if present
-                if role_name in current_prefs:
-                    current_prefs.remove(role_name)
-                    PlayerService.update_player(player.nickname, player.nickname, current_prefs)
+        with db_manager.transaction():
+            RoleService.ensure_roles([role_name])
+            current = set(PlayerService.get_players_with_role(role_name))
+            selected = set(player_nicknames)
+
+            # Remove role where it is no longer selected
+            db_manager.executemany(
+                "DELETE FROM player_preferences "
+                "WHERE player_id=(SELECT id FROM players WHERE nickname=?) "
+                "AND role_id=(SELECT id FROM roles WHERE name=?)",
+                [(nick, role_name) for nick in current - selected]
+            )
+            # Append role to the end of newly selected players' preferences
+            db_manager.executemany(
+                "INSERT INTO player_preferences (player_id, role_id, rank) "
+                "SELECT p.id, r.id, "
+                "(SELECT COALESCE(MAX(rank) + 1, 0) FROM player_preferences WHERE player_id = p.id) "
+                "FROM players p, roles r WHERE p.nickname=? AND r.name=?",
+                [(nick, role_name) for nick in dict.fromkeys(player_nicknames) if nick not in current]
+            )
+        roster_cache.remove_preference(current - selected, role_name)
+        roster_cache.add_preference(player_nicknames, role_name)
 
     @staticmethod
     def increment_role_assignment(nickname: str, role: str) -> None:
         """Increment assignment counter for specific role."""
-        # Get current role assignments
-        row = db_manager.execute_query(
-            "SELECT role_assignments FROM players WHERE nickname=?",
-            (nickname,), fetch_one=True
-        )
+        PlayerService.increment_role_assignments({nickname: [role]})
 
-        if not row:
-            return
-
-        role_assignments = row['role_assignments']
-        if role_assignments:
-            try:
-                assignments_dict = json.loads(role_assignments)
-            except (json.JSONDecodeError, TypeError):
-                assignments_dict = {}
-        else:
-            assignments_dict = {}
-
-        # Increment counter for this role
+    @staticmethod
+    def increment_role_assignments(assignments: Dict[str, List[str]]) -> None:
+        """
+        Increment assignment counters for a whole assignment round
+        ({nickname: [roles]}) in one atomic transaction.
+        Unknown players or roles are ignored.
+        """
         today = datetime.now().strftime("%d.%m.%y")
+        with db_manager.transaction():
+            # Only roles that exist get a counter, in the database and in the cache
+            known = set(RoleService.list_roles())
+            written = {nickname: [role for role in dict.fromkeys(roles) if role in known]
+                       for nickname, roles in assignments.items()}
+            db_manager.executemany(
+                "INSERT INTO assignments (player_id, role_id, count, last_date) "
+                "SELECT p.id, r.id, 1, ? FROM players p, roles r WHERE p.nickname=? AND r.name=? "
+                "ON CONFLICT(player_id, role_id) DO UPDATE SET count=count + 1, last_date=excluded.last_date",
+                [(today, nickname, role) for nickname, roles in written.items() for role in roles]
+            )
+        roster_cache.increment_assignments(written, today)
 
-        count, _ = assignments_dict.get(role, (0, ""))  # отримуємо старе значення або (0,"")
-        assignments_dict[role] = (count + 1, today)
-
-        # Save back to database
-        db_manager.execute_query(
-            "UPDATE players SET role_assignments=? WHERE nickname=?",
-            (json.dumps(assignments_dict), nickname)
-        )
+    @staticmethod
+    def set_role_assignments(nickname: str, assignments: Dict[str, Tuple[int, str]]) -> None:
+        """Replace all role assignment counters (count, date) of a player."""
+        with db_manager.transaction():
+            RoleService.ensure_roles(list(assignments))
+            db_manager.execute_query(
+                "DELETE FROM assignments WHERE player_id=(SELECT id FROM players WHERE nickname=?)",
+                (nickname,)
+            )
+            db_manager.executemany(
+                "INSERT INTO assignments (player_id, role_id, count, last_date) "
+                "SELECT p.id, r.id, ?, ? FROM players p, roles r WHERE p.nickname=? AND r.name=?",
+                [(count, date, nickname, role) for role, (count, date) in assignments.items()]
+            )
+        roster_cache.update_player(nickname, role_assignments=assignments)
 
     @staticmethod
     def get_role_assignment_count(nickname: str, role: str) -> int:
         """Get assignment count for specific player and role."""
-        try:
-            player = PlayerService.get_player(nickname)
-            return player.get_role_assignment_count(role)
-        except ValueError:
-            return 0
+        players = roster_cache.lookup_players([nickname])
+        if players is not None:
+            return players[0].get_role_assignment_count(role) if players else 0
+        row = db_manager.execute_query(
+            "SELECT a.count FROM assignments a "
+            "JOIN players p ON p.id = a.player_id "
+            "JOIN roles r ON r.id = a.role_id "
+            "WHERE p.nickname=? AND r.name=?",
+            (nickname, role), fetch_one=True
+        )
+        return row['count'] if row else 0
 
     @staticmethod
     def clear_all_preferences() -> None:
         """Clear all role preferences for all players."""
         db_manager.execute_query(
-            "UPDATE players SET preferences = '[]'",
+            "DELETE FROM player_preferences",
             ()
         )
+        roster_cache.clear_preferences()
@@ -3,11 +3,14 @@ Role service for managing role operations.
 """
 
 import sqlite3
-from typing import List
+from typing import List, Tuple
 from models.role import Role
 from database.db_manager import db_manager
+from services.roster_cache import roster_cache
+from utils.perf import instrument
 
 
+@instrument
 class RoleService:
     """Service for managing role operations."""
 
@@ -22,6 +25,17 @@ class RoleService:
         except sqlite3.IntegrityError:
             # Role already exists, ignore
             pass
+        roster_cache.invalidate_roles()
+
+    @staticmethod
+    def add_roles(names: List[str], priority: int = 0) -> None:
+        """Add many roles with the same priority in one statement; existing ones are ignored."""
+        created = db_manager.executemany(
+            "INSERT OR IGNORE INTO roles (name, priority) VALUES (?,?)",
+            [(name, priority) for name in dict.fromkeys(names)]
+        )
+        if created:
+            roster_cache.invalidate_roles()
 
     @staticmethod
     def update_role_priority(name: str, priority: int) -> None:
@@ -30,27 +44,43 @@ class RoleService:
             "UPDATE roles SET priority=? WHERE name=?",
             (priority, name)
         )
+        roster_cache.invalidate_roles()
 
     @staticmethod
     def delete_role(name: str) -> None:
-        """Delete a role from the database."""
+        """
+        Delete a role from the database. Its preference entries and assignment
+        history are deleted with it (ON DELETE CASCADE); see get_role_usage().
+        """
         db_manager.execute_query(
             "DELETE FROM roles WHERE name=?",
             (name,)
         )
+        roster_cache.remove_role(name)
+
+    @staticmethod
+    def get_role_usage(name: str) -> Tuple[int, int]:
+        """Number of players preferring the role and number of players with assignment history for it."""
+        row = db_manager.execute_query(
+            "SELECT (SELECT COUNT(*) FROM player_preferences pp WHERE pp.role_id = r.id) AS preferences, "
+            "(SELECT COUNT(*) FROM assignments a WHERE a.role_id = r.id) AS assignments "
+            "FROM roles r WHERE r.name=?",
+            (name,), fetch_one=True
+        )
+        return (row['preferences'], row['assignments']) if row else (0, 0)
 
     @staticmethod
     def list_roles() -> List[str]:
         """Return role names only (for backwards compatibility)."""
-        rows = db_manager.execute_query(
-            "SELECT name FROM roles ORDER BY priority ASC, name ASC",
-            fetch_all=True
-        )
-        return [row['name'] for row in rows]
+        return [r.name for r in RoleService.list_roles_with_priority()]
 
     @staticmethod
     def list_roles_with_priority() -> List[Role]:
         """Return roles with priority information."""
+        return roster_cache.roles(RoleService._load_roles)
+
+    @staticmethod
+    def _load_roles() -> List[Role]:
         rows = db_manager.execute_query(
             "SELECT name, priority FROM roles ORDER BY priority ASC, name ASC",
             fetch_all=True
@@ -60,32 +90,37 @@ class RoleService:
     @staticmethod
     def reorder_roles(role_names: List[str]) -> None:
         """Update priority based on new order."""
-        for i, name in enumerate(role_names):
-            db_manager.execute_query(
-                "UPDATE roles SET priority=? WHERE name=?",
-                (i, name)
+        db_manager.executemany(
+            "UPDATE roles SET priority=? WHERE name=?",
+            [(i, name) for i, name in enumerate(role_names)]
+        )
+        roster_cache.invalidate_roles()
+
+    @staticmethod
+    def ensure_roles(names: List[str]) -> None:
+        """Create any missing roles, appending them after the lowest priority."""
+        with db_manager.transaction():
+            row = db_manager.execute_query(
+                "SELECT COALESCE(MAX(priority) + 1, 0) AS next_priority FROM roles",
+                fetch_one=True
             )
+            created = db_manager.executemany(
+                "INSERT OR IGNORE INTO roles (name, priority) VALUES (?,?)",
+                [(name, row['next_priority']) for name in dict.fromkeys(names)]
+            )
+        if created:
+            roster_cache.invalidate_roles()
 
     @staticmethod
     def get_role_player_counts() -> dict:
         """Get count of players who have each role in their preferences."""
-        import json
+        return roster_cache.role_player_counts(RoleService._load_role_player_counts)
 
-        # Get all players with their preferences
+    @staticmethod
+    def _load_role_player_counts() -> dict:
         rows = db_manager.execute_query(
-            "SELECT preferences FROM players",
+            "SELECT r.name, COUNT(*) AS player_count FROM player_preferences pp "
+            "JOIN roles r ON r.id = pp.role_id GROUP BY r.name",
             fetch_all=True
         )
-
-        role_counts = {}
-
-        for row in rows:
-            if row['preferences']:
-                try:
-                    preferences = json.loads(row['preferences'])
-                    for role in preferences:
-                        role_counts[role] = role_counts.get(role, 0) + 1
-                except (json.JSONDecodeError, TypeError):
-                    continue
-
-        return role_counts
+        return {row['name']: row['player_count'] for row in rows}
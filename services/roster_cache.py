@@ -0,0 +1,216 @@
+"""
+Process-wide in-memory cache of the roster (players, roles, role player counts).
+
+Services read through the cache and apply their writes to it after the
+database write succeeded, so repeated reads make no database round-trips
+until something changes. Cached objects are shared: treat them as read-only;
+every update replaces the cached Player/Role instead of mutating it.
+"""
+
+import threading
+from typing import List, Dict, Optional, Callable, Iterable, Tuple
+from models.player import Player
+from models.role import Role
+from database.db_manager import db_manager
+
+
+class RosterCache:
+    """Cache of Player and Role objects with hit/miss counters."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._players: Optional[Dict[str, Player]] = None  # nickname -> Player, database order
+        self._order: Dict[str, int] = {}
+        self._next_order = 0
+        self._roles: Optional[List[Role]] = None  # sorted by priority, name
+        self._role_player_counts: Optional[Dict[str, int]] = None
+        self.hits = 0
+        self.misses = 0
+
+    # ---- reads ----
+
+    def _count(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def players(self, loader: Callable[[], List[Player]]) -> List[Player]:
+        """All players in database order, loading them on a miss."""
+        with self._lock:
+            self._count(self._players is not None)
+            if self._players is None:
+                loaded = loader()
+                self._players = {p.nickname: p for p in loaded}
+                self._order = {p.nickname: i for i, p in enumerate(loaded)}
+                self._next_order = len(loaded)
+            return list(self._players.values())
+
+    def lookup_players(self, nicknames: Iterable[str]) -> Optional[List[Player]]:
+        """Cached players among nicknames in database order, or None if players are not cached."""
+        with self._lock:
+            self._count(self._players is not None)
+            if self._players is None:
+                return None
+            found = {n: self._players[n] for n in nicknames if n in self._players}
+            return sorted(found.values(), key=lambda p: self._order[p.nickname])
+
+    def roles(self, loader: Callable[[], List[Role]]) -> List[Role]:
+        """All roles by priority, loading them on a miss."""
+        with self._lock:
+            self._count(self._roles is not None)
+            if self._roles is None:
+                self._roles = loader()
+            return list(self._roles)
+
+    def role_player_counts(self, loader: Callable[[], Dict[str, int]]) -> Dict[str, int]:
+        """Number of players preferring each role, loading it on a miss."""
+        with self._lock:
+            self._count(self._role_player_counts is not None)
+            if self._role_player_counts is None:
+                self._role_player_counts = loader()
+            return dict(self._role_player_counts)
+
+    # ---- write-through updates ----
+
+    def put_player(self, player: Player) -> None:
+        """Insert a newly added player at the end of the roster."""
+        with self._lock:
+            self._role_player_counts = None
+            if self._players is None:
+                return
+            self._players[player.nickname] = player
+            self._order[player.nickname] = self._next_order
+            self._next_order += 1
+
+    def rename_player(self, nickname: str, new_nickname: str) -> None:
+        """Rename a cached player, keeping its position in the roster."""
+        with self._lock:
+            if self._players is None or nickname not in self._players or nickname == new_nickname:
+                return
+            old = self._players[nickname]
+            renamed = Player(new_nickname, list(old.preferences), dict(old.role_assignments))
+            self._players = {(new_nickname if n == nickname else n): (renamed if n == nickname else p)
+                             for n, p in self._players.items()}
+            self._order[new_nickname] = self._order.pop(nickname)
+
+    def update_player(self, nickname: str, preferences: List[str] = None,
+                      role_assignments: Dict[str, Tuple[int, str]] = None) -> None:
+        """Replace a cached player's preferences and/or role assignments."""
+        with self._lock:
+            if preferences is not None:
+                self._role_player_counts = None
+            if self._players is None or nickname not in self._players:
+                return
+            old = self._players[nickname]
+            self._players[nickname] = Player(
+                nickname,
+                list(old.preferences if preferences is None else preferences),
+                dict(old.role_assignments if role_assignments is None else role_assignments)
+            )
+
+    def add_preference(self, nicknames: Iterable[str], role: str) -> None:
+        """Append a role to the preferences of the given players."""
+        with self._lock:
+            self._role_player_counts = None
+            if self._players is None:
+                return
+            for nickname in nicknames:
+                p = self._players.get(nickname)
+                if p is not None and role not in p.preferences:
+                    self.update_player(nickname, preferences=p.preferences + [role])
+
+    def remove_preference(self, nicknames: Iterable[str], role: str) -> None:
+        """Remove a role from the preferences of the given players."""
+        with self._lock:
+            self._role_player_counts = None
+            if self._players is None:
+                return
+            for nickname in nicknames:
+                p = self._players.get(nickname)
+                if p is not None and role in p.preferences:
+                    self.update_player(nickname, preferences=[r for r in p.preferences if r != role])
+
+    def increment_assignments(self, assignments: Dict[str, List[str]], date: str) -> None:
+        """
+        Apply one assignment round ({nickname: [roles]}) to the cached counters.
+        The caller passes only the roles it wrote, as a counter for a role
+        missing from the database would never be reloaded.
+        """
+        with self._lock:
+            if self._players is None:
+                return
+            for nickname, roles in assignments.items():
+                p = self._players.get(nickname)
+                if p is None:
+                    continue
+                role_assignments = dict(p.role_assignments)
+                for role in dict.fromkeys(roles):
+                    count, _ = role_assignments.get(role, (0, ""))
+                    role_assignments[role] = (count + 1, date)
+                self.update_player(nickname, role_assignments=role_assignments)
+
+    def remove_player(self, nickname: str) -> None:
+        """Drop a deleted player."""
+        with self._lock:
+            self._role_player_counts = None
+            if self._players is not None and nickname in self._players:
+                del self._players[nickname]
+                del self._order[nickname]
+
+    def clear_preferences(self) -> None:
+        """Empty the preferences of every cached player."""
+        with self._lock:
+            self._role_player_counts = None
+            if self._players is not None:
+                for nickname in list(self._players):
+                    self.update_player(nickname, preferences=[])
+
+    def remove_role(self, name: str) -> None:
+        """Drop a deleted role from roles and from every player (mirrors ON DELETE CASCADE)."""
+        with self._lock:
+            self._roles = None
+            self._role_player_counts = None
+            if self._players is None:
+                return
+            for nickname, p in list(self._players.items()):
+                if name in p.preferences or name in p.role_assignments:
+                    self.update_player(
+                        nickname,
+                        preferences=[r for r in p.preferences if r != name],
+                        role_assignments={r: v for r, v in p.role_assignments.items() if r != name}
+                    )
+
+    def invalidate_roles(self) -> None:
+        """Reload roles on next read (priorities or names changed)."""
+        with self._lock:
+            self._roles = None
+
+    def invalidate(self) -> None:
+        """Drop everything; the next read reloads from the database."""
+        with self._lock:
+            self._players = None
+            self._order = {}
+            self._next_order = 0
+            self._roles = None
+            self._role_player_counts = None
+
+    def is_loaded(self) -> bool:
+        """Whether the players are currently cached."""
+        with self._lock:
+            return self._players is not None
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and cached object counts."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'players': len(self._players) if self._players is not None else 0,
+                'roles': len(self._roles) if self._roles is not None else 0,
+            }
+
+
+# Global roster cache instance
+roster_cache = RosterCache()
+db_manager.add_rollback_listener(roster_cache.invalidate)
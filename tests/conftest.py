@@ -0,0 +1,40 @@
+"""
+Test configuration: makes the project importable and points the global
+database manager at a throwaway file before any test imports it.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DB_PATH_ENV  # noqa: E402  (the package does not open the database)
+
+os.environ[DB_PATH_ENV] = os.path.join(tempfile.mkdtemp(prefix="clan_tests_"), "clan.db")
+
+
+def empty_database():
+    """Empty the global database manager's tables and the roster cache; returns the manager."""
+    from database.db_manager import db_manager
+    from services.roster_cache import roster_cache
+
+    with db_manager.transaction() as tx:
+        for table in ("assignments", "player_preferences", "players", "roles", "sync_state"):
+            tx.execute(f"DELETE FROM {table}")
+    roster_cache.invalidate()
+    return db_manager
+
+
+@pytest.fixture
+def db():
+    """The global database manager, emptied before the test."""
+    return empty_database()
+
+
+@pytest.fixture
+def reset_db(db):
+    """Function emptying the database again, for tests comparing several imports."""
+    return empty_database
@@ -0,0 +1,37 @@
+import numpy as np
+
+from models.player import Player
+from services.assignment_engine import AssignmentProblem
+
+
+def make():
+    players = [
+        Player("a", ["tank", "heal", "dps"], {"tank": (4, "01.01.25"), "other": (9, "")}),
+        Player("b", ["heal"], {"heal": (1, "01.01.25")}),
+        Player("c", ["unknown"]),
+    ]
+    return AssignmentProblem(players, {"tank": 1, "heal": 2}, {"heal": 0, "tank": 0})
+
+
+def test_matrices_follow_role_count_columns():
+    problem = make()
+    assert problem.roles == ["tank", "heal"]
+    np.testing.assert_array_equal(problem.preference_mask, [[True, True], [False, True], [False, False]])
+    np.testing.assert_array_equal(problem.assignment_counts, [[4, 0], [0, 1], [0, 0]])
+    np.testing.assert_array_equal(problem.preference_counts, [3, 1, 1])
+
+
+def test_roles_ordered_by_priority_then_scarcity():
+    # Same priority: "tank" has one candidate, "heal" two
+    problem = make()
+    assert [problem.roles[j] for j in problem.ordered_roles()] == ["tank", "heal"]
+    problem.role_priority["heal"] = -1
+    assert [problem.roles[j] for j in problem.ordered_roles()] == ["heal", "tank"]
+
+
+def test_score_keys():
+    problem = make()
+    tier, counts, preferences = problem.score_keys()
+    np.testing.assert_array_equal(tier, [1, 0, 0])  # single-preference players first
+    np.testing.assert_array_equal(counts, problem.assignment_counts)
+    np.testing.assert_array_equal(preferences, [3, 0, 0])
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from utils.crm_codec import FORMAT, VERSION, CrmReader, write_crm
+
+ROLES = [{'name': 'Танк', 'priority': 0}, {'name': 'Хіл', 'priority': 1}]
+PLAYERS = [
+    {'nickname': 'Вовк', 'preferences': ['Танк', 'Хіл'], 'role_assignments': {'Танк': [3, '01.02.25']}},
+    {'nickname': 'fox', 'preferences': [], 'role_assignments': {}},
+]
+
+
+def read(path):
+    with CrmReader(path) as reader:
+        return reader.version, reader.roles, reader.total, list(reader.players()), reader.streaming
+
+
+def test_v2_round_trip(tmp_path):
+    path = str(tmp_path / "a.crm")
+    assert write_crm(path, ROLES, iter(PLAYERS), len(PLAYERS)) == 2
+    assert read(path) == (VERSION, ROLES, 2, PLAYERS, True)
+    with open(path, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert json.loads(lines[0])['format'] == FORMAT
+    assert len(lines) == 3  # header + one line per player
+
+
+def test_v2_empty_roster(tmp_path):
+    path = str(tmp_path / "a.crm")
+    write_crm(path, [], [], 0)
+    assert read(path) == (VERSION, [], 0, [], True)
+
+
+def test_v1_indented_document(tmp_path):
+    path = tmp_path / "a.crm"
+    path.write_text(json.dumps({'players': PLAYERS, 'roles': ROLES, 'version': '1.0'},
+                               ensure_ascii=False, indent=2), encoding='utf-8')
+    assert read(str(path)) == ("1.0", ROLES, 2, PLAYERS, False)
+
+
+def test_v1_single_line_document(tmp_path):
+    path = tmp_path / "a.crm"
+    path.write_text(json.dumps({'players': PLAYERS, 'roles': ROLES}), encoding='utf-8')
+    assert read(str(path)) == ("1.0", ROLES, 2, PLAYERS, False)
+
+
+def test_v1_bare_player_list(tmp_path):
+    path = tmp_path / "a.crm"
+    path.write_text(json.dumps(PLAYERS, indent=2), encoding='utf-8')
+    assert read(str(path)) == ("1.0", [], 2, PLAYERS, False)
+
+
+def test_newer_major_version_is_rejected(tmp_path):
+    path = tmp_path / "a.crm"
+    path.write_text(json.dumps({'format': FORMAT, 'version': '3.0', 'roles': [], 'players': 0}) + "\n")
+    with pytest.raises(ValueError):
+        CrmReader(str(path))
+
+
+def test_invalid_json_is_rejected(tmp_path):
+    path = tmp_path / "a.crm"
+    path.write_text("not json at all")
+    with pytest.raises(ValueError):
+        CrmReader(str(path))
@@ -0,0 +1,90 @@
+import json
+import sqlite3
+
+import pytest
+
+from database.db_manager import DatabaseManager
+from services.player_service import PlayerService
+from services.role_service import RoleService
+
+
+def make_baseline_db(path: str) -> None:
+    """Database in the original schema: preferences and history as JSON columns of players."""
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE players (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nickname TEXT UNIQUE NOT NULL,
+            preferences TEXT NOT NULL,
+            role_assignments TEXT DEFAULT '{}'
+        )""")
+    conn.execute("CREATE TABLE roles (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE NOT NULL, "
+                 "priority INTEGER DEFAULT 0)")
+    conn.executemany("INSERT INTO roles (name, priority) VALUES (?, ?)", [("tank", 0), ("heal", 1)])
+    conn.executemany("INSERT INTO players (nickname, preferences, role_assignments) VALUES (?, ?, ?)", [
+        ("a", json.dumps(["heal", "tank", "heal"]), json.dumps({"tank": [3, "01.02.25"]})),
+        ("b", json.dumps(["ghost"]), json.dumps({"heal": 2})),  # unknown role, bare count
+        ("c", "not json", None),
+    ])
+    conn.commit()
+    conn.close()
+
+
+@pytest.mark.parametrize("persistent", [False, True])
+def test_migrates_json_columns(tmp_path, persistent):
+    path = str(tmp_path / "old.db")
+    make_baseline_db(path)
+    manager = DatabaseManager(path, persistent=persistent)
+    try:
+        rows = manager.execute_query(
+            "SELECT p.nickname, r.name, pp.rank FROM player_preferences pp "
+            "JOIN players p ON p.id = pp.player_id JOIN roles r ON r.id = pp.role_id "
+            "ORDER BY p.nickname, pp.rank", fetch_all=True)
+        assert [tuple(row) for row in rows] == [("a", "heal", 0), ("a", "tank", 1), ("b", "ghost", 0)]
+
+        rows = manager.execute_query(
+            "SELECT p.nickname, r.name, a.count, a.last_date FROM assignments a "
+            "JOIN players p ON p.id = a.player_id JOIN roles r ON r.id = a.role_id ORDER BY p.nickname",
+            fetch_all=True)
+        assert [tuple(row) for row in rows] == [("a", "tank", 3, "01.02.25"), ("b", "heal", 2, "")]
+
+        # The unknown role is appended after the existing ones
+        roles = manager.execute_query("SELECT name, priority FROM roles ORDER BY priority", fetch_all=True)
+        assert [tuple(row) for row in roles] == [("tank", 0), ("heal", 1), ("ghost", 2)]
+
+        columns = {row['name'] for row in manager.execute_query("PRAGMA table_info(players)", fetch_all=True)}
+        assert columns == {"id", "nickname"}
+        version = manager.execute_query("PRAGMA user_version", fetch_one=True)[0]
+        assert version == DatabaseManager.SCHEMA_VERSION
+    finally:
+        manager.close()
+
+    # Opening the migrated database again changes nothing
+    reopened = DatabaseManager(path)
+    assert reopened.execute_query("SELECT COUNT(*) FROM player_preferences", fetch_one=True)[0] == 3
+
+
+def test_transaction_rolls_back_and_nests(tmp_path):
+    manager = DatabaseManager(str(tmp_path / "t.db"))
+    with pytest.raises(RuntimeError):
+        with manager.transaction():
+            manager.execute_query("INSERT INTO roles (name) VALUES ('a')")
+            with manager.transaction():
+                manager.execute_query("INSERT INTO roles (name) VALUES ('b')")
+            raise RuntimeError
+    assert manager.execute_query("SELECT COUNT(*) FROM roles", fetch_one=True)[0] == 0
+
+
+def test_delete_role_removes_its_preferences_and_history(db):
+    RoleService.add_role("tank", 0)
+    RoleService.add_role("heal", 1)
+    PlayerService.add_player("a", ["tank", "heal"])
+    PlayerService.add_player("b", ["tank"])
+    PlayerService.set_role_assignments("a", {"tank": (2, "01.01.25"), "heal": (1, "01.01.25")})
+    assert RoleService.get_role_usage("tank") == (2, 1)
+    assert RoleService.get_role_usage("missing") == (0, 0)
+
+    RoleService.delete_role("tank")
+    a = PlayerService.get_player("a")
+    assert (a.preferences, a.role_assignments) == (["heal"], {"heal": (1, "01.01.25")})
+    assert PlayerService.get_player("b").preferences == []
@@ -0,0 +1,77 @@
+import pytest
+
+from services.form_service import FIRST_DATA_ROW, FileFormBackend, FormService
+
+HEADER = ["Позначка часу", "Нікнейм", "Ролі"]
+
+
+@pytest.fixture(params=["form.csv", "form.json"])
+def form(db, tmp_path, request):
+    """Writes rows (after the header) to a CSV or JSON fixture and returns its backend."""
+    path = str(tmp_path / request.param)
+
+    def write(rows):
+        FileFormBackend.write_rows(path, [HEADER] + rows)
+        return FileFormBackend(path)
+
+    return write
+
+
+def sync(backend):
+    update = FormService.fetch_updates(backend)
+    FormService.save_sync_state(update)
+    return update
+
+
+def test_latest_answer_per_nickname_wins(form):
+    backend = form([
+        ["02.01.2025 10:00:00", "a", "tank, heal"],
+        ["01.01.2025 10:00:00", "a", "dps"],  # older, listed later
+        ["01.01.2025 09:00:00", "b", "heal"],
+        ["03.01.2025 10:00:00", "c"],  # incomplete
+    ])
+    update = FormService.fetch_updates(backend)
+    assert update.responses == {"a": ["tank", "heal"], "b": ["heal"]}
+    assert update.rows_read == 4
+    assert update.skipped == [FIRST_DATA_ROW + 3]
+    assert not update.full_resync
+
+
+def test_second_sync_reads_only_new_rows(form):
+    rows = [["01.01.2025 10:00:00", "a", "tank"], ["01.01.2025 11:00:00", "b", "heal"]]
+    first = sync(form(rows))
+    assert first.last_row == FIRST_DATA_ROW + 1
+
+    backend = form(rows + [["02.01.2025 10:00:00", "c", "dps"]])
+    update = sync(backend)
+    assert (update.responses, update.rows_read, update.full_resync) == ({"c": ["dps"]}, 1, False)
+    assert update.last_row == FIRST_DATA_ROW + 2
+
+    # Nothing new: the position is kept
+    update = sync(backend)
+    assert (update.responses, update.rows_read, update.last_row) == ({}, 0, FIRST_DATA_ROW + 2)
+
+
+def test_edited_last_row_triggers_full_resync(form):
+    rows = [["01.01.2025 10:00:00", "a", "tank"], ["01.01.2025 11:00:00", "b", "heal"]]
+    sync(form(rows))
+    rows[-1] = ["01.01.2025 11:00:00", "b", "tank"]
+    update = sync(form(rows))
+    assert update.full_resync
+    assert update.responses == {"a": ["tank"], "b": ["tank"]}
+
+
+def test_deleted_rows_trigger_full_resync(form):
+    rows = [["01.01.2025 10:00:00", "a", "tank"], ["01.01.2025 11:00:00", "b", "heal"]]
+    sync(form(rows))
+    update = sync(form(rows[:1]))
+    assert update.full_resync
+    assert update.responses == {"a": ["tank"]}
+
+
+def test_reset_sync_state_reads_everything_again(form):
+    rows = [["01.01.2025 10:00:00", "a", "tank"]]
+    backend = form(rows)
+    sync(backend)
+    FormService.reset_sync_state(backend)
+    assert FormService.fetch_updates(backend).responses == {"a": ["tank"]}
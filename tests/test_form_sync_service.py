@@ -0,0 +1,47 @@
+import pytest
+
+from services.form_service import FileFormBackend
+from services.form_sync_service import FormSyncService
+from services.player_service import PlayerService
+from services.role_service import RoleService
+
+HEADER = ["Позначка часу", "Нікнейм", "Ролі"]
+
+
+@pytest.fixture
+def roster(db):
+    RoleService.add_role("tank", 0)
+    PlayerService.add_player("a", ["tank"])
+    PlayerService.add_player("b", ["tank"])
+
+
+def test_reconcile_diffs_against_roster(roster):
+    report = FormSyncService.reconcile({"a": ["tank"], "b": ["heal", "tank"], "c": ["heal", "heal"]})
+    assert (report.added, report.updated, report.unchanged, report.new_roles) == (["c"], ["b"], ["a"], ["heal"])
+    assert report.changed
+    assert PlayerService.get_player("b").preferences == ["heal", "tank"]
+    assert PlayerService.get_player("c").preferences == ["heal"]
+
+
+def test_reconcile_without_changes(roster):
+    report = FormSyncService.reconcile({"a": ["tank"]})
+    assert not report.changed
+    assert report.unchanged == ["a"]
+
+
+def test_sync_applies_new_rows_once(roster, tmp_path):
+    path = str(tmp_path / "form.csv")
+    FileFormBackend.write_rows(path, [
+        HEADER,
+        ["01.01.2025 10:00:00", "a", "tank"],
+        ["01.01.2025 11:00:00", "b", "heal, tank"],
+        ["01.01.2025 12:00:00", "c", "heal"],
+    ])
+    backend = FileFormBackend(path)
+    update, report = FormSyncService.sync(backend)
+    assert (report.added, report.updated, report.unchanged, report.new_roles) == (["c"], ["b"], ["a"], ["heal"])
+    assert PlayerService.get_player("b").preferences == ["heal", "tank"]
+
+    # Applied rows are not read again
+    update, report = FormSyncService.sync(backend)
+    assert update.rows_read == 0 and not report.changed
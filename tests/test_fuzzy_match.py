@@ -0,0 +1,69 @@
+import pytest
+
+from services.fuzzy_match import NicknameIndex, get_nickname_index, normalize_nickname, similarity
+
+ROSTER = ["Shadow_Wolf", "IronMaiden", "Kolobok", "Dragon1", "Dragon2", "Mike"]
+
+
+@pytest.fixture
+def index():
+    return NicknameIndex(ROSTER)
+
+
+def test_normalize_folds_look_alikes_and_case():
+    assert normalize_nickname("Ir0n Ma1den") == normalize_nickname("ironmaiden")
+    # Cyrillic "о" and "К" read as Latin letters
+    assert normalize_nickname("Коlоbоk") == normalize_nickname("Kolobok")
+
+
+def test_similarity_bounds():
+    assert similarity("abc", "abc") == 1.0
+    assert similarity("abcd", "abce") == pytest.approx(0.75)
+    # Pruned below min_score
+    assert similarity("abcd", "wxyz", min_score=0.5) == 0.0
+
+
+def test_exact_match_after_normalisation(index):
+    match = index.match("SHADOW_WOLF")
+    assert (match.nickname, match.score) == ("Shadow_Wolf", 1.0)
+
+
+def test_literal_nickname_wins_among_normalised_duplicates():
+    index = NicknameIndex(["Bolt", "B0lt"])
+    assert index.match("B0lt").nickname == "B0lt"
+    assert index.match("Bolt").nickname == "Bolt"
+
+
+def test_ocr_misreading_matches_above_threshold(index):
+    # One dropped character out of 11
+    match = index.match("ShadowWolf")
+    assert match.nickname == "Shadow_Wolf"
+    assert match.score == pytest.approx(1 - 1 / 11)
+
+
+def test_threshold_rejects_distant_detection(index):
+    match = index.match("Dragxn99")
+    assert match.nickname is None
+    assert match.score < NicknameIndex.DEFAULT_THRESHOLD
+    # The same detection is accepted with a lower threshold
+    assert index.match("Dragxn99", threshold=0.5).nickname in ("Dragon1", "Dragon2")
+
+
+def test_score_exactly_at_threshold_is_accepted():
+    index = NicknameIndex(["abcde"])
+    # Distance 1 of 5 -> 0.8
+    assert index.match("abcdx", threshold=0.8).nickname == "abcde"
+    assert index.match("abcdx", threshold=0.81).nickname is None
+
+
+def test_unknown_trigrams_give_no_match(index):
+    assert index.match("zzz").nickname is None
+
+
+def test_match_all_keeps_order(index):
+    assert [m.nickname for m in index.match_all(["mike", "Kolobok"])] == ["Mike", "Kolobok"]
+
+
+def test_index_is_reused_for_same_roster():
+    assert get_nickname_index(ROSTER) is get_nickname_index(list(ROSTER))
+    assert get_nickname_index(ROSTER) is not get_nickname_index(ROSTER + ["New"])
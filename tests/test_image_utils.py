@@ -0,0 +1,31 @@
+import numpy as np
+
+from utils.image_utils import qimage_to_array, rgb_to_grey, to_rgb888
+
+
+def test_rgb_to_grey_weights():
+    pixels = np.array([[[255, 0, 0], [0, 255, 0], [0, 0, 255], [255, 255, 255], [0, 0, 0]]], dtype=np.uint8)
+    # Same values as cv2.cvtColor(pixels, cv2.COLOR_RGB2GRAY)
+    assert rgb_to_grey(pixels).tolist() == [[76, 150, 29, 255, 0]]
+
+
+def test_rgb_to_grey_on_strided_view():
+    image = np.random.default_rng(0).integers(0, 256, (20, 30, 3), dtype=np.uint8)
+    view = image[3:15, 5:25]
+    expected = np.rint(view.astype(float) @ [0.299, 0.587, 0.114])
+    assert rgb_to_grey(view).shape == (12, 20)
+    assert np.abs(rgb_to_grey(view) - expected).max() <= 1
+
+
+def test_qimage_to_array_is_rgb_with_padded_rows():
+    from PySide6.QtGui import QColor, QImage
+
+    # 3-pixel rows of RGB888 are padded to 12 bytes
+    image = QImage(3, 2, QImage.Format_RGB32)
+    image.fill(QColor(10, 20, 30))
+    image.setPixelColor(2, 1, QColor(200, 100, 50))
+    rgb = to_rgb888(image)
+    array = qimage_to_array(rgb)
+    assert array.shape == (2, 3, 3)
+    assert array[0, 0].tolist() == [10, 20, 30]
+    assert array[1, 2].tolist() == [200, 100, 50]
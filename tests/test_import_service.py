@@ -0,0 +1,143 @@
+import random
+
+import pytest
+
+from models.player import Player
+from models.role import Role
+from services.import_service import ImportService
+from services.player_service import PlayerService
+from services.role_service import RoleService
+
+ROLES = [{'name': 'tank', 'priority': 0}, {'name': 'heal', 'priority': 1}]
+
+
+def player(nickname, preferences=(), assignments=None):
+    return {'nickname': nickname, 'preferences': list(preferences), 'role_assignments': assignments or {}}
+
+
+def roster():
+    return {p.nickname: (p.preferences, {r: tuple(v) for r, v in p.role_assignments.items()})
+            for p in PlayerService.list_players()}
+
+
+def test_fresh_import_inserts_everything(db):
+    report = ImportService.import_roster(ROLES, [
+        player("a", ["tank"], {"tank": [2, "01.01.25"]}),
+        player("b", ["heal", "tank"]),
+    ])
+    assert (report.players_inserted, report.players_updated, report.players_unchanged) == (2, 0, 0)
+    assert (report.roles_inserted, report.roles_skipped, report.assignments) == (2, 0, 1)
+    assert report.players == 2
+    assert roster() == {"a": (["tank"], {"tank": (2, "01.01.25")}), "b": (["heal", "tank"], {})}
+
+
+def test_reimporting_same_data_reports_no_updates(db):
+    players = [player("a", ["tank"], {"tank": [2, "01.01.25"]}), player("b", ["heal"])]
+    ImportService.import_roster(ROLES, players)
+    report = ImportService.import_roster(ROLES, players)
+    assert (report.players_inserted, report.players_updated, report.players_unchanged) == (0, 0, 2)
+    assert (report.roles_inserted, report.roles_skipped, report.assignments) == (0, 2, 0)
+
+
+def test_only_changed_players_count_as_updated(db):
+    ImportService.import_roster(ROLES, [player("a", ["tank"]), player("b", ["heal"]),
+                                        player("c", [], {"tank": [1, "01.01.25"]})])
+    report = ImportService.import_roster(ROLES, [
+        player("a", ["heal", "tank"]),  # preferences changed
+        player("b", ["heal"]),  # unchanged
+        player("c", [], {"tank": [2, "02.01.25"]}),  # assignment changed
+        player("d", ["tank"]),  # new
+    ])
+    assert (report.players_inserted, report.players_updated, report.players_unchanged) == (1, 2, 1)
+    assert report.assignments == 1
+    assert roster()["a"] == (["heal", "tank"], {})
+    assert roster()["c"] == ([], {"tank": (2, "02.01.25")})
+
+
+def test_history_of_roles_missing_from_archive_is_kept(db):
+    ImportService.import_roster(ROLES, [player("a", ["tank"], {"tank": [1, "01.01.25"]})])
+    report = ImportService.import_roster(ROLES, [player("a", ["tank"], {"heal": [3, "02.01.25"]})])
+    assert report.players_updated == 1
+    assert roster()["a"][1] == {"tank": (1, "01.01.25"), "heal": (3, "02.01.25")}
+
+
+def test_malformed_entries_are_skipped(db):
+    report = ImportService.import_roster(ROLES + [{'name': 5}], [
+        player("ok"), {'nickname': ''}, "garbage", {'nickname': 'x', 'preferences': 'tank'},
+        player("bad", [], {"tank": ["many", "01.01.25"]}),
+    ])
+    assert (report.players_inserted, report.players_skipped) == (1, 4)
+    assert report.roles_skipped == 1
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 100])
+def test_repeated_nickname_counts_once(db, monkeypatch, chunk_size):
+    monkeypatch.setattr(ImportService, "CHUNK_SIZE", chunk_size)
+    report = ImportService.import_roster(ROLES, [player("a", ["tank"]), player("b"), player("a", ["heal"])])
+    assert (report.players_inserted, report.players_updated, report.players_unchanged) == (2, 0, 0)
+    assert report.players_duplicates == 1
+    assert roster()["a"][0] == ["heal"]  # the last entry wins
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 100])
+def test_repeated_nickname_keeps_only_last_entry(db, monkeypatch, chunk_size):
+    monkeypatch.setattr(ImportService, "CHUNK_SIZE", chunk_size)
+    report = ImportService.import_roster(ROLES, [
+        player("a", ["tank"], {"tank": [5, "01.01.25"]}), player("b"), player("a", [], {"heal": [1, "02.01.25"]}),
+    ])
+    assert roster()["a"] == ([], {"heal": (1, "02.01.25")})
+    assert report.assignments == 1
+
+
+def random_archive(rng, size):
+    nicknames = [f"p{i}" for i in range(size // 2 + 1)]
+    roles = ["tank", "heal", "dps"]
+    return [player(rng.choice(nicknames), rng.sample(roles, rng.randint(0, 3)),
+                   {role: [rng.randint(0, 3), f"0{rng.randint(1, 3)}.01.25"]
+                    for role in rng.sample(roles, rng.randint(0, 3))})
+            for _ in range(size)]
+
+
+def import_outcome(existing, archive):
+    ImportService.import_roster(ROLES, existing)
+    report = ImportService.import_roster(ROLES, archive)
+    return roster(), (report.players_inserted, report.players_updated, report.players_unchanged,
+                      report.players_duplicates, report.assignments)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_chunked_import_matches_unchunked(reset_db, monkeypatch, seed):
+    rng = random.Random(seed)
+    existing = random_archive(rng, 8)
+    archive = random_archive(rng, 12)
+    expected = import_outcome(existing, archive)
+    for chunk_size in (1, 2, 3, 5):
+        reset_db()
+        monkeypatch.setattr(ImportService, "CHUNK_SIZE", chunk_size)
+        assert import_outcome(existing, archive) == expected, chunk_size
+
+
+def test_unknown_roles_are_created_and_existing_priorities_kept(db):
+    RoleService.add_role("tank", 7)
+    ImportService.import_roster(ROLES, [player("a", ["dps"], {"support": [1, ""]})])
+    priorities = {r.name: r.priority for r in RoleService.list_roles_with_priority()}
+    assert priorities["tank"] == 7
+    assert {"heal", "dps", "support"} <= set(priorities)
+
+
+def test_import_models(db):
+    report = ImportService.import_models([Role("tank", 0)], [Player("a", ["tank", "tank"], {"tank": (1, "d")})])
+    assert (report.players_inserted, report.assignments) == (1, 1)
+    assert roster() == {"a": (["tank"], {"tank": (1, "d")})}
+
+
+def test_failed_progress_rolls_back(db):
+    def progress(done, total, text):
+        if done:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        ImportService.import_roster(ROLES, [player(f"p{i}") for i in range(ImportService.CHUNK_SIZE + 1)], 0,
+                                    progress)
+    assert roster() == {}
+    assert RoleService.list_roles() == []
@@ -0,0 +1,60 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from services import ocr_cache
+from services.ocr_cache import OCRCache
+
+RESULTS = [([[0, 0], [10, 0], [10, 5], [0, 5]], "[UKR]Wolf", 0.93)]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = OCRCache(str(tmp_path / "ocr_cache.db"))
+    yield cache
+    cache.close()
+
+
+def image(value=0):
+    return np.full((4, 6, 3), value, dtype=np.uint8)
+
+
+def test_key_depends_on_pixels_mode_and_region():
+    key = OCRCache.make_key(image(), 'full')
+    assert key == OCRCache.make_key(image(), 'full')
+    assert key != OCRCache.make_key(image(1), 'full')
+    assert key != OCRCache.make_key(image(), 'auto')
+    assert key != OCRCache.make_key(image(), 'full', (0, 0, 2, 2))
+    # Same bytes, different shape
+    assert key != OCRCache.make_key(image().reshape(6, 4, 3), 'full')
+
+
+def test_put_get_round_trip_with_numpy_values(cache):
+    key = OCRCache.make_key(image(), 'full')
+    assert cache.get(key) is None
+    cache.put(key, [(np.array(RESULTS[0][0]), RESULTS[0][1], np.float64(RESULTS[0][2]))], 1.5)
+    assert cache.get(key) == RESULTS
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'saved_seconds': 1.5}
+
+
+def test_least_recently_used_entries_are_evicted(cache, monkeypatch):
+    monkeypatch.setattr(OCRCache, "MAX_ENTRIES", 2)
+    # Distinct, increasing last_used stamps however fast the calls are
+    clock = itertools.count(1)
+    monkeypatch.setattr(ocr_cache.time, "time", lambda: float(next(clock)))
+    cache.put("a", RESULTS, 1.0)
+    cache.put("b", RESULTS, 1.0)
+    assert cache.get("a") is not None  # "b" is now the oldest
+    cache.put("c", RESULTS, 1.0)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_unusable_cache_file_is_a_miss(tmp_path):
+    path = tmp_path / "ocr_cache.db"
+    path.write_bytes(b"not a database" * 100)
+    cache = OCRCache(str(path))
+    cache.put("a", RESULTS, 1.0)
+    assert cache.get("a") is None
+    cache.close()
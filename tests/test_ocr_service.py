@@ -0,0 +1,109 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from services.ocr_service import OCRCancelled, OCRJob, OCRService
+
+LINE_HEIGHT = 12
+LINE_STEP = 40
+
+
+class FakeReader:
+    """Detects rows of non-zero pixels as text lines and reads the pixel value as the nickname."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.detect_calls = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def detect(self, img, reformat=False):
+        with self._lock:
+            self.detect_calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        rows = np.flatnonzero(img[:, :, 0].any(axis=1))
+        boxes = []
+        for y in rows:
+            if boxes and y == boxes[-1][3] + 1:
+                boxes[-1][3] = y
+            else:
+                boxes.append([0, img.shape[1] - 1, y, y])
+        with self._lock:
+            self.active -= 1
+        return [boxes], [[]]
+
+    def recognize(self, img_grey, horizontal_list, free_list, reformat=False):
+        return [([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], f"[UKR]n{img_grey[y0, x0:x1 + 1].max()}", 0.9)
+                for x0, x1, y0, y1 in horizontal_list]
+
+
+def column(height: int, width: int = 60) -> np.ndarray:
+    """Grey image with a text line every LINE_STEP rows; line i has pixel value i + 1."""
+    image = np.zeros((height, width, 3), dtype=np.uint8)
+    for i, top in enumerate(range(20, height - LINE_HEIGHT, LINE_STEP)):
+        image[top:top + LINE_HEIGHT] = i + 1
+    return image
+
+
+def expected_lines(image: np.ndarray):
+    return [(f"[UKR]n{i + 1}", top) for i, top in enumerate(range(20, image.shape[0] - LINE_HEIGHT, LINE_STEP))]
+
+
+def lines(results):
+    return [(text, box[0][1]) for box, text, _ in results]
+
+
+def test_tall_column_is_tiled_and_every_line_found_once():
+    image = column(3 * OCRJob.TILE_HEIGHT)
+    reader = FakeReader()
+    stages = []
+    results = OCRJob(reader, lambda stage, done, total: stages.append((stage, done, total))).run(image, tile=True)
+    assert lines(results) == expected_lines(image)
+    assert reader.detect_calls == 4
+    assert stages[0] == ('tiles', 0, 4) and stages[-1] == ('tiles', 4, 4)
+
+
+def test_full_mode_is_never_tiled():
+    image = column(3 * OCRJob.TILE_HEIGHT)
+    reader = FakeReader()
+    assert lines(OCRJob(reader).run(image)) == expected_lines(image)
+    assert reader.detect_calls == 1
+
+
+def test_column_within_detector_canvas_is_not_tiled():
+    image = column(OCRJob.TILE_HEIGHT + OCRJob.TILE_OVERLAP)
+    reader = FakeReader()
+    assert lines(OCRJob(reader).run(image, tile=True)) == expected_lines(image)
+    assert reader.detect_calls == 1
+
+
+def test_region_results_are_in_image_coordinates():
+    image = np.zeros((300, 200, 3), dtype=np.uint8)
+    image[100:112, 50:150] = 7
+    results = OCRJob(FakeReader()).run(image, region=(40, 80, 120, 100))
+    assert results == [([[40, 100], [159, 100], [159, 111], [40, 111]], "[UKR]n7", 0.9)]
+    assert OCRService.extract_nicks(results) == [("n7", 0.9)]
+
+
+def test_concurrent_jobs_share_the_inference_lock():
+    reader = FakeReader(delay=0.01)
+    image = column(2 * OCRJob.TILE_HEIGHT)
+    threads = [threading.Thread(target=OCRJob(reader).run, args=(image,), kwargs={'tile': True}) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert reader.detect_calls == 9
+    assert reader.max_active == 1
+
+
+def test_cancelled_job_stops():
+    job = OCRJob(FakeReader())
+    job.cancel()
+    with pytest.raises(OCRCancelled):
+        job.run(column(100))
@@ -0,0 +1,156 @@
+import threading
+
+import pytest
+
+from utils.perf import KIND_ACTION, KIND_CALL, KIND_SQL, PerfRecorder, SpanStats, normalize_query, recorder, timed
+
+
+def stats_with(samples):
+    stats = SpanStats(KIND_CALL, "f")
+    for seconds in samples:
+        stats.add(seconds, 0, 0)
+    return stats
+
+
+@pytest.fixture
+def rec():
+    recorder.reset()
+    recorder.enable()
+    yield recorder
+    recorder.disable()
+    recorder.reset()
+
+
+def names(kind):
+    return {s.name: s for s in recorder.stats(kind)}
+
+
+def test_percentile_nearest_rank():
+    stats = stats_with(range(1, 101))
+    assert stats.percentile(50) == 50
+    assert stats.percentile(95) == 95
+    assert stats.percentile(100) == 100
+    assert stats.percentile(0) == 1
+
+
+def test_percentile_small_samples():
+    assert stats_with([3, 1]).percentile(50) == 1
+    assert stats_with([3, 1]).percentile(95) == 3
+    assert stats_with([7]).percentile(50) == 7
+    assert stats_with([]).percentile(50) == 0.0
+
+
+def test_outermost_span_is_action(rec):
+    @timed("inner")
+    def inner():
+        with rec.query("SELECT 1"):
+            pass
+
+    @timed("outer")
+    def outer():
+        inner()
+        inner()
+
+    outer()
+    assert set(names(KIND_ACTION)) == {"outer"}
+    assert names(KIND_ACTION)["outer"].queries == 2
+    assert names(KIND_CALL)["inner"].calls == 2
+    assert names(KIND_SQL)["SELECT 1"].calls == 2
+
+
+def test_record_query_counts_in_span(rec):
+    with rec.span("streamed"):
+        rec.record_query("SELECT *   FROM players", 0.01, 42)
+    sql = names(KIND_SQL)["SELECT * FROM players"]
+    assert (sql.calls, sql.rows) == (1, 42)
+    assert names(KIND_ACTION)["streamed"].queries == 1
+
+
+def test_disabled_records_nothing():
+    recorder.reset()
+    assert not recorder.enabled
+
+    @timed("f")
+    def f():
+        with recorder.query("SELECT 1"):
+            pass
+
+    f()
+    assert recorder.stats() == []
+
+
+def test_enabling_mid_action_waits_for_next_outermost_span(rec):
+    rec.disable()
+
+    @timed("inner")
+    def inner():
+        with rec.query("SELECT 1"):
+            pass
+
+    @timed("outer")
+    def outer():
+        rec.enable()
+        inner()
+
+    outer()
+    # The nested calls belong to an action started before recording, so nothing is recorded
+    assert rec.stats() == []
+
+    outer()
+    assert set(names(KIND_ACTION)) == {"outer"}
+    assert names(KIND_CALL)["inner"].calls == 1
+
+
+def test_disabling_mid_action_drops_it(rec):
+    @timed("outer")
+    def outer():
+        rec.disable()
+
+    outer()
+    assert rec.stats() == []
+
+
+def test_idle_time_excluded_and_nested_events_are_actions(rec, monkeypatch):
+    clock = iter([0.0, 1.0, 2.0, 2.5, 11.0, 13.0])
+    monkeypatch.setattr("utils.perf.time.perf_counter", lambda: next(clock))
+
+    @timed("handled_meanwhile")
+    def handled_meanwhile():
+        pass
+
+    @timed("handler")
+    def handler():
+        with rec.idle():
+            handled_meanwhile()
+
+    handler()
+    actions = names(KIND_ACTION)
+    assert set(actions) == {"handler", "handled_meanwhile"}
+    # 13 s in total, of which 10 s waiting in idle()
+    assert actions["handler"].total == pytest.approx(3.0)
+    assert actions["handled_meanwhile"].total == pytest.approx(0.5)
+
+
+def test_idle_outside_span_is_noop(rec):
+    with rec.idle():
+        pass
+    assert rec.stats() == []
+
+
+def test_threads_have_own_stacks():
+    rec = PerfRecorder(enabled=True)
+
+    def worker():
+        with rec.span("worker"):
+            pass
+
+    with rec.span("main"):
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+    assert {s.name for s in rec.stats(KIND_ACTION)} == {"main", "worker"}
+
+
+def test_normalize_query():
+    assert normalize_query("SELECT  *\n  FROM x") == "SELECT * FROM x"
+    assert len(normalize_query("x" * 500)) == 160
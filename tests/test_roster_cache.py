@@ -0,0 +1,81 @@
+import pytest
+
+from models.player import Player
+from services.player_service import PlayerService
+from services.role_service import RoleService
+from services.roster_cache import RosterCache, roster_cache
+
+
+def snapshot(players):
+    return [(p.nickname, p.preferences, {r: tuple(v) for r, v in p.role_assignments.items()}) for p in players]
+
+
+def cached_and_stored():
+    """The cached roster and the one reloaded from the database."""
+    cached = snapshot(PlayerService.list_players())
+    roster_cache.invalidate()
+    return cached, snapshot(PlayerService.list_players())
+
+
+@pytest.fixture
+def roster(db):
+    RoleService.add_roles(["tank", "heal", "dps"])
+    PlayerService.add_players({"a": ["tank", "heal"], "b": ["heal"], "c": []})
+    PlayerService.list_players()
+    assert roster_cache.is_loaded()
+    return db
+
+
+def test_hits_and_misses_are_counted():
+    cache = RosterCache()
+    loads = []
+    loader = lambda: loads.append(1) or [Player("a", [])]  # noqa: E731
+    cache.players(loader)
+    cache.players(loader)
+    assert cache.lookup_players(["a", "x"])[0].nickname == "a"
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'players': 1, 'roles': 0}
+    assert len(loads) == 1
+    cache.invalidate()
+    assert cache.lookup_players(["a"]) is None
+    assert cache.stats()['misses'] == 2
+
+
+def test_rollback_invalidates_the_cache(roster):
+    with pytest.raises(RuntimeError):
+        with roster.transaction():
+            PlayerService.add_player("d", ["tank"])
+            raise RuntimeError
+    assert not roster_cache.is_loaded()
+    assert [p.nickname for p in PlayerService.list_players()] == ["a", "b", "c"]
+
+
+def test_rename_keeps_roster_order(roster):
+    PlayerService.update_player("a", "z", ["dps"])
+    PlayerService.add_player("d", [])
+    cached, stored = cached_and_stored()
+    assert [p[0] for p in cached] == ["z", "b", "c", "d"]
+    assert cached == stored
+
+
+def test_remove_role_cascades_to_players(roster):
+    PlayerService.increment_role_assignments({"a": ["heal", "tank"], "b": ["heal"]})
+    RoleService.delete_role("heal")
+    cached, stored = cached_and_stored()
+    assert cached == stored
+    assert all("heal" not in prefs and "heal" not in assignments for _, prefs, assignments in cached)
+    assert RoleService.list_roles() == ["dps", "tank"]
+
+
+def test_increment_assignments_matches_database(roster):
+    PlayerService.increment_role_assignments({"a": ["tank", "tank", "dps"], "c": ["heal"], "ghost": ["tank"]})
+    PlayerService.increment_role_assignments({"a": ["tank"]})
+    cached, stored = cached_and_stored()
+    assert cached == stored
+    assert cached[0][2]["tank"][0] == 2 and cached[0][2]["dps"][0] == 1
+
+
+def test_increment_assignments_skips_unknown_roles(roster):
+    PlayerService.increment_role_assignments({"a": ["tank", "ghost"]})
+    cached, stored = cached_and_stored()
+    assert cached == stored
+    assert set(cached[0][2]) == {"tank"}
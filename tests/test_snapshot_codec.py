@@ -0,0 +1,112 @@
+import struct
+
+import pytest
+
+from models.player import Player
+from models.role import Role
+from utils import snapshot_codec
+from utils.snapshot_codec import (
+    COMPRESSION_LZMA, COMPRESSION_NONE, COMPRESSION_ZLIB, MAGIC, decode_snapshot, encode_snapshot,
+    is_snapshot, read_snapshot, write_snapshot,
+)
+
+ROLES = [Role("Танк", 0), Role("Хіл", 2)]
+PLAYERS = [
+    Player("Вовк", ["Танк", "Хіл"], {"Танк": (3, "01.02.25"), "Хіл": (1, "01.02.25")}),
+    Player("fox", [], {}),
+    Player("bear", ["Хіл"], {"Танк": (7, "")}),
+]
+
+
+def as_tuples(players):
+    return [(p.nickname, p.preferences, {r: tuple(v) for r, v in p.role_assignments.items()}) for p in players]
+
+
+@pytest.mark.parametrize("compression", [COMPRESSION_NONE, COMPRESSION_ZLIB, COMPRESSION_LZMA])
+def test_round_trip(tmp_path, compression):
+    path = str(tmp_path / "a.crms")
+    size = write_snapshot(path, ROLES, PLAYERS, compression)
+    assert size == (tmp_path / "a.crms").stat().st_size
+    assert is_snapshot(path)
+    roles, players = read_snapshot(path)
+    assert [(r.name, r.priority) for r in roles] == [(r.name, r.priority) for r in ROLES]
+    assert as_tuples(players) == as_tuples(PLAYERS)
+
+
+def test_empty_roster():
+    assert decode_snapshot(encode_snapshot([], [])) == ([], [])
+
+
+def test_roles_only_referenced_by_players_are_added():
+    roles, players = decode_snapshot(encode_snapshot([], [Player("a", ["ghost"])]))
+    assert [(r.name, r.priority) for r in roles] == [("ghost", 0)]
+    assert players[0].preferences == ["ghost"]
+
+
+def test_nul_in_name_is_rejected():
+    with pytest.raises(ValueError):
+        encode_snapshot([Role("bad\0name", 0)], [])
+
+
+def test_crm_file_is_not_a_snapshot(tmp_path):
+    path = tmp_path / "a.crm"
+    path.write_text('{"format": "crm-jsonl"}\n')
+    assert not is_snapshot(str(path))
+    with pytest.raises(ValueError):
+        read_snapshot(str(path))
+
+
+def test_truncated_header_is_rejected(tmp_path):
+    path = tmp_path / "a.crms"
+    path.write_bytes(MAGIC)
+    with pytest.raises(ValueError):
+        read_snapshot(str(path))
+
+
+def test_newer_version_is_rejected(tmp_path):
+    path = tmp_path / "a.crms"
+    path.write_bytes(struct.pack("<4sHBx", MAGIC, snapshot_codec.VERSION + 1, COMPRESSION_NONE)
+                     + encode_snapshot(ROLES, PLAYERS))
+    with pytest.raises(ValueError, match="version"):
+        read_snapshot(str(path))
+
+
+def test_unknown_compression_is_rejected(tmp_path):
+    path = tmp_path / "a.crms"
+    path.write_bytes(struct.pack("<4sHBx", MAGIC, snapshot_codec.VERSION, 9))
+    with pytest.raises(ValueError, match="compression"):
+        read_snapshot(str(path))
+
+
+def test_corrupted_body_is_rejected():
+    body = encode_snapshot(ROLES, PLAYERS)
+    with pytest.raises(ValueError):
+        decode_snapshot(body[:-4])
+
+
+@pytest.mark.parametrize("compression", [COMPRESSION_ZLIB, COMPRESSION_LZMA])
+def test_truncated_compressed_body_is_rejected(tmp_path, compression):
+    path = tmp_path / "a.crms"
+    write_snapshot(str(path), ROLES, PLAYERS * 20, compression)
+    path.write_bytes(path.read_bytes()[:40])
+    with pytest.raises(ValueError, match="Corrupted"):
+        read_snapshot(str(path))
+
+
+def split_sections(body):
+    sections, offset = [], 0
+    while offset < len(body):
+        (length,) = struct.unpack_from("<Q", body, offset)
+        sections.append(body[offset + 8:offset + 8 + length])
+        offset += 8 + length
+    return sections
+
+
+@pytest.mark.parametrize("section", [5, 7, 10])  # preference roles, assignment roles, assignment dates
+def test_out_of_range_index_is_rejected(section):
+    sections = split_sections(encode_snapshot(ROLES, PLAYERS))
+    # Same number of entries, the first one pointing past its table
+    sections[section] = struct.pack("<I", 99) + sections[section][4:]
+    body = b"".join(struct.pack("<Q", len(data)) + data for data in sections)
+    with pytest.raises(ValueError, match="index out of range"):
+        decode_snapshot(body)
@@ -0,0 +1,87 @@
+import pytest
+
+pytest.importorskip("PySide6")
+
+from PySide6.QtCore import Qt  # noqa: E402
+
+from models.player import Player  # noqa: E402
+from ui.table_models import PlayersFilterProxyModel, PlayersTableModel  # noqa: E402
+
+PLAYERS = [
+    Player("bob", ["Хіл"], {"Хіл": (2, "01.02.25")}),
+    Player("Alice", ["Танк", "Хіл"], {}),
+    Player("carol", [], {}),
+]
+
+
+def column(model, col=0):
+    return [model.data(model.index(row, col)) for row in range(model.rowCount())]
+
+
+def make_proxy(players=PLAYERS):
+    source = PlayersTableModel()
+    source.set_players(players)
+    proxy = PlayersFilterProxyModel()
+    proxy.setSourceModel(source)
+    return source, proxy
+
+
+def test_preferences_are_shown_with_counts():
+    model = PlayersTableModel()
+    model.set_players(PLAYERS)
+    assert column(model) == ["bob", "Alice", "carol"]
+    assert column(model, 1) == ["Хіл (2 - 01.02.25)", "Танк (0), Хіл (0)", ""]
+    assert model.headerData(1, Qt.Horizontal) == "Обрані ролі"
+
+
+def test_sort_is_case_insensitive_and_kept_for_new_rosters():
+    model = PlayersTableModel()
+    model.set_players(PLAYERS)
+    model.sort(0, Qt.DescendingOrder)
+    assert column(model) == ["carol", "bob", "Alice"]
+    model.set_players(PLAYERS + [Player("dave", [])])
+    assert column(model) == ["dave", "carol", "bob", "Alice"]
+
+
+def test_same_roster_updates_rows_in_place():
+    model = PlayersTableModel()
+    model.set_players(PLAYERS)
+    model.sort(1)
+    assert column(model) == ["carol", "Alice", "bob"]
+    changed, resets, layouts = [], [], []
+    model.dataChanged.connect(lambda top, bottom: changed.append((top.row(), bottom.row())))
+    model.modelReset.connect(lambda: resets.append(1))
+    model.layoutChanged.connect(lambda: layouts.append(1))
+
+    # Alice's roles now sort after bob's, but an update does not move rows
+    updated = [PLAYERS[0], Player("Alice", ["Хіл"], {"Хіл": (9, "")}), PLAYERS[2]]
+    model.set_players(updated)
+    assert column(model) == ["carol", "Alice", "bob"]
+    assert column(model, 1) == ["", "Хіл (9)", "Хіл (2 - 01.02.25)"]
+    assert changed == [(1, 1)]
+    assert not resets and not layouts
+
+    # Unchanged players emit nothing
+    model.set_players(updated)
+    assert changed == [(1, 1)]
+
+
+def test_filter_matches_nickname_or_role():
+    source, proxy = make_proxy()
+    proxy.setFilterFixedString("хіл")
+    assert column(proxy) == ["bob", "Alice"]
+    proxy.setFilterFixedString("CAR")
+    assert column(proxy) == ["carol"]
+    proxy.setFilterFixedString("")
+    assert proxy.rowCount() == 3
+
+
+def test_filter_follows_updates_and_sorting():
+    source, proxy = make_proxy()
+    proxy.setFilterFixedString("танк")
+    assert column(proxy) == ["Alice"]
+    source.set_players([PLAYERS[0], PLAYERS[1], Player("carol", ["Танк"], {})])
+    assert column(proxy) == ["Alice", "carol"]
+    proxy.sort(0, Qt.DescendingOrder)
+    assert column(proxy) == ["carol", "Alice"]
+    assert source.player_at(0).nickname == "carol"
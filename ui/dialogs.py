@@ -1,19 +1,21 @@
 """
 Dialog windows for the clan role manager application.
 """
-import json
 from typing import List, Tuple, Dict
 
 from PySide6.QtGui import QColor
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QLineEdit,
     QListWidget, QListWidgetItem, QAbstractItemView, QSplitter, QWidget, QSpinBox, QCheckBox, QDateEdit,
-    QTableWidgetItem, QTableWidget, QHeaderView
+    QTableWidgetItem, QTableWidget, QHeaderView, QComboBox, QTabWidget, QFileDialog
 )
 from PySide6.QtCore import Qt, QDate
 
+from services.fuzzy_match import get_nickname_index
 from services.player_service import PlayerService
 from services.role_service import RoleService
+from services.roster_cache import roster_cache
+from utils.perf import recorder as perf, KIND_ACTION, KIND_CALL, KIND_SQL
 
 
 class PlayerDialog(QDialog):
@@ -160,12 +162,25 @@ class AssignDialog(QDialog):
         activate_btn = QPushButton("Активувати розпізнаних")
         activate_btn.clicked.connect(self._activate_detected_players)
         players_widget.layout().addWidget(activate_btn)
+        self.detection_label = QLabel("")
+        self.detection_label.setWordWrap(True)
+        players_widget.layout().addWidget(self.detection_label)
 
         splitter.addWidget(roles_widget)
         splitter.addWidget(players_widget)
         splitter.setSizes([300, 300])
         v.addWidget(splitter)
 
+        # Assignment algorithm
+        strategy_layout = QHBoxLayout()
+        strategy_layout.addWidget(QLabel("Алгоритм:"))
+        self.strategy_combo = QComboBox()
+        self.strategy_combo.addItem("Жадібний (за пріоритетом)", "greedy")
+        self.strategy_combo.addItem("Оптимальний (максимум заповнених ролей)", "optimal")
+        strategy_layout.addWidget(self.strategy_combo)
+        strategy_layout.addStretch()
+        v.addLayout(strategy_layout)
+
         # Buttons
         h = QHBoxLayout()
         ok = QPushButton("Призначити")
@@ -178,12 +193,29 @@ class AssignDialog(QDialog):
         self.setLayout(v)
 
     def _activate_detected_players(self):
-        """Виділяє тих гравців, які є у detection_niks"""
-        detection_set = set(self.detection_niks)
-        for i in range(self.players_list.count()):
-            item = self.players_list.item(i)
-            if item.text() in detection_set:
-                item.setSelected(True)
+        """Виділяє гравців з detection_niks, допускаючи помилки OCR (l/I, 0/O, пропущені символи)."""
+        matches = get_nickname_index(self.players).match_all(self.detection_niks)
+        rows = {self.players_list.item(i).text(): i for i in range(self.players_list.count())}
+
+        fuzzy, missing = [], []
+        for m in matches:
+            if m.nickname is None:
+                missing.append(m.detected)
+                continue
+            self.players_list.item(rows[m.nickname]).setSelected(True)
+            if m.nickname != m.detected:
+                fuzzy.append(f"{m.detected} → {m.nickname} ({m.score:.0%})")
+
+        self.detection_label.setText(
+            f"Активовано: {len(matches) - len(missing)} (неточних збігів: {len(fuzzy)}), "
+            f"не знайдено: {len(missing)}"
+        )
+        details = []
+        if fuzzy:
+            details.append("Неточні збіги:\n" + "\n".join(fuzzy))
+        if missing:
+            details.append("Не знайдено:\n" + "\n".join(missing))
+        self.detection_label.setToolTip("\n\n".join(details))
 
     def _create_base_multi_selection_widget(self, label, list):
         from PySide6.QtWidgets import QWidget, QCheckBox
@@ -255,7 +287,8 @@ class AssignDialog(QDialog):
         return {
             "roles": list(selected_roles.keys()),
             "role_counts": selected_roles,
-            "players": selected_players
+            "players": selected_players,
+            "strategy": self.strategy_combo.currentData()
         }
 class RoleAssignmentDialog(QDialog):
     """Dialog to edit role assignments (count + date) for a player."""
@@ -354,11 +387,110 @@ class RoleAssignmentDialog(QDialog):
         assignments = self._collect_assignments()
 
         # оновлюємо role_assignments в БД
-        db_payload = json.dumps(assignments)
-        from database.db_manager import db_manager
-        db_manager.execute_query(
-            "UPDATE players SET role_assignments=? WHERE nickname=?",
-            (db_payload, self.nickname)
-        )
+        PlayerService.set_role_assignments(self.nickname, assignments)
 
         self.accept()
+
+
+class PerformanceDialog(QDialog):
+    """Timings recorded by utils.perf: user actions, service calls and SQL statements."""
+
+    COLUMNS = ["Назва", "Викликів", "Сума, мс", "p50, мс", "p95, мс", "Макс, мс", "Запитів/виклик"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Продуктивність")
+        self.resize(900, 550)
+        self._init_ui()
+        self.refresh()
+
+    def _init_ui(self):
+        v = QVBoxLayout()
+
+        self.enabled_check = QCheckBox("Вимірювати час виконання")
+        self.enabled_check.setChecked(perf.enabled)
+        self.enabled_check.toggled.connect(lambda on: perf.enable() if on else perf.disable())
+        v.addWidget(self.enabled_check)
+
+        self.summary_label = QLabel()
+        v.addWidget(self.summary_label)
+
+        self.tables = QTabWidget()
+        self.actions_table = self._make_table(self.COLUMNS)
+        self.calls_table = self._make_table(self.COLUMNS)
+        self.queries_table = self._make_table(self.COLUMNS[:-1] + ["Рядків/виклик"])
+        self.tables.addTab(self.actions_table, "Дії")
+        self.tables.addTab(self.calls_table, "Виклики")
+        self.tables.addTab(self.queries_table, "SQL-запити")
+        v.addWidget(self.tables)
+
+        h = QHBoxLayout()
+        refresh_btn = QPushButton("Оновити")
+        refresh_btn.clicked.connect(self.refresh)
+        h.addWidget(refresh_btn)
+        reset_btn = QPushButton("Очистити")
+        reset_btn.clicked.connect(self.reset)
+        h.addWidget(reset_btn)
+        export_btn = QPushButton("Експорт…")
+        export_btn.clicked.connect(self.export)
+        h.addWidget(export_btn)
+        h.addStretch()
+        close_btn = QPushButton("Закрити")
+        close_btn.clicked.connect(self.close)
+        h.addWidget(close_btn)
+        v.addLayout(h)
+
+        self.setLayout(v)
+
+    @staticmethod
+    def _make_table(headers: List[str]) -> QTableWidget:
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        table.verticalHeader().setVisible(False)
+        return table
+
+    @staticmethod
+    def _number_item(value: float, decimals: int = 0) -> QTableWidgetItem:
+        item = QTableWidgetItem()
+        # Числа як дані, щоб сортування було числовим
+        item.setData(Qt.DisplayRole, round(value, decimals) if decimals else int(value))
+        item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        return item
+
+    def _fill(self, table: QTableWidget, stats, per_call_rows: bool = False):
+        table.setSortingEnabled(False)
+        table.setRowCount(len(stats))
+        for row, s in enumerate(stats):
+            per_call = (s.rows if per_call_rows else s.queries) / s.calls
+            table.setItem(row, 0, QTableWidgetItem(s.name))
+            table.setItem(row, 1, self._number_item(s.calls))
+            table.setItem(row, 2, self._number_item(s.total * 1000, 1))
+            table.setItem(row, 3, self._number_item(s.percentile(50) * 1000, 2))
+            table.setItem(row, 4, self._number_item(s.percentile(95) * 1000, 2))
+            table.setItem(row, 5, self._number_item(s.max * 1000, 2))
+            table.setItem(row, 6, self._number_item(per_call, 1))
+        table.setSortingEnabled(True)
+
+    def refresh(self):
+        """Перечитати накопичені виміри."""
+        self._fill(self.actions_table, perf.stats(KIND_ACTION))
+        self._fill(self.calls_table, perf.stats(KIND_CALL))
+        self._fill(self.queries_table, perf.stats(KIND_SQL), per_call_rows=True)
+        cache = roster_cache.stats()
+        self.summary_label.setText(
+            f"Кеш ростера: влучань {cache['hits']}, промахів {cache['misses']}, "
+            f"гравців у кеші {cache['players']}"
+            + ("" if perf.enabled else "  (вимірювання вимкнено)")
+        )
+
+    def reset(self):
+        perf.reset()
+        self.refresh()
+
+    def export(self):
+        """Зберегти звіт у JSON."""
+        path, _ = QFileDialog.getSaveFileName(self, "Експорт звіту", "perf_report.json", "JSON (*.json)")
+        if path:
+            perf.export_json(path, {'roster_cache': roster_cache.stats()})
@@ -2,19 +2,22 @@
 Main window for the clan role manager application.
 """
 
+from PySide6.QtCore import Qt
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
-    QMessageBox, QTabWidget
+    QMessageBox, QTabWidget, QApplication, QProgressBar, QLabel
 )
 from PySide6.QtWidgets import QDialog
 
-from services.form_service import FormService
+from services.form_sync_service import FormSyncService
 from services.player_service import PlayerService
 from services.role_service import RoleService
 from services.assignment_service import AssignmentService
-from ui.dialogs import AssignDialog
+from ui.dialogs import AssignDialog, PerformanceDialog
 from ui.tabs import PlayersTab, RolesTab, DetectionNicksTab
+from ui.tasks import TaskRunner
 from utils.data_manager import DataManager
+from utils.perf import timed
 
 
 class MainWindow(QMainWindow):
@@ -23,8 +26,13 @@ class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.detection_nicks = []
+        self.perf_dialog = None
         self.setWindowTitle("Clan Role Manager")
         self.resize(800, 600)
+        # Form sync, import and export run in the background, one at a time
+        self.tasks = TaskRunner(self)
+        self.tasks.busyChanged.connect(self._on_task_busy)
+        self.tasks.progress.connect(self._on_task_progress)
         self._init_ui()
         self.refresh_all()
 
@@ -59,6 +67,16 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.tabs)
         main_widget.setLayout(layout)
 
+        # Background task progress in the status bar
+        self.task_label = QLabel()
+        self.task_progress = QProgressBar()
+        self.task_progress.setMaximumWidth(200)
+        self.task_cancel_btn = QPushButton("Скасувати")
+        self.task_cancel_btn.clicked.connect(self.tasks.cancel)
+        for widget in (self.task_label, self.task_progress, self.task_cancel_btn):
+            widget.setVisible(False)
+            self.statusBar().addPermanentWidget(widget)
+
     def handle_nick_detection(self, nicks: list[str]):
         self.detection_nicks = nicks
 
@@ -75,6 +93,7 @@ class MainWindow(QMainWindow):
         top_buttons.addStretch()
 
         form_update_btn = QPushButton("Завантажити з опитування")
+        form_update_btn.setToolTip("Завантажує лише нові відповіді. Shift + клік — перечитати всю таблицю.")
         form_update_btn.clicked.connect(self.fetch_from_form)
         top_buttons.addWidget(form_update_btn)
 
@@ -87,8 +106,17 @@ class MainWindow(QMainWindow):
         import_btn.clicked.connect(self.import_data)
         top_buttons.addWidget(import_btn)
 
+        perf_btn = QPushButton("Продуктивність")
+        perf_btn.setToolTip("Час виконання дій, викликів сервісів і SQL-запитів")
+        perf_btn.clicked.connect(self.open_perf_dialog)
+        top_buttons.addWidget(perf_btn)
+
+        # Disabled while a background task runs
+        self.task_locked_buttons = [assign_btn, form_update_btn, export_btn, import_btn]
+
         return top_buttons
 
+    @timed()
     def refresh_all(self):
         """Refresh both tabs."""
         self.players_tab.refresh()
@@ -121,7 +149,7 @@ class MainWindow(QMainWindow):
                 QMessageBox.warning(self, "Error", "Оберіть хоча б одного гравця")
                 return
 
-            result = AssignmentService.assign_roles(role_counts, selected_players)
+            result = AssignmentService.assign_roles(role_counts, selected_players, selected_data["strategy"])
 
             # Show result
             txt = "Результати призначення:\n\n"
@@ -135,44 +163,102 @@ class MainWindow(QMainWindow):
             QMessageBox.information(self, "Результат призначення", txt)
             self.refresh_all()
 
+    def open_perf_dialog(self):
+        """Show the performance panel (non-modal, kept between openings)."""
+        if self.perf_dialog is None:
+            self.perf_dialog = PerformanceDialog(self)
+        self.perf_dialog.refresh()
+        self.perf_dialog.show()
+        self.perf_dialog.raise_()
+
+    def _on_task_busy(self, busy: bool):
+        """Lock the controls that modify the roster while a background task runs."""
+        for btn in self.task_locked_buttons:
+            btn.setEnabled(not busy)
+        self.players_tab.setEnabled(not busy)
+        self.roles_tab.setEnabled(not busy)
+        for widget in (self.task_label, self.task_progress, self.task_cancel_btn):
+            widget.setVisible(busy)
+        if busy:
+            self.task_label.setText(self.tasks.current.title)
+            self.task_progress.setRange(0, 0)
+            self.task_cancel_btn.setEnabled(True)
+
+    def _on_task_progress(self, done: int, total: int, text: str):
+        if text:
+            self.task_label.setText(text)
+        # total == 0 — unknown amount of work (busy indicator)
+        self.task_progress.setRange(0, total)
+        self.task_progress.setValue(done)
+
+    def _on_task_cancelled(self):
+        self.statusBar().showMessage("Операцію скасовано", 5000)
+        self.refresh_all()
+
     def fetch_from_form(self):
-        try:
-            data = FormService.fetch_responses()
-            add_people = []
-            update_people = []
-            for nickname, preferences in data.items():
-                try:
-                    for index, role in enumerate(preferences):
-                        if role not in RoleService.list_roles():
-                            RoleService.add_role(role)
-                    PlayerService.add_player(nickname,preferences)
-                    add_people.append(nickname)
-                except ValueError:
-                    if PlayerService.get_player(nickname).preferences != preferences:
-                        PlayerService.update_player(nickname,nickname,preferences)
-                        update_people.append(nickname)
-            add_people_msg = ', '.join(add_people) if add_people else '-'
-            update_people_msg = ', '.join(update_people) if update_people else '-'
-            QMessageBox.information(self, "Успішно", f"Дані завантажено!\nДодано: {add_people_msg}\nОновлено: {update_people_msg}")
-        except Exception as e:
-            QMessageBox.critical(self, "Помилка", f"Не вдалося зчитати дані:\n{e}")
+        full = bool(QApplication.keyboardModifiers() & Qt.ShiftModifier)
 
-        self.refresh_all()
+        def run(task):
+            return FormSyncService.sync(full=full, progress=task.progress)
+
+        def done(result):
+            update, report = result
+            add_people_msg = ', '.join(report.added) if report.added else '-'
+            update_people_msg = ', '.join(report.updated) if report.updated else '-'
+            new_roles_msg = f"\nНові ролі: {', '.join(report.new_roles)}" if report.new_roles else ''
+            self.refresh_all()
+            QMessageBox.information(self, "Успішно", f"Дані завантажено! Нових рядків: {update.rows_read}"
+                                                     f"{' (таблицю перечитано повністю)' if update.full_resync else ''}"
+                                                     f"\nДодано: {add_people_msg}\nОновлено: {update_people_msg}"
+                                                     f"{new_roles_msg}\nБез змін: {len(report.unchanged)}")
+
+        def failed(message):
+            self.refresh_all()
+            QMessageBox.critical(self, "Помилка", f"Не вдалося зчитати дані:\n{message}")
+
+        self.tasks.start(run, done, failed, self._on_task_cancelled, title="Синхронізація з опитуванням…")
 
     def export_data(self):
-        """Export data to JSON file."""
-        try:
-            DataManager.export_data()
-            QMessageBox.information(self, "Export", "Експортовано людей та ролі")
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Помилка експорту: {str(e)}")
+        """Export data to a .crm archive in the background."""
+        path = DataManager.choose_export_path(self)
+        if not path:
+            return
+        self.tasks.start(
+            lambda task: DataManager.export_to_path(path, task.progress),
+            lambda stats: QMessageBox.information(
+                self, "Export",
+                f"Експортовано {stats.players} людей та {stats.roles} ролей ({stats.rows_per_second:.0f} рядків/с)"
+            ),
+            lambda message: QMessageBox.warning(self, "Error", f"Помилка експорту: {message}"),
+            self._on_task_cancelled,
+            title="Експорт даних…"
+        )
 
     def import_data(self):
-        """Import data from JSON file."""
-        try:
-            players_count, roles_count = DataManager.import_data()
+        """Import data from a .crm archive in the background."""
+        path = DataManager.choose_import_path(self)
+        if not path:
+            return
+
+        def done(report):
+            self.refresh_all()
             QMessageBox.information(self, "Import",
-                                  f"Імпортовано {players_count} людей та {roles_count} ролей")
+                                  f"Імпортовано {report.players} людей та {report.roles_inserted} ролей "
+                                  f"({report.rows_per_second:.0f} рядків/с)\n"
+                                  f"Нових: {report.players_inserted}, оновлено: {report.players_updated}, "
+                                  f"без змін: {report.players_unchanged}, пропущено: {report.players_skipped}, "
+                                  f"повторів: {report.players_duplicates}\n"
+                                  f"Записів історії призначень: {report.assignments}")
+
+        def failed(message):
             self.refresh_all()
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Помилка імпорту: {str(e)}")
+            QMessageBox.warning(self, "Error", f"Помилка імпорту: {message}")
+
+        self.tasks.start(lambda task: DataManager.import_from_path(path, task.progress),
+                         done, failed, self._on_task_cancelled, title="Імпорт даних…")
+
+    def closeEvent(self, event):
+        """Cancel a running background task and wait for it before the database is closed."""
+        self.tasks.cancel()
+        self.tasks.pool.waitForDone()
+        super().closeEvent(event)
@@ -0,0 +1,158 @@
+"""
+Item models for the table views of the clan role manager application.
+"""
+
+from typing import List, Dict, Tuple, Optional
+
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+
+from models.player import Player
+
+
+class PlayersTableModel(QAbstractTableModel):
+    """
+    Players table backed by a list of Player objects.
+
+    The view only asks for the rows it shows, so nothing is allocated per row.
+    set_players() emits dataChanged for the rows whose Player changed when the
+    roster itself is the same, and resets the model otherwise.
+    """
+
+    HEADERS = ["Ім'я", "Обрані ролі"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._players: List[Player] = []
+        self._formatted: List[Optional[str]] = []
+        self._sort_column = -1
+        self._sort_order = Qt.AscendingOrder
+        self._filter = ""
+        self._accepted: List[bool] = []
+
+    @staticmethod
+    def format_preferences_with_counts(preferences: List[str], role_assignments: Dict[str, Tuple[int, str]]) -> str:
+        """Форматує обрані ролі з кількістю призначень у дужках."""
+        formatted = []
+        for role in preferences:
+            count = role_assignments.get(role, [0, ""])[0]
+            date = role_assignments.get(role, [0, ""])[1]
+            formatted.append(f"{role} ({count}{f' - {date}'if date!=''else '' })")
+        return ', '.join(formatted)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._players)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+        row = index.row()
+        if index.column() == 0:
+            return self._players[row].nickname
+        return self._preferences_text(row)
+
+    def _preferences_text(self, row: int) -> str:
+        text = self._formatted[row]
+        if text is None:
+            p = self._players[row]
+            text = self._formatted[row] = self.format_preferences_with_counts(p.preferences, p.role_assignments)
+        return text
+
+    def player_at(self, row: int) -> Player:
+        return self._players[row]
+
+    def set_filter(self, needle: str) -> None:
+        """Set the casefolded text rows must contain (nickname or a role); used by the proxy."""
+        self._filter = needle
+        self._accepted = [self._matches(p) for p in self._players]
+
+    def row_accepted(self, row: int) -> bool:
+        return self._accepted[row]
+
+    def _matches(self, player: Player) -> bool:
+        needle = self._filter
+        return (not needle or needle in player.nickname.casefold()
+                or any(needle in role.casefold() for role in player.preferences))
+
+    def set_players(self, players: List[Player]) -> None:
+        """Show a new roster, updating only changed rows when the nicknames are the same."""
+        by_nickname = {p.nickname: p for p in players}
+        same_roster = (len(by_nickname) == len(self._players)
+                       and all(p.nickname in by_nickname for p in self._players))
+        if not same_roster:
+            self.beginResetModel()
+            self._players = list(players)
+            self._formatted = [None] * len(self._players)
+            self._accepted = [self._matches(p) for p in self._players]
+            self._sort_rows()
+            self.endResetModel()
+            return
+
+        # Cached players are replaced on every change, so identity marks changed rows
+        changed = []
+        for row, old in enumerate(self._players):
+            new = by_nickname[old.nickname]
+            if new is not old:
+                self._players[row] = new
+                self._formatted[row] = None
+                self._accepted[row] = self._matches(new)
+                changed.append(row)
+        if changed:
+            self.dataChanged.emit(self.index(changed[0], 0),
+                                  self.index(changed[-1], self.columnCount() - 1))
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Sort rows in Python (one key per row instead of one data() call per comparison)."""
+        self._sort_column, self._sort_order = column, order
+        self.layoutAboutToBeChanged.emit()
+        old_rows = {id(p): row for row, p in enumerate(self._players)}
+        self._sort_rows()
+        # Keep selections and other persistent indexes pointing at the same players
+        new_rows = {id(p): row for row, p in enumerate(self._players)}
+        moved = {old_rows[key]: new_rows[key] for key in old_rows}
+        old_indexes = self.persistentIndexList()
+        self.changePersistentIndexList(
+            old_indexes,
+            [self.index(moved[index.row()], index.column()) for index in old_indexes]
+        )
+        self.layoutChanged.emit()
+
+    def _sort_rows(self) -> None:
+        if self._sort_column < 0:
+            return
+        if self._sort_column == 0:
+            keys = [p.nickname.casefold() for p in self._players]
+        else:
+            keys = [self._preferences_text(row).casefold() for row in range(len(self._players))]
+        order = sorted(range(len(keys)), key=keys.__getitem__,
+                       reverse=self._sort_order == Qt.DescendingOrder)
+        self._players = [self._players[i] for i in order]
+        self._formatted = [self._formatted[i] for i in order]
+        self._accepted = [self._accepted[i] for i in order]
+
+
+class PlayersFilterProxyModel(QSortFilterProxyModel):
+    """Case-insensitive filter over nickname and roles; sorting is delegated to the source model."""
+
+    def setSourceModel(self, model: PlayersTableModel):
+        self._source = model
+        super().setSourceModel(model)
+
+    def setFilterFixedString(self, pattern: str):
+        """Match all rows once in the source model, then rebuild the mapping in one reset."""
+        self.beginResetModel()
+        self._source.set_filter(pattern.casefold())
+        self.endResetModel()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        return self._source.row_accepted(source_row)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self._source.sort(column, order)
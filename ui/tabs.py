@@ -2,25 +2,33 @@
 Вкладки для додатку керування ролями в клані.
 """
 
+import os
 import sqlite3
-from typing import List, Dict, Tuple
+import time
+from dataclasses import dataclass
+from typing import List, Tuple, Optional
 
-import easyocr
 from PySide6 import QtGui
-from PySide6.QtGui import QShortcut, QKeySequence
+from PySide6.QtGui import QShortcut, QKeySequence, QImage, QPixmap
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget,
     QTableWidgetItem, QMessageBox, QLabel, QHeaderView, QInputDialog,
-    QMenu, QApplication, QProgressBar, QScrollArea
+    QMenu, QApplication, QProgressBar, QScrollArea, QTableView, QLineEdit, QComboBox,
+    QCheckBox, QListWidget, QFileDialog
 )
 from PySide6.QtWidgets import QDialog
 from PySide6.QtCore import Qt, QThread, Signal
 
+from services.ocr_cache import ocr_cache, OCRCache
+from services.ocr_service import OCRService, OCRJob, OCRCancelled
 from services.player_service import PlayerService
 from services.role_service import RoleService
 from ui.dialogs import PlayerDialog, RoleAssignDialog, RoleAssignmentDialog
+from ui.table_models import PlayersTableModel, PlayersFilterProxyModel
 from ui.widgets import DraggableTableWidget
+from utils.image_utils import to_rgb888, qimage_to_array, find_text_column
 from utils.image_viewer import ImageViewer
+from utils.perf import timed
 
 
 class PlayersTab(QWidget):
@@ -35,15 +43,32 @@ class PlayersTab(QWidget):
         """Ініціалізація інтерфейсу."""
         v = QVBoxLayout()
 
-        # Таблиця гравців
-        self.table = QTableWidget(0, 2)
-        self.table.setHorizontalHeaderLabels(["Ім'я", "Обрані ролі"])
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
-
-        # Автоматичне підлаштування ширини колонок
+        # Пошук по ніку та ролях
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Пошук гравця або ролі...")
+        self.filter_edit.setClearButtonEnabled(True)
+        v.addWidget(self.filter_edit)
+
+        # Таблиця гравців (модель + проксі для сортування та фільтрації)
+        self.model = PlayersTableModel(self)
+        self.proxy = PlayersFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.filter_edit.textChanged.connect(self.proxy.setFilterFixedString)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
+        self.table.setSelectionMode(QTableView.SingleSelection)
+        self.table.setEditTriggers(QTableView.NoEditTriggers)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(-1, Qt.AscendingOrder)
+        self.table.verticalHeader().setDefaultSectionSize(24)
+
+        # ResizeToContents вимірює всі рядки, тому ширина задається один раз
         header = self.table.horizontalHeader()
-        header.setSectionResizeMode(QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(QHeaderView.Interactive)
+        header.setStretchLastSection(True)
+        header.resizeSection(0, 200)
 
         # Контекстне меню
         self.table.setContextMenuPolicy(Qt.CustomContextMenu)
@@ -77,29 +102,17 @@ class PlayersTab(QWidget):
         v.addLayout(hb)
         self.setLayout(v)
 
-    def format_preferences_with_counts(self, preferences: List[str], role_assignments: Dict[str, Tuple[int, str]]) -> str:
-        """Форматує обрані ролі з кількістю призначень у дужках."""
-        formatted = []
-        for role in preferences:
-            count = role_assignments.get(role, [0, ""])[0]
-            date = role_assignments.get(role, [0, ""])[1]
-            formatted.append(f"{role} ({count}{f' - {date}'if date!=''else '' })")
-        return ', '.join(formatted)
-
+    @timed()
     def refresh(self):
-        """Оновлення таблиці гравців."""
-        self.table.setRowCount(0)
-        players = PlayerService.list_players()
-        for p in players:
-            r = self.table.rowCount()
-            self.table.insertRow(r)
-            self.table.setItem(r, 0, QTableWidgetItem(p.nickname))
-
-            # Форматуємо обрані ролі з кількістю призначень
-            formatted_prefs = self.format_preferences_with_counts(
-                p.preferences, p.role_assignments
-            )
-            self.table.setItem(r, 1, QTableWidgetItem(formatted_prefs))
+        """Оновлення таблиці гравців (перемальовуються лише змінені рядки)."""
+        self.model.set_players(PlayerService.list_players())
+
+    def selected_nickname(self) -> Optional[str]:
+        """Нік гравця у виділеному рядку або None."""
+        rows = self.table.selectionModel().selectedRows()
+        if not rows:
+            return None
+        return self.model.player_at(self.proxy.mapToSource(rows[0]).row()).nickname
 
     def add_player_ui(self):
         """Додавання нового гравця через UI."""
@@ -120,11 +133,10 @@ class PlayersTab(QWidget):
 
     def edit_player_ui(self):
         """Редагування існуючого гравця через UI."""
-        sel = self.table.selectedItems()
-        if not sel:
+        nickname = self.selected_nickname()
+        if not nickname:
             QMessageBox.warning(self, "Помилка", "Виберіть рядок.")
             return
-        nickname = sel[0].text()
 
         try:
             player = PlayerService.get_player(nickname)
@@ -148,11 +160,10 @@ class PlayersTab(QWidget):
 
     def delete_player_ui(self):
         """Видалення гравця через UI."""
-        sel = self.table.selectedItems()
-        if not sel:
+        nickname = self.selected_nickname()
+        if not nickname:
             QMessageBox.warning(self, "Помилка", "Виберіть рядок.")
             return
-        nickname = sel[0].text()
         if QMessageBox.question(self, "Підтвердження", f"Видалити {nickname}?") == QMessageBox.Yes:
             PlayerService.delete_player(nickname)
             self.refresh()
@@ -161,11 +172,10 @@ class PlayersTab(QWidget):
 
     def add_role_assignment_ui(self):
         """Видалення гравця через UI."""
-        sel = self.table.selectedItems()
-        if not sel:
+        nickname = self.selected_nickname()
+        if not nickname:
             QMessageBox.warning(self, "Помилка", "Виберіть рядок.")
             return
-        nickname = sel[0].text()
         try:
             dlg = RoleAssignmentDialog(
                 self, nickname=nickname
@@ -203,7 +213,7 @@ class PlayersTab(QWidget):
         add_action = menu.addAction("Додати гравця")
         add_action.triggered.connect(self.add_player_ui)
 
-        if self.table.itemAt(position):
+        if self.table.indexAt(position).isValid():
             edit_action = menu.addAction("Редагувати гравця")
             edit_action.triggered.connect(self.edit_player_ui)
 
@@ -273,6 +283,7 @@ class RolesTab(QWidget):
         v.addLayout(hb)
         self.setLayout(v)
 
+    @timed()
     def refresh(self):
         """Оновлення таблиці ролей."""
         self.table.setRowCount(0)
@@ -349,7 +360,14 @@ class RolesTab(QWidget):
             QMessageBox.warning(self, "Помилка", "Виберіть роль")
             return
         role_name = sel[0].text()
-        if QMessageBox.question(self, "Підтвердження", f"Видалити роль '{role_name}'?") == QMessageBox.Yes:
+        message = f"Видалити роль '{role_name}'?"
+        preferences, assignments = RoleService.get_role_usage(role_name)
+        if preferences or assignments:
+            # Вподобання та історія призначень видаляються разом з роллю
+            message += (f"\n\nРазом з нею буде видалено:\n"
+                        f"— роль у вподобаннях {preferences} гравців;\n"
+                        f"— історію призначень на цю роль у {assignments} гравців.")
+        if QMessageBox.question(self, "Підтвердження", message) == QMessageBox.Yes:
             RoleService.delete_role(role_name)
             self.refresh()
             if hasattr(self.parent_window, 'players_tab'):
@@ -372,103 +390,442 @@ class RolesTab(QWidget):
         menu.exec_(self.table.mapToGlobal(position))
 
 
-class OCRThread(QThread):
-    progress = Signal(int)       # сигнал прогресу (0-100)
-    finished = Signal(list)      # сигнал результатів
+@dataclass
+class OCRBatchItem:
+    """Скріншот у пакеті OCR та його результати (None — ще не розпізнано)."""
+    name: str
+    image: QImage
+    results: Optional[list] = None
+    seconds: float = 0.0
+    cached: bool = False
 
-    def __init__(self, reader, img_path):
+
+class OCRThread(QThread):
+    """OCR одного або кількох зображень по черзі спільним Reader."""
+    imageStarted = Signal(int, int)       # номер у черзі, всього зображень
+    progress = Signal(str, int, int)      # етап, виконано, всього (0 = невідомо)
+    imageDone = Signal(int, list, float, bool)  # індекс у пакеті, результати, секунди, з кешу
+    completed = Signal()
+    failed = Signal(str)
+
+    def __init__(self, reader, images: List[Tuple[int, QImage]], mode: str = 'full',
+                 region: Optional[Tuple[int, int, int, int]] = None):
         super().__init__()
-        self.reader = reader
-        self.img_path = img_path
+        self.images = images
+        self.mode = mode
+        self.region = region
+        self.job = OCRJob(reader, progress=self.progress.emit)
+
+    def cancel(self):
+        """Скасування OCR (зупиняється між порціями розпізнавання)."""
+        self.job.cancel()
 
+    @timed()
     def run(self):
-        results = self.reader.readtext(self.img_path)
-        total = len(results)
-        for i, r in enumerate(results):
-            percent = int((i + 1) / total * 100)
-            self.progress.emit(percent)
-        self.finished.emit(results)
+        try:
+            for number, (index, image) in enumerate(self.images, 1):
+                self.imageStarted.emit(number, len(self.images))
+                start = time.perf_counter()
+                # rgb тримає пікселі, доки OCR читає їх без копіювання
+                rgb = to_rgb888(image)
+                array = qimage_to_array(rgb)
+                key = OCRCache.make_key(array, self.mode, self.region)
+                results = ocr_cache.get(key)
+                cached = results is not None
+                if not cached:
+                    region = self.region
+                    if self.mode == 'auto':
+                        # Якщо колонку тексту не знайдено, розпізнається все зображення
+                        region = find_text_column(array)
+                    # Лише вузькі колонки нікнеймів розбиваються на частини; 'full' — як reader.readtext
+                    results = self.job.run(array, region, tile=self.mode != 'full')
+                    ocr_cache.put(key, results, time.perf_counter() - start)
+                self.imageDone.emit(index, results, time.perf_counter() - start, cached)
+        except OCRCancelled:
+            return
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.completed.emit()
+
+class OCRLoaderThread(QThread):
+    """Фонове завантаження OCR-моделі (імпорт easyocr/torch та створення Reader)."""
+    loaded = Signal(object)
+    failed = Signal(str)
+
+    def run(self):
+        try:
+            reader = OCRService.get_reader()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.loaded.emit(reader)
 
 class DetectionNicksTab(QWidget):
-    """Вкладка для детекції нікнеймів зі скріншота Discord."""
+    """Вкладка для детекції нікнеймів зі скріншотів Discord (один або пакет)."""
 
     nicksParsed = Signal(list)
 
+    HINT_TEXT = "Вставте скріншот (Ctrl+V) або перетягніть зображення"
+
+    # Режими OCR: (назва, ключ)
+    OCR_MODES = [
+        ("Усе зображення", 'full'),
+        ("Авто: колонка з текстом", 'auto'),
+        ("Виділена область (Shift + миша)", 'roi'),
+    ]
+
+    IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.webp')
+
     def __init__(self, parent=None):
         super().__init__(parent)
+        # OCR-модель завантажується у фоні при першому відкритті вкладки або вставці
+        self.reader = None
+        self.loader_thread = None
+        self.ocr_thread = None
+        self.stale_threads = []
+        self.batch: List[OCRBatchItem] = []
+        self.paste_count = 0
+        self.image_prefix = ""
         self._init_ui()
-        self.reader = easyocr.Reader(['en', 'uk'])
+        self.setAcceptDrops(True)
 
     def _init_ui(self):
         v = QVBoxLayout()
 
         # Інфо-лейбл
-        self.info_label = QLabel("Вставте скріншот (Ctrl+V)")
+        self.info_label = QLabel(self.HINT_TEXT)
         self.info_label.setAlignment(Qt.AlignCenter)
         self.info_label.setStyleSheet("color: #555; font-style: italic;")
         v.addWidget(self.info_label)
 
-        # Віджет для картинки з масштабуванням та скролом
+        # Вибір області розпізнавання та керування пакетом
+        mode_layout = QHBoxLayout()
+        mode_layout.addWidget(QLabel("Режим OCR:"))
+        self.mode_combo = QComboBox()
+        for title, key in self.OCR_MODES:
+            self.mode_combo.addItem(title, key)
+        self.mode_combo.currentIndexChanged.connect(self._on_mode_changed)
+        mode_layout.addWidget(self.mode_combo)
+        mode_layout.addStretch()
+        self.batch_checkbox = QCheckBox("Пакетний режим (додавати скріншоти)")
+        mode_layout.addWidget(self.batch_checkbox)
+        folder_btn = QPushButton("Додати папку…")
+        folder_btn.clicked.connect(self.add_folder)
+        mode_layout.addWidget(folder_btn)
+        clear_btn = QPushButton("Очистити")
+        clear_btn.clicked.connect(self.clear_batch)
+        mode_layout.addWidget(clear_btn)
+        v.addLayout(mode_layout)
+
+        # Віджет для картинки з масштабуванням та скролом і список скріншотів пакета
+        images_layout = QHBoxLayout()
         self.image_viewer = ImageViewer()
         self.image_viewer.setMinimumHeight(200)
-        v.addWidget(self.image_viewer, stretch=2)
+        self.image_viewer.roiSelected.connect(self._on_roi_selected)
+        images_layout.addWidget(self.image_viewer, stretch=1)
+        self.batch_list = QListWidget()
+        self.batch_list.setMaximumWidth(260)
+        self.batch_list.currentRowChanged.connect(self._show_batch_image)
+        images_layout.addWidget(self.batch_list)
+        v.addLayout(images_layout, stretch=2)
 
         # Прогрес-бар OCR
         self.progress_bar = QProgressBar()
         self.progress_bar.setValue(0)
         self.progress_bar.setVisible(False)
-        v.addWidget(self.progress_bar)
+        self.cancel_btn = QPushButton("Скасувати")
+        self.cancel_btn.setVisible(False)
+        self.cancel_btn.clicked.connect(self.cancel_ocr)
+        progress_layout = QHBoxLayout()
+        progress_layout.addWidget(self.progress_bar, stretch=1)
+        progress_layout.addWidget(self.cancel_btn)
+        v.addLayout(progress_layout)
 
         # Таблиця з результатами OCR
-        self.results_table = QTableWidget(0, 2)
-        self.results_table.setHorizontalHeaderLabels(["Нік", "Ймовірність"])
+        self.results_table = QTableWidget(0, 3)
+        self.results_table.setHorizontalHeaderLabels(["Нік", "Ймовірність", "Скріншот"])
         self.results_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
         v.addWidget(self.results_table, stretch=1)
 
+        self.summary_label = QLabel("")
+        v.addWidget(self.summary_label)
+
         self.setLayout(v)
 
         # Глобальний Ctrl+V для вставки картинки
         paste_shortcut = QShortcut(QKeySequence("Ctrl+V"), self)
         paste_shortcut.activated.connect(self.paste_image)
 
+    def showEvent(self, event):
+        """Прогрів OCR-моделі при першому відкритті вкладки."""
+        super().showEvent(event)
+        self.load_reader()
+
+    def load_reader(self):
+        """Запуск фонового завантаження OCR-моделі, якщо вона ще не завантажена."""
+        if self.reader is not None or self.loader_thread is not None:
+            return
+        if OCRService.is_loaded():
+            self.reader = OCRService.get_reader()
+            return
+
+        self.info_label.setText("Завантаження OCR-моделі…")
+        self.progress_bar.setRange(0, 0)  # невизначений прогрес
+        self.progress_bar.setVisible(True)
+
+        self.loader_thread = OCRLoaderThread()
+        self.loader_thread.loaded.connect(self._on_reader_loaded)
+        self.loader_thread.failed.connect(self._on_reader_failed)
+        self.loader_thread.start()
+
+    def _on_reader_loaded(self, reader):
+        self.reader = reader
+        self.loader_thread = None
+        self.progress_bar.setVisible(False)
+        self.progress_bar.setRange(0, 100)
+        self.info_label.setText(self.HINT_TEXT)
+
+        # Скріншоти, додані під час завантаження
+        self.run_ocr()
+
+    def _on_reader_failed(self, message: str):
+        self.loader_thread = None
+        self.progress_bar.setVisible(False)
+        self.progress_bar.setRange(0, 100)
+        self.info_label.setText(self.HINT_TEXT)
+        QMessageBox.critical(self, "Помилка", f"Не вдалося завантажити OCR:\n{message}")
+
+    # ---- додавання скріншотів ----
+
     def paste_image(self):
         """Вставка з буфера та запуск OCR."""
         clipboard = QApplication.clipboard()
-        pixmap = clipboard.pixmap()
-        if not pixmap.isNull():
-            self.image_viewer.setPhoto(pixmap)
+        image = clipboard.image()
+        if not image.isNull():
+            self.paste_count += 1
+            self.add_images([(f"Вставка {self.paste_count}", image)])
+
+    def add_folder(self):
+        """Додавання всіх зображень з папки."""
+        folder = QFileDialog.getExistingDirectory(self, "Папка зі скріншотами")
+        if folder:
+            self.add_files([folder])
+
+    def add_files(self, paths: List[str]):
+        """Додавання файлів зображень; папки розгортаються у свої зображення (за назвою)."""
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                files += sorted(os.path.join(path, name) for name in os.listdir(path)
+                                if name.lower().endswith(self.IMAGE_EXTENSIONS))
+            elif path.lower().endswith(self.IMAGE_EXTENSIONS):
+                files.append(path)
+
+        images = []
+        for path in files:
+            image = QImage(path)
+            if not image.isNull():
+                images.append((os.path.basename(path), image))
+        if images:
+            self.add_images(images)
+
+    def add_images(self, images: List[Tuple[str, QImage]]):
+        """Додає скріншоти до пакета (або замінює їх поза пакетним режимом) і запускає OCR."""
+        if not self.batch_checkbox.isChecked():
+            self.cancel_ocr()
+            self.batch = []
+            self.batch_list.clear()
+        for name, image in images:
+            self.batch.append(OCRBatchItem(name, image))
+            self.batch_list.addItem(name)
+        self.batch_list.setCurrentRow(len(self.batch) - 1)
+        self.run_ocr()
+
+    def clear_batch(self):
+        self.cancel_ocr()
+        self.batch = []
+        self.batch_list.clear()
+        self.image_viewer.setPhoto(None)
+        self.show_results()
+        # Інакше діалог призначення й надалі позначав би ніки очищеного пакета
+        self.nicksParsed.emit([])
+
+    def dragEnterEvent(self, event):
+        if event.mimeData().hasUrls() or event.mimeData().hasImage():
+            event.acceptProposedAction()
+
+    def dropEvent(self, event):
+        mime = event.mimeData()
+        if mime.hasUrls():
+            self.add_files([url.toLocalFile() for url in mime.urls() if url.isLocalFile()])
+        elif mime.hasImage():
+            self.paste_count += 1
+            self.add_images([(f"Вставка {self.paste_count}", QImage(mime.imageData()))])
+        event.acceptProposedAction()
+
+    def _show_batch_image(self, row: int):
+        if 0 <= row < len(self.batch):
+            self.image_viewer.setPhoto(QPixmap.fromImage(self.batch[row].image))
+
+    def _update_batch_item(self, index: int):
+        item = self.batch[index]
+        text = item.name
+        if item.results is not None:
+            count = len(OCRService.extract_nicks(item.results))
+            source = "кеш" if item.cached else f"{item.seconds:.1f} с"
+            text += f" — {source}, ніків: {count}"
+        self.batch_list.item(index).setText(text)
+
+    # ---- розпізнавання ----
+
+    def _on_mode_changed(self):
+        """Повторне розпізнавання скріншотів у новому режимі."""
+        self._rerun_all()
+
+    def _on_roi_selected(self, rect):
+        mode_index = self.mode_combo.findData('roi')
+        if self.mode_combo.currentIndex() != mode_index:
+            self.mode_combo.setCurrentIndex(mode_index)  # перезапуск через _on_mode_changed
+        else:
+            self._rerun_all()
+
+    def _rerun_all(self):
+        for index, item in enumerate(self.batch):
+            item.results = None
+            self._update_batch_item(index)
+        self.run_ocr()
+
+    def run_ocr(self):
+        """
+        Запуск OCR у окремому потоці для ще не розпізнаних скріншотів пакета;
+        попереднє розпізнавання скасовується (його незавершені зображення підуть у новий запуск).
+        """
+        self.cancel_ocr()
+        pending = [(index, item.image) for index, item in enumerate(self.batch) if item.results is None]
+        if not pending:
+            return
+        if self.reader is None:
+            # OCR запуститься, щойно модель завантажиться
+            self.load_reader()
+            return
 
-            tmp_path = "clipboard.png"
-            pixmap.save(tmp_path, "PNG")
-            self.run_ocr(tmp_path)
+        mode = self.mode_combo.currentData()
+        region = None
+        if mode == 'roi':
+            roi = self.image_viewer.roi()
+            if roi is None:
+                self.info_label.setText("Виділіть область з ніками: Shift + перетягування мишею")
+                return
+            region = (roi.x(), roi.y(), roi.width(), roi.height())
 
-    def run_ocr(self, img_path: str):
-        """Запуск OCR у окремому потоці з прогрес-баром."""
         self.progress_bar.setValue(0)
         self.progress_bar.setVisible(True)
-
-        self.ocr_thread = OCRThread(self.reader, img_path)
-        self.ocr_thread.progress.connect(self.progress_bar.setValue)
-        self.ocr_thread.finished.connect(self.show_results)
+        self.cancel_btn.setVisible(True)
+
+        self.ocr_thread = OCRThread(self.reader, pending, mode, region)
+        self.ocr_thread.imageStarted.connect(self._on_image_started)
+        self.ocr_thread.progress.connect(self._on_ocr_progress)
+        self.ocr_thread.imageDone.connect(self._on_image_done)
+        self.ocr_thread.completed.connect(self._on_ocr_completed)
+        self.ocr_thread.failed.connect(self._on_ocr_failed)
         self.ocr_thread.start()
 
-    def show_results(self, results):
-        """Вивід результатів OCR у таблицю з перевіркою [UKR]."""
+    def cancel_ocr(self):
+        """Скасування поточного розпізнавання."""
+        if self.ocr_thread is None:
+            return
+        self.ocr_thread.cancel()
+        # Потік тримається до завершення, щоб Qt не знищив його під час роботи
+        self.stale_threads = [t for t in self.stale_threads if t.isRunning()]
+        self.stale_threads.append(self.ocr_thread)
+        self.ocr_thread = None
+        self._reset_progress()
+
+    def _reset_progress(self):
         self.progress_bar.setVisible(False)
-        self.results_table.setRowCount(0)
-
-        nicks = []
+        self.progress_bar.setRange(0, 100)
+        self.cancel_btn.setVisible(False)
+        self.info_label.setText(self.HINT_TEXT)
 
-        for box, text, prob in results:
-            if text.startswith("[UKR]"):
-                clean_nick = text.replace("[UKR]", "").strip()
-                nicks.append(clean_nick)
+    def _is_current_ocr(self) -> bool:
+        """Сигнали від скасованих потоків ігноруються."""
+        return self.ocr_thread is not None and self.sender() is self.ocr_thread
 
-                row = self.results_table.rowCount()
-                self.results_table.insertRow(row)
-                self.results_table.setItem(row, 0, QTableWidgetItem(clean_nick))
-                self.results_table.setItem(row, 1, QTableWidgetItem(f"{prob:.2f}"))
+    def _on_image_started(self, number: int, total: int):
+        if self._is_current_ocr():
+            self.image_prefix = f"Зображення {number}/{total}. " if total > 1 else ""
 
+    def _on_ocr_progress(self, stage: str, done: int, total: int):
+        if not self._is_current_ocr():
+            return
+        if stage == 'recognize':
+            self.info_label.setText(f"{self.image_prefix}Розпізнавання тексту: {done}/{total}")
+            self.progress_bar.setRange(0, max(total, 1))
+            self.progress_bar.setValue(done)
+        elif stage == 'tiles':
+            self.info_label.setText(f"{self.image_prefix}Обробка фрагментів зображення: {done}/{total}")
+            self.progress_bar.setRange(0, total)
+            self.progress_bar.setValue(done)
+        elif stage == 'detect':
+            self.info_label.setText(f"{self.image_prefix}Пошук тексту на зображенні…")
+            self.progress_bar.setRange(0, 0)
+        elif stage == 'waiting':
+            self.info_label.setText("Очікування попереднього розпізнавання…")
+            self.progress_bar.setRange(0, 0)
+
+    def _on_image_done(self, index: int, results: list, seconds: float, cached: bool):
+        if not self._is_current_ocr():
+            return
+        self.batch[index].results = results
+        self.batch[index].seconds = seconds
+        self.batch[index].cached = cached
+        self._update_batch_item(index)
+        self.show_results()
+
+    def _on_ocr_completed(self):
+        if not self._is_current_ocr():
+            return
+        self.ocr_thread = None
+        self._reset_progress()
+        nicks = self.show_results()
         self.nicksParsed.emit(nicks)
 
+    def _on_ocr_failed(self, message: str):
+        if not self._is_current_ocr():
+            return
+        self.ocr_thread = None
+        self._reset_progress()
+        QMessageBox.critical(self, "Помилка", f"Помилка розпізнавання:\n{message}")
+
+    def show_results(self) -> List[str]:
+        """Вивід об'єднаних результатів пакета: кожен нік один раз, з найкращою ймовірністю."""
+        per_image = [OCRService.extract_nicks(item.results or []) for item in self.batch]
+        merged = OCRService.merge_nicks(per_image)
+
+        self.results_table.setRowCount(0)
+        for nick, prob, index in merged:
+            row = self.results_table.rowCount()
+            self.results_table.insertRow(row)
+            self.results_table.setItem(row, 0, QTableWidgetItem(nick))
+            self.results_table.setItem(row, 1, QTableWidgetItem(f"{prob:.2f}"))
+            self.results_table.setItem(row, 2, QTableWidgetItem(self.batch[index].name))
+
+        summary = []
+        done = [item for item in self.batch if item.results is not None]
+        if done:
+            total_seconds = sum(item.seconds for item in done)
+            summary.append(
+                f"Зображень: {len(done)}/{len(self.batch)} · унікальних ніків: {len(merged)} · "
+                f"час OCR: {total_seconds:.1f} с"
+            )
+        stats = ocr_cache.stats()
+        lookups = stats['hits'] + stats['misses']
+        if lookups:
+            summary.append(
+                f"Кеш OCR: {stats['hits']}/{lookups} ({stats['hits'] / lookups:.0%}), "
+                f"заощаджено {stats['saved_seconds']:.1f} с"
+            )
+        self.summary_label.setText(" · ".join(summary))
 
+        return [nick for nick, _, _ in merged]
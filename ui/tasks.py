@@ -0,0 +1,112 @@
+"""
+Background tasks for the main window.
+
+Long operations (form sync, import, export) run on the global QThreadPool.
+Results, errors and progress come back to the GUI thread through queued
+signals. Cancellation is cooperative: the task function reports progress
+through Task.progress(), which raises TaskCancelled once cancel() was
+requested, so work inside a transaction is rolled back.
+"""
+
+import threading
+from typing import Callable, Optional
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from utils.perf import recorder as perf
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task function when the task was cancelled."""
+
+
+class TaskSignals(QObject):
+    """Signals of a Task; created in the GUI thread so connected slots run there."""
+    progress = Signal(int, int, str)  # done, total (0 — unknown), text
+    finished = Signal(object)  # result of the task function
+    failed = Signal(str)
+    cancelled = Signal()
+
+
+class Task(QRunnable):
+    """Runs fn(task) on a pool thread; fn may call task.progress() and task.check_cancelled()."""
+
+    def __init__(self, fn: Callable[['Task'], object], title: str = ""):
+        super().__init__()
+        self.fn = fn
+        self.title = title
+        self.signals = TaskSignals()
+        self._cancel_event = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self) -> None:
+        if self._cancel_event.is_set():
+            raise TaskCancelled()
+
+    def progress(self, done: int, total: int = 0, text: str = "") -> None:
+        """Report progress from the task function (raises TaskCancelled after cancel())."""
+        self.check_cancelled()
+        self.signals.progress.emit(done, total, text)
+
+    def run(self):
+        try:
+            # The whole task is one action in the performance report
+            with perf.span(f"Task: {self.title or 'untitled'}"):
+                result = self.fn(self)
+        except TaskCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
+
+
+class TaskRunner(QObject):
+    """
+    Starts tasks on the global thread pool, one at a time, and keeps them
+    alive until they finish. busyChanged lets the window lock the controls
+    that would modify the roster while a task runs.
+    """
+
+    busyChanged = Signal(bool)
+    progress = Signal(int, int, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool.globalInstance()
+        self.current: Optional[Task] = None
+
+    def is_busy(self) -> bool:
+        return self.current is not None
+
+    def start(self, fn: Callable[[Task], object], on_done: Callable[[object], None] = None,
+              on_error: Callable[[str], None] = None, on_cancel: Callable[[], None] = None,
+              title: str = "") -> Optional[Task]:
+        """Run fn(task) in the background; callbacks are invoked in the GUI thread. None if busy."""
+        if self.current is not None:
+            return None
+        task = Task(fn, title)
+        task.signals.progress.connect(self.progress)
+        task.signals.finished.connect(lambda result: self._finish(task, on_done, result))
+        task.signals.failed.connect(lambda message: self._finish(task, on_error, message))
+        task.signals.cancelled.connect(lambda: self._finish(task, on_cancel))
+        self.current = task
+        self.busyChanged.emit(True)
+        self.pool.start(task)
+        return task
+
+    def cancel(self) -> None:
+        if self.current is not None:
+            self.current.cancel()
+
+    def _finish(self, task: Task, callback: Optional[Callable], *args) -> None:
+        if task is self.current:
+            self.current = None
+            self.busyChanged.emit(False)
+        if callback is not None:
+            callback(*args)
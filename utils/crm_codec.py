@@ -0,0 +1,102 @@
+"""
+Streaming codec for .crm archives.
+
+Version 2 is JSON Lines: a header object on the first line (format, version,
+roles, number of players) followed by one player object per line, so archives
+are written and read incrementally with bounded memory. Version 1 archives
+(a single, usually indented JSON document, or a bare list of players) are
+still readable, but have to be loaded whole.
+"""
+
+import json
+from typing import Dict, Iterable, Iterator, List, Optional
+
+FORMAT = "crm-jsonl"
+VERSION = "2.0"
+
+# Write buffer for archive files
+BUFFER_SIZE = 1 << 20
+
+
+class CrmWriter:
+    """Writes a version 2 archive: the header first, then players one line at a time."""
+
+    def __init__(self, f, roles: List[Dict], total: int):
+        self._f = f
+        header = {'format': FORMAT, 'version': VERSION, 'roles': roles, 'players': total}
+        f.write(json.dumps(header, ensure_ascii=False) + "\n")
+
+    def write_player(self, player: Dict) -> None:
+        self._f.write(json.dumps(player, ensure_ascii=False, separators=(',', ':')) + "\n")
+
+
+class CrmReader:
+    """
+    Opened .crm archive of either version. roles and total (None if unknown)
+    are available right away; players() iterates the player dicts.
+    """
+
+    def __init__(self, path: str):
+        self._f = open(path, 'rb')
+        self._legacy_players: Optional[List[Dict]] = None
+        try:
+            first_line = self._f.readline()
+            try:
+                first = json.loads(first_line)
+            except ValueError:
+                first = None
+
+            if isinstance(first, dict) and first.get('format') == FORMAT:
+                self.version = str(first.get('version', VERSION))
+                if int(self.version.split('.')[0]) > int(VERSION.split('.')[0]):
+                    raise ValueError(f"Unsupported .crm version {self.version}")
+                self.roles: List[Dict] = first.get('roles', [])
+                self.total: Optional[int] = first.get('players')
+                return
+
+            # Version 1: a complete JSON document (a one-line document was parsed already)
+            if first is None:
+                self._f.seek(0)
+                first = json.load(self._f)
+            self.version = "1.0"
+            if isinstance(first, list):
+                # Old format - just players
+                self._legacy_players, self.roles = first, []
+            else:
+                self._legacy_players, self.roles = first.get('players', []), first.get('roles', [])
+            self.total = len(self._legacy_players)
+        except BaseException:
+            self._f.close()
+            raise
+
+    @property
+    def streaming(self) -> bool:
+        return self._legacy_players is None
+
+    def players(self) -> Iterator[Dict]:
+        if not self.streaming:
+            yield from self._legacy_players
+            return
+        for line in self._f:
+            if line.strip():
+                yield json.loads(line)
+
+    def close(self) -> None:
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_crm(path: str, roles: List[Dict], players: Iterable[Dict], total: int) -> int:
+    """Write a version 2 archive from an iterable of player dicts; returns the number written."""
+    written = 0
+    with open(path, 'w', encoding='utf-8', newline='\n', buffering=BUFFER_SIZE) as f:
+        writer = CrmWriter(f, roles, total)
+        for player in players:
+            writer.write_player(player)
+            written += 1
+    return written
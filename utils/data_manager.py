@@ -2,84 +2,166 @@
 Data manager for import/export operations.
 """
 
-import json
-from typing import Tuple
-from PySide6.QtWidgets import QFileDialog, QWidget
+import os
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, Optional
 
+from services.import_service import ImportReport, ImportService
 from services.player_service import PlayerService
 from services.role_service import RoleService
+from services.roster_cache import roster_cache
+from utils.crm_codec import CrmReader, write_crm
+from utils import snapshot_codec
+
+if TYPE_CHECKING:
+    from PySide6.QtWidgets import QWidget
+
+# progress(done, total, text); may raise to abort (e.g. a cancelled background task)
+ProgressCallback = Callable[[int, int, str], None]
+
+
+@dataclass
+class TransferStats:
+    """Result of an import or export."""
+    players: int
+    roles: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.players / self.seconds if self.seconds > 0 else 0.0
 
 
 class DataManager:
     """Manages data import/export operations."""
 
+    # Players between two progress reports
+    PROGRESS_STEP = 2000
+
+    CRM_FILTER = "Clan Role Manager Files (*.crm)"
+    SNAPSHOT_FILTER = "Compact snapshot (*.crms)"
+
     @staticmethod
-    def export_data(parent: QWidget = None) -> None:
-        """Export both players and roles to single JSON file."""
-        path, _ = QFileDialog.getSaveFileName(
-            parent, "Export data", filter="Clan Role Manager Files (*.crm)"
+    def choose_export_path(parent: 'QWidget' = None) -> str:
+        """Ask for the export file; returns an empty string if the dialog was cancelled."""
+        # Qt is imported only by the dialogs, so the import/export code also runs headless
+        from PySide6.QtWidgets import QFileDialog
+        path, selected_filter = QFileDialog.getSaveFileName(
+            parent, "Export data", filter=f"{DataManager.CRM_FILTER};;{DataManager.SNAPSHOT_FILTER}"
         )
 
-        if not path.endswith('.crm'):
-            path += '.crm'
+        if path and not path.endswith(('.crm', snapshot_codec.EXTENSION)):
+            path += snapshot_codec.EXTENSION if selected_filter == DataManager.SNAPSHOT_FILTER else '.crm'
+        return path
 
-        if not path:
-            return
+    @staticmethod
+    def choose_import_path(parent: 'QWidget' = None) -> str:
+        """Ask for the file to import; returns an empty string if the dialog was cancelled."""
+        from PySide6.QtWidgets import QFileDialog
+        path, _ = QFileDialog.getOpenFileName(
+            parent, "Import data", filter="Clan Role Manager Files (*.crm *.crms)"
+        )
+        return path
 
-        data = {
-            'players': [p.to_dict() for p in PlayerService.list_players()],
-            'roles': [r.to_dict() for r in RoleService.list_roles_with_priority()],
-            'version': '1.0'
-        }
+    @staticmethod
+    def export_data(parent: 'QWidget' = None) -> Optional[TransferStats]:
+        """Export both players and roles to a .crm archive chosen in a dialog."""
+        path = DataManager.choose_export_path(parent)
+        if path:
+            return DataManager.export_to_path(path)
+        return None
 
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+    @staticmethod
+    def import_data(parent: 'QWidget' = None) -> Optional[ImportReport]:
+        """Import players and roles from a .crm archive chosen in a dialog."""
+        path = DataManager.choose_import_path(parent)
+        if not path:
+            return None
+        return DataManager.import_from_path(path)
+
+    @staticmethod
+    def _report(progress: Optional[ProgressCallback], done: int, total: int, start: float, action: str) -> None:
+        """Progress with throughput, e.g. "Імпорт: 10000 / 50000 (25000 рядків/с)"."""
+        if progress is None:
+            return
+        elapsed = time.perf_counter() - start
+        rate = f" ({done / elapsed:.0f} рядків/с)" if elapsed > 0 and done else ""
+        of_total = f" / {total}" if total else ""
+        progress(done, total, f"{action}: {done}{of_total}{rate}")
 
     @staticmethod
-    def import_data(parent: QWidget = None) -> Tuple[int, int]:
+    def export_to_path(path: str, progress: Optional[ProgressCallback] = None) -> TransferStats:
         """
-        Import both players and roles from single JSON file.
-        Returns tuple of (players_imported, roles_imported).
+        Export players and roles to the given file without any dialogs (safe off the GUI thread).
+        Players are streamed from the database into a JSON Lines archive, so memory use
+        does not grow with the roster. The file is written next to the target and moved
+        into place, so an aborted export leaves no partial file.
         """
-        path, _ = QFileDialog.getOpenFileName(
-            parent, "Import data", filter="Clan Role Manager Files (*.crm)"
-        )
+        if path.endswith(snapshot_codec.EXTENSION):
+            return DataManager.export_snapshot(path, progress)
+
+        start = time.perf_counter()
+        roles = [r.to_dict() for r in RoleService.list_roles_with_priority()]
+        total = PlayerService.count_players()
+
+        def players() -> Iterator[Dict]:
+            for i, player in enumerate(PlayerService.iter_players()):
+                if i % DataManager.PROGRESS_STEP == 0:
+                    DataManager._report(progress, i, total, start, "Експорт")
+                yield player.to_dict()
+
+        tmp_path = path + '.tmp'
+        try:
+            written = write_crm(tmp_path, roles, players(), total)
+            if progress:
+                progress(written, written, "")
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return TransferStats(written, len(roles), time.perf_counter() - start)
 
+    @staticmethod
+    def import_from_path(path: str, progress: Optional[ProgressCallback] = None) -> ImportReport:
+        """
+        Import players, roles and assignment history from the given file without any
+        dialogs (safe off the GUI thread). The format (.crm archive or .crms snapshot) is
+        detected from the content. Archives are read one player at a time; everything is
+        upserted in one transaction, and if progress raises, the whole import is rolled back.
+        """
+        if progress:
+            progress(0, 0, "Читання файлу…")
+        if snapshot_codec.is_snapshot(path):
+            roles, players = snapshot_codec.read_snapshot(path)
+            was_empty = PlayerService.count_players() == 0
+            report = ImportService.import_models(roles, players, len(players), progress)
+            if was_empty and report.players_duplicates == 0:
+                # The database now holds exactly the snapshot's players: fill the roster
+                # cache with them instead of reading everything back on the next refresh
+                roster_cache.players(lambda: players)
+            return report
+        with CrmReader(path) as reader:
+            return ImportService.import_roster(reader.roles, reader.players(), reader.total or 0, progress)
 
-        if not path:
-            return 0, 0
-
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        # Handle different formats
-        if isinstance(data, list):
-            # Old format - just players
-            players_data = data
-            roles_data = []
-        else:
-            # New format - players and roles
-            players_data = data.get('players', [])
-            roles_data = data.get('roles', [])
-
-        # Import roles first
-        roles_count = 0
-        for r in roles_data:
-            try:
-                RoleService.add_role(r['name'], r.get('priority', 0))
-                roles_count += 1
-            except Exception:
-                # skip duplicates or errors
-                pass
-
-        # Import players
-        players_count = 0
-        for p in players_data:
-            try:
-                PlayerService.add_player(p['nickname'], p.get('preferences', []))
-                players_count += 1
-            except Exception:
-                PlayerService.update_player(p['nickname'], p['nickname'], p.get('preferences', []))
-                pass
-
-        return players_count, roles_count
+    @staticmethod
+    def export_snapshot(path: str, progress: Optional[ProgressCallback] = None) -> TransferStats:
+        """Export players and roles to a compact binary .crms snapshot (see utils.snapshot_codec)."""
+        start = time.perf_counter()
+        if progress:
+            progress(0, 0, "Читання даних…")
+        roles = RoleService.list_roles_with_priority()
+        # Usually served by the roster cache; the snapshot is built in memory anyway
+        players = PlayerService.list_players()
+        if progress:
+            progress(0, 0, "Запис файлу…")
+        tmp_path = path + '.tmp'
+        try:
+            snapshot_codec.write_snapshot(tmp_path, roles, players)
+            if progress:
+                progress(1, 1, "")
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return TransferStats(len(players), len(roles), time.perf_counter() - start)
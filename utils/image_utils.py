@@ -0,0 +1,94 @@
+"""
+Image helpers for OCR: in-memory access to Qt images and text region detection.
+"""
+
+from typing import TYPE_CHECKING, Optional, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from PySide6.QtGui import QImage
+
+
+def to_rgb888(image: 'QImage') -> 'QImage':
+    """Return the image in RGB888 format (a cheap shared copy if it already is)."""
+    # Qt is imported on use, so find_text_column also works without a display (CLI)
+    from PySide6.QtGui import QImage
+    if image.format() == QImage.Format_RGB888:
+        return image
+    return image.convertToFormat(QImage.Format_RGB888)
+
+
+def qimage_to_array(image: 'QImage') -> np.ndarray:
+    """
+    View the pixels of an RGB888 QImage as a (height, width, 3) uint8 array.
+
+    The channels are in RGB order, while easyocr takes 3-channel arrays for
+    BGR when it makes the grayscale image it recognises; OCRJob passes it
+    rgb_to_grey() of the array instead.
+
+    No pixels are copied: the array shares the image's memory (rows may be
+    padded, which the strides account for), so the QImage must be kept alive
+    and unmodified while the array is in use.
+    """
+    from PySide6.QtGui import QImage
+    if image.format() != QImage.Format_RGB888:
+        raise ValueError("Expected a QImage in Format_RGB888, use to_rgb888() first")
+    return np.ndarray(
+        shape=(image.height(), image.width(), 3),
+        dtype=np.uint8,
+        buffer=image.constBits(),
+        strides=(image.bytesPerLine(), 3, 1)
+    )
+
+
+def rgb_to_grey(image: np.ndarray) -> np.ndarray:
+    """
+    Luminance of an RGB uint8 array as a (height, width) uint8 array, with
+    the fixed-point weights and rounding of OpenCV's COLOR_RGB2GRAY.
+    """
+    channels = image.astype(np.uint32)
+    grey = channels[..., 0] * 4899 + channels[..., 1] * 9617 + channels[..., 2] * 1868
+    return ((grey + (1 << 13)) >> 14).astype(np.uint8)
+
+
+# Brightness step between neighbouring pixels that counts as a glyph edge
+EDGE_THRESHOLD = 40
+# Fraction of edge pixels a column needs to count as part of a text column
+COLUMN_MIN_DENSITY = 0.01
+
+
+def find_text_column(image: np.ndarray, max_width_ratio: float = 0.6,
+                     margin: int = 8) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Locate the densest vertical band of text (such as a Discord member list)
+    from the horizontal-gradient profile of the image's columns.
+
+    Returns (x, y, width, height) of the band trimmed to its text rows, or
+    None when no band narrower than max_width_ratio of the image is found.
+    """
+    height, width = image.shape[:2]
+    # The green channel is close enough to luminance for edge detection
+    channel = image[..., 1] if image.ndim == 3 else image
+    edges = np.abs(np.diff(channel.astype(np.int16), axis=1)) > EDGE_THRESHOLD
+    profile = edges.mean(axis=0)
+
+    # Runs of text columns, joining gaps between words and around avatars
+    min_gap = max(16, width // 100)
+    bands = []
+    for x in np.flatnonzero(profile > COLUMN_MIN_DENSITY):
+        if bands and x - bands[-1][1] <= min_gap:
+            bands[-1][1] = x + 1
+        else:
+            bands.append([x, x + 1])
+
+    candidates = [(x0, x1) for x0, x1 in bands if 32 <= x1 - x0 <= width * max_width_ratio]
+    if not candidates:
+        return None
+    x0, x1 = max(candidates, key=lambda band: profile[band[0]:band[1]].mean())
+
+    rows = np.flatnonzero(edges[:, x0:x1].any(axis=1))
+    y0, y1 = rows[0], rows[-1] + 1
+    x0, y0 = max(0, x0 - margin), max(0, y0 - margin)
+    x1, y1 = min(width, x1 + margin + 1), min(height, y1 + margin)
+    return int(x0), int(y0), int(x1 - x0), int(y1 - y0)
@@ -1,10 +1,17 @@
-from PySide6.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsPixmapItem
-from PySide6.QtGui import QPixmap, QWheelEvent, QMouseEvent
-from PySide6.QtCore import Qt, QPointF
+from typing import Optional
+
+from PySide6.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsPixmapItem, QGraphicsRectItem
+from PySide6.QtGui import QPixmap, QWheelEvent, QMouseEvent, QPen, QColor
+from PySide6.QtCore import Qt, QPointF, QRect, QRectF, Signal
 
 
 class ImageViewer(QGraphicsView):
-    """Віджет для відображення картинки з масштабуванням і перетягуванням."""
+    """
+    Віджет для відображення картинки з масштабуванням і перетягуванням.
+    Shift + перетягування виділяє область (ROI) у координатах картинки.
+    """
+
+    roiSelected = Signal(QRect)
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -16,6 +23,16 @@ class ImageViewer(QGraphicsView):
         self._scene.addItem(self._photo)
         self.setScene(self._scene)
 
+        # Рамка виділеної області
+        pen = QPen(QColor(220, 40, 40), 2)
+        pen.setCosmetic(True)
+        self._roi_item = QGraphicsRectItem()
+        self._roi_item.setPen(pen)
+        self._roi_item.setVisible(False)
+        self._scene.addItem(self._roi_item)
+        self._roi: Optional[QRect] = None
+        self._roi_origin: Optional[QPointF] = None
+
         self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
         self.setResizeAnchor(QGraphicsView.AnchorUnderMouse)
 
@@ -35,6 +52,53 @@ class ImageViewer(QGraphicsView):
         else:
             self._empty = True
             self._photo.setPixmap(QPixmap())
+        # Область зберігається для скріншотів того ж розміру (пакет з однаковою розкладкою)
+        if self._roi is not None and (self._empty or not self._photo.pixmap().rect().contains(self._roi)):
+            self.clearRoi()
+
+    def roi(self) -> Optional[QRect]:
+        """Виділена область у пікселях картинки або None."""
+        return self._roi
+
+    def clearRoi(self):
+        self._roi = None
+        self._roi_item.setVisible(False)
+
+    def mousePressEvent(self, event: QMouseEvent):
+        """Shift + ліва кнопка починає виділення області."""
+        if (self.hasPhoto() and event.button() == Qt.LeftButton
+                and event.modifiers() & Qt.ShiftModifier):
+            self._roi_origin = self.mapToScene(event.position().toPoint())
+            self.setDragMode(QGraphicsView.NoDrag)
+            self._roi_item.setRect(QRectF(self._roi_origin, self._roi_origin))
+            self._roi_item.setVisible(True)
+            event.accept()
+            return
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event: QMouseEvent):
+        if self._roi_origin is not None:
+            current = self.mapToScene(event.position().toPoint())
+            self._roi_item.setRect(QRectF(self._roi_origin, current).normalized())
+            event.accept()
+            return
+        super().mouseMoveEvent(event)
+
+    def mouseReleaseEvent(self, event: QMouseEvent):
+        if self._roi_origin is not None and event.button() == Qt.LeftButton:
+            self._roi_origin = None
+            self.setDragMode(QGraphicsView.ScrollHandDrag)
+            rect = self._roi_item.rect().toAlignedRect().intersected(self._photo.pixmap().rect())
+            if rect.width() < 8 or rect.height() < 8:
+                # Випадковий клік замість виділення
+                self.clearRoi()
+            else:
+                self._roi = rect
+                self._roi_item.setRect(QRectF(rect))
+                self.roiSelected.emit(rect)
+            event.accept()
+            return
+        super().mouseReleaseEvent(event)
 
     def wheelEvent(self, event: QWheelEvent):
         """Масштабування колесиком миші."""
@@ -0,0 +1,323 @@
+"""
+Opt-in timing instrumentation for services, database queries and the UI.
+
+Spans time background tasks, tab refreshes, service calls, OCR runs and
+every SQL statement; UI handlers are not instrumented themselves. Nothing is
+recorded until recorder.enable() is called (from the Performance dialog, the
+CLI's --perf flag, or at start-up with CLAN_PERF=1); while disabled the
+wrappers only track how deeply spans are nested.
+
+The outermost span on a thread is one user action (a tab refresh, a
+background task, a service call made directly by a button handler): besides
+its own timing it is recorded as an action together with the number of SQL
+statements run inside it. Whether a span tree is recorded is decided when
+its outermost span starts, so enabling recording in the middle of an action
+takes effect from the next one. Should a span ever have to wait for the
+user, wrap the modal dialog in idle(): that time is not counted, and spans
+started meanwhile are actions of their own.
+"""
+
+import functools
+import inspect
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Set to 1 to record from start-up
+PERF_ENV = "CLAN_PERF"
+# Latest durations kept per span for the percentiles
+SAMPLE_LIMIT = 1000
+# SQL text is whitespace-collapsed and cut to this length
+QUERY_TEXT_LIMIT = 160
+
+KIND_ACTION = "action"
+KIND_CALL = "call"
+KIND_SQL = "sql"
+
+
+class SpanStats:
+    """Aggregated timings of one span name."""
+
+    __slots__ = ('kind', 'name', 'calls', 'total', 'max', 'samples', 'queries', 'rows')
+
+    def __init__(self, kind: str, name: str):
+        self.kind = kind
+        self.name = name
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=SAMPLE_LIMIT)
+        self.queries = 0
+        self.rows = 0
+
+    def add(self, seconds: float, queries: int, rows: int) -> None:
+        self.calls += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+        self.queries += queries
+        self.rows += rows
+
+    def percentile(self, p: float) -> float:
+        """Nearest-rank percentile of the kept samples, in seconds."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+    def to_dict(self) -> Dict:
+        return {
+            'kind': self.kind,
+            'name': self.name,
+            'calls': self.calls,
+            'total_ms': self.total * 1000,
+            'p50_ms': self.percentile(50) * 1000,
+            'p95_ms': self.percentile(95) * 1000,
+            'max_ms': self.max * 1000,
+            'queries': self.queries,
+            'rows': self.rows,
+        }
+
+
+class _Frame:
+    __slots__ = ('recording', 'queries', 'idle')
+
+    def __init__(self, recording: bool, queries: int = 0):
+        self.recording = recording
+        self.queries = queries
+        self.idle = 0.0
+
+
+# Shared frame of the spans in a tree that is not recorded
+_UNRECORDED = _Frame(False)
+
+
+class _Span:
+    """Context manager timing one span; rows may be set inside the block (SQL spans)."""
+
+    __slots__ = ('recorder', 'kind', 'name', 'rows', '_frame', '_start')
+
+    def __init__(self, recorder: 'PerfRecorder', kind: str, name: str):
+        self.recorder = recorder
+        self.kind = kind
+        self.name = name
+        self.rows = 0
+
+    def __enter__(self):
+        stack = self.recorder._stack()
+        # Nested spans follow the outermost one, so an action is recorded whole or not at all
+        if stack[-1].recording if stack else self.recorder.enabled:
+            # A statement counts itself; other spans count the statements run inside them
+            self._frame = _Frame(True, 1 if self.kind == KIND_SQL else 0)
+            self._start = time.perf_counter()
+        else:
+            self._frame = _UNRECORDED
+        stack.append(self._frame)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        stack = self.recorder._stack()
+        stack.pop()
+        frame = self._frame
+        if not frame.recording or not self.recorder.enabled:
+            return False
+        seconds = time.perf_counter() - self._start - frame.idle
+        if stack:
+            stack[-1].queries += frame.queries
+        self.recorder.record(self.kind, self.name, seconds, frame.queries, self.rows)
+        if not stack and self.kind != KIND_SQL:
+            self.recorder.record(KIND_ACTION, self.name, seconds, frame.queries)
+        return False
+
+
+class _Idle:
+    """Context manager around waiting for the user: not counted in the open spans."""
+
+    __slots__ = ('recorder', '_saved', '_start')
+
+    def __init__(self, recorder: 'PerfRecorder'):
+        self.recorder = recorder
+
+    def __enter__(self):
+        self._saved = self.recorder._stack()
+        # Events handled by the nested event loop of a modal dialog start their own actions
+        self.recorder._local.stack = []
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._start
+        self.recorder._local.stack = self._saved
+        for frame in self._saved:
+            if frame.recording:
+                frame.idle += elapsed
+        return False
+
+
+class _NullSpan:
+    """Returned when there is nothing to record."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def __setattr__(self, name, value):
+        pass  # rows assigned by instrumented code are ignored
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class PerfRecorder:
+    """Thread-safe store of span timings."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats: Dict[Tuple[str, str], SpanStats] = {}
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        """Forget everything recorded so far."""
+        with self._lock:
+            self._stats = {}
+            self.started = time.time()
+
+    def _stack(self) -> List[_Frame]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def record(self, kind: str, name: str, seconds: float, queries: int = 0, rows: int = 0) -> None:
+        """Add one measurement (spans call this on exit)."""
+        with self._lock:
+            stats = self._stats.get((kind, name))
+            if stats is None:
+                stats = self._stats[(kind, name)] = SpanStats(kind, name)
+            stats.add(seconds, queries, rows)
+
+    def _recording(self) -> bool:
+        """Whether a statement run now is recorded: inside a recorded span, or outside any span while enabled."""
+        if not self.enabled:
+            return False
+        stack = self._stack()
+        return not stack or stack[-1].recording
+
+    def span(self, name: str, kind: str = KIND_CALL):
+        """Context manager timing the block under name."""
+        return _Span(self, kind, name)
+
+    def idle(self):
+        """Context manager around waiting for the user (e.g. dlg.exec()) inside a span."""
+        if not self._stack():
+            return _NULL_SPAN
+        return _Idle(self)
+
+    def query(self, sql: str):
+        """Span for one SQL statement; set .rows on the returned object."""
+        # Statements have no nested spans, so unrecorded ones are skipped entirely
+        if not self._recording():
+            return _NULL_SPAN
+        return _Span(self, KIND_SQL, normalize_query(sql))
+
+    def record_query(self, sql: str, seconds: float, rows: int) -> None:
+        """Record a statement timed by the caller (e.g. a streamed query) in the current span."""
+        if not self._recording():
+            return
+        stack = self._stack()
+        if stack:
+            stack[-1].queries += 1
+        self.record(KIND_SQL, normalize_query(sql), seconds, 1, rows)
+
+    def stats(self, kind: Optional[str] = None) -> List[SpanStats]:
+        """Recorded spans (of one kind), slowest in total first."""
+        with self._lock:
+            stats = [s for s in self._stats.values() if kind is None or s.kind == kind]
+        return sorted(stats, key=lambda s: s.total, reverse=True)
+
+    def report(self) -> Dict:
+        """Everything recorded, as plain data."""
+        return {
+            'started': time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started)),
+            'actions': [s.to_dict() for s in self.stats(KIND_ACTION)],
+            'calls': [s.to_dict() for s in self.stats(KIND_CALL)],
+            'queries': [s.to_dict() for s in self.stats(KIND_SQL)],
+        }
+
+    def export_json(self, path: str, extra: Dict = None) -> None:
+        """Write report() (plus extra sections, e.g. cache counters) to a JSON file."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({**self.report(), **(extra or {})}, f, ensure_ascii=False, indent=2)
+
+    def format_report(self, limit: int = 20) -> str:
+        """Plain-text tables of the slowest actions, calls and queries."""
+        lines = []
+        for title, kind in (("Actions", KIND_ACTION), ("Calls", KIND_CALL), ("SQL", KIND_SQL)):
+            stats = self.stats(kind)[:limit]
+            if not stats:
+                continue
+            lines.append(f"{title}:")
+            lines.append(f"  {'calls':>7} {'total ms':>10} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8}  name")
+            for s in stats:
+                lines.append(f"  {s.calls:>7} {s.total * 1000:>10.1f} {s.percentile(50) * 1000:>9.2f} "
+                             f"{s.percentile(95) * 1000:>9.2f} {s.queries:>8}  {s.name}")
+        return "\n".join(lines)
+
+
+def normalize_query(sql: str) -> str:
+    """SQL text on one line, cut to QUERY_TEXT_LIMIT characters."""
+    text = " ".join(sql.split())
+    return text if len(text) <= QUERY_TEXT_LIMIT else text[:QUERY_TEXT_LIMIT - 1] + "…"
+
+
+# Global recorder instance
+recorder = PerfRecorder(enabled=os.environ.get(PERF_ENV, "") not in ("", "0"))
+
+
+def timed(name: str = None, kind: str = KIND_CALL) -> Callable:
+    """Decorator recording every call of the function as a span (named by its qualified name)."""
+    def decorate(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not recorder.enabled:
+                # Only mark the nesting, so spans enabled in the middle of this call are not actions
+                stack = recorder._stack()
+                stack.append(_UNRECORDED)
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    stack.pop()
+            with _Span(recorder, kind, label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def instrument(cls):
+    """
+    Class decorator applying timed() to every static method. Generator methods
+    are left alone: a span cannot stay open across yields (their SQL is still
+    recorded by the database layer).
+    """
+    for attr, value in list(vars(cls).items()):
+        if isinstance(value, staticmethod) and not inspect.isgeneratorfunction(value.__func__):
+            setattr(cls, attr, staticmethod(timed(f"{cls.__name__}.{attr}")(value.__func__)))
+    return cls
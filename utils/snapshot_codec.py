@@ -0,0 +1,196 @@
+"""
+Compact binary snapshot of the roster (.crms).
+
+Layout: an 8-byte header (magic b"CRMS", format version, compression) and a
+zlib- or lzma-compressed body of length-prefixed sections. Role names, nicknames
+and assignment dates are stored once as NUL-separated UTF-8 tables; preferences
+and assignment counters are packed arrays of indices into those tables, so
+nothing is repeated per player. Loading decodes straight into Role and Player
+objects.
+"""
+
+import array
+import lzma
+import struct
+import sys
+import zlib
+from typing import Iterable, List, Tuple
+
+from models.player import Player
+from models.role import Role
+
+MAGIC = b"CRMS"
+VERSION = 1
+EXTENSION = ".crms"
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_LZMA = 2
+# Level 3 is ~4x faster than the default 6 for a ~10% larger file
+ZLIB_LEVEL = 3
+
+_HEADER = struct.Struct("<4sHBx")
+_SECTION_LENGTH = struct.Struct("<Q")
+_COUNTS = struct.Struct("<III")  # roles, players, distinct dates
+
+
+def is_snapshot(path: str) -> bool:
+    """Whether the file starts with the snapshot magic bytes."""
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def _pack(typecode: str, values) -> bytes:
+    packed = array.array(typecode, values)
+    if sys.byteorder == 'big':
+        packed.byteswap()  # stored little-endian
+    return packed.tobytes()
+
+
+def _unpack(typecode: str, data: bytes) -> array.array:
+    unpacked = array.array(typecode)
+    unpacked.frombytes(data)
+    if sys.byteorder == 'big':
+        unpacked.byteswap()
+    return unpacked
+
+
+def _pack_strings(strings: List[str]) -> bytes:
+    for s in strings:
+        if '\0' in s:
+            raise ValueError(f"Name contains a NUL character: {s!r}")
+    return "\0".join(strings).encode('utf-8')
+
+
+def _unpack_strings(data: bytes, count: int) -> List[str]:
+    strings = data.decode('utf-8').split("\0") if count else []
+    if len(strings) != count:
+        raise ValueError("Corrupted snapshot: string table size mismatch")
+    return strings
+
+
+def encode_snapshot(roles: List[Role], players: Iterable[Player]) -> bytes:
+    """Uncompressed snapshot body."""
+    role_index = {role.name: i for i, role in enumerate(roles)}
+    role_names = [role.name for role in roles]
+    date_index = {}
+
+    def role_id(name: str) -> int:
+        # Roles referenced by players but missing from the role list are appended
+        if name not in role_index:
+            role_index[name] = len(role_names)
+            role_names.append(name)
+        return role_index[name]
+
+    nicknames, pref_counts, pref_roles = [], array.array('I'), array.array('I')
+    assign_counts, assign_roles = array.array('I'), array.array('I')
+    assign_values, assign_dates = array.array('i'), array.array('I')
+    for player in players:
+        nicknames.append(player.nickname)
+        prefs = list(dict.fromkeys(player.preferences))
+        pref_counts.append(len(prefs))
+        pref_roles.extend(role_id(role) for role in prefs)
+        assign_counts.append(len(player.role_assignments))
+        for role, (count, date) in player.role_assignments.items():
+            assign_roles.append(role_id(role))
+            assign_values.append(count)
+            assign_dates.append(date_index.setdefault(date, len(date_index)))
+
+    priorities = [role.priority for role in roles] + [0] * (len(role_names) - len(roles))
+    sections = [
+        _COUNTS.pack(len(role_names), len(nicknames), len(date_index)),
+        _pack_strings(role_names),
+        _pack('i', priorities),
+        _pack_strings(nicknames),
+        _pack('I', pref_counts),
+        _pack('I', pref_roles),
+        _pack('I', assign_counts),
+        _pack('I', assign_roles),
+        _pack('i', assign_values),
+        _pack_strings(list(date_index)),
+        _pack('I', assign_dates),
+    ]
+    return b"".join(_SECTION_LENGTH.pack(len(section)) + section for section in sections)
+
+
+def decode_snapshot(body: bytes) -> Tuple[List[Role], List[Player]]:
+    """Roles and players of an uncompressed snapshot body."""
+    sections, offset = [], 0
+    while offset < len(body):
+        if offset + _SECTION_LENGTH.size > len(body):
+            raise ValueError("Corrupted snapshot: truncated section length")
+        (length,) = _SECTION_LENGTH.unpack_from(body, offset)
+        offset += _SECTION_LENGTH.size
+        sections.append(body[offset:offset + length])
+        offset += length
+    if len(sections) != 11 or len(sections[0]) != _COUNTS.size:
+        raise ValueError("Corrupted snapshot: unexpected number of sections")
+
+    num_roles, num_players, num_dates = _COUNTS.unpack(sections[0])
+    role_names = _unpack_strings(sections[1], num_roles)
+    priorities = _unpack('i', sections[2])
+    nicknames = _unpack_strings(sections[3], num_players)
+    pref_counts, pref_roles = _unpack('I', sections[4]), _unpack('I', sections[5])
+    assign_counts, assign_roles = _unpack('I', sections[6]), _unpack('I', sections[7])
+    assign_values = _unpack('i', sections[8])
+    dates = _unpack_strings(sections[9], num_dates)
+    assign_dates = _unpack('I', sections[10])
+    if (len(priorities) != num_roles or len(pref_counts) != num_players or len(assign_counts) != num_players
+            or len(pref_roles) != sum(pref_counts) or len(assign_roles) != sum(assign_counts)
+            or len(assign_values) != len(assign_roles) or len(assign_dates) != len(assign_roles)):
+        raise ValueError("Corrupted snapshot: array size mismatch")
+    # Indices into the string tables come from the file too
+    if (max(pref_roles, default=-1) >= num_roles or max(assign_roles, default=-1) >= num_roles
+            or max(assign_dates, default=-1) >= num_dates):
+        raise ValueError("Corrupted snapshot: index out of range")
+
+    roles = [Role(name=name, priority=priority) for name, priority in zip(role_names, priorities)]
+    pref_names = [role_names[i] for i in pref_roles]
+    assignments = list(zip([role_names[i] for i in assign_roles], zip(assign_values, [dates[i] for i in assign_dates])))
+    players = []
+    p = a = 0
+    for nickname, num_prefs, num_assignments in zip(nicknames, pref_counts, assign_counts):
+        players.append(Player(nickname, pref_names[p:p + num_prefs], dict(assignments[a:a + num_assignments])))
+        p += num_prefs
+        a += num_assignments
+    return roles, players
+
+
+def write_snapshot(path: str, roles: List[Role], players: Iterable[Player],
+                   compression: int = COMPRESSION_ZLIB) -> int:
+    """Write a snapshot file; returns its size in bytes."""
+    body = encode_snapshot(roles, players)
+    if compression == COMPRESSION_ZLIB:
+        body = zlib.compress(body, ZLIB_LEVEL)
+    elif compression == COMPRESSION_LZMA:
+        body = lzma.compress(body, preset=6)
+    elif compression != COMPRESSION_NONE:
+        raise ValueError(f"Unknown compression {compression}")
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, compression))
+        f.write(body)
+    return _HEADER.size + len(body)
+
+
+def read_snapshot(path: str) -> Tuple[List[Role], List[Player]]:
+    """Roles and players stored in a snapshot file."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        raise ValueError("Not a .crms snapshot")
+    magic, version, compression = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a .crms snapshot")
+    if version > VERSION:
+        raise ValueError(f"Unsupported snapshot version {version}")
+    body = data[_HEADER.size:]
+    try:
+        if compression == COMPRESSION_ZLIB:
+            body = zlib.decompress(body)
+        elif compression == COMPRESSION_LZMA:
+            body = lzma.decompress(body)
+        elif compression != COMPRESSION_NONE:
+            raise ValueError(f"Unknown compression {compression}")
+    except (zlib.error, lzma.LZMAError) as e:
+        raise ValueError(f"Corrupted snapshot: {e}") from e
+    return decode_snapshot(body)